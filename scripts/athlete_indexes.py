@@ -0,0 +1,104 @@
+"""Precomputed lookup indexes over processed athletes (athletes_indexes.json).
+
+    {
+      "metadata": {...},
+      "sport_counts": {"alpine_skiing": 10, ...},
+      "by_sport": {"alpine_skiing": ["203633", ...]},          # by current_rank
+      "best_rank_by_sport": {"alpine_skiing": ["235622", ...]}, # by best_rank
+      "by_date": {"2026-02-20": [["235622", "<result_uid>"], ...]},  # newest date first
+      "by_category": {"World Cup": [["235622", "<result_uid>"], ...]}
+    }
+
+Result references are [athlete id, result_uid], not positions: the
+patchers carry result_uid into the site bundle but dedupe and re-sort its
+recent_results, so a uid resolves in athletes.json and in the bundle
+alike. Results written before the identity index get the same fallback
+uid supabase_sync and the results store use. Unranked athletes sort
+after ranked ones; ties keep dataset order. The builder only keeps ids,
+ranks and references, so it can be fed one athlete at a time from a
+streaming run.
+"""
+import json
+import os
+from datetime import datetime
+
+from result_identity import content_uid
+
+UNRANKED = float("inf")
+
+
+def _rank_key(value):
+    return value if isinstance(value, int) and value > 0 else UNRANKED
+
+
+class IndexBuilder:
+    def __init__(self):
+        self.count = 0
+        self.sport_members = {}
+        self.by_date = {}
+        self.by_category = {}
+
+    def add(self, athlete):
+        athlete_id = athlete.get("id")
+        fis_code = athlete.get("fis_code")
+        sport = athlete.get("sport") or "unknown"
+        self.sport_members.setdefault(sport, []).append(
+            (athlete_id, _rank_key(athlete.get("current_rank")), _rank_key(athlete.get("best_rank")))
+        )
+        seen = set()
+        for r in athlete.get("recent_results") or []:
+            uid = r.get("result_uid") or content_uid(fis_code, r)
+            # Exact duplicates share a uid and are one result in the bundle
+            if uid in seen:
+                continue
+            seen.add(uid)
+            ref = [athlete_id, uid]
+            if r.get("date"):
+                self.by_date.setdefault(r["date"], []).append(ref)
+            if r.get("category"):
+                self.by_category.setdefault(r["category"], []).append(ref)
+        self.count += 1
+
+    def build(self):
+        # sorted() is stable, so equal ranks keep dataset order
+        by_sport = {
+            sport: [m[0] for m in sorted(members, key=lambda m: m[1])]
+            for sport, members in sorted(self.sport_members.items())
+        }
+        best_rank_by_sport = {
+            sport: [m[0] for m in sorted(members, key=lambda m: m[2])]
+            for sport, members in sorted(self.sport_members.items())
+        }
+        return {
+            "metadata": {
+                "last_updated": datetime.now().isoformat(),
+                "total_athletes": self.count,
+            },
+            "sport_counts": {sport: len(members) for sport, members in sorted(self.sport_members.items())},
+            "by_sport": by_sport,
+            "best_rank_by_sport": best_rank_by_sport,
+            "by_date": {d: self.by_date[d] for d in sorted(self.by_date, reverse=True)},
+            "by_category": {c: self.by_category[c] for c in sorted(self.by_category)},
+        }
+
+
+def build_indexes(athletes):
+    builder = IndexBuilder()
+    for athlete in athletes:
+        builder.add(athlete)
+    return builder.build()
+
+
+def indexes_path_for(output_path):
+    """athletes.json -> athletes_indexes.json in the same directory."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_indexes{ext or '.json'}"
+
+
+def write_indexes(indexes, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(indexes, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
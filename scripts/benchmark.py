@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Offline throughput benchmarks for the scraper, parsers and processor.
+
+Runs against the local page corpus (fis_fixtures.py) through the stub
+server (fis_stub_server.py), so no live FIS access is needed.
+
+    python3 scripts/benchmark.py --suites scrape,parse,process --sizes 43,1000,10000
+    python3 scripts/benchmark.py --suites sync --sizes 2200 --dsn postgresql://localhost/scratch   # needs psycopg
+
+The sync suite truncates the Supabase tables of --dsn: point it at a
+scratch database with supabase_schema.sql applied, never at production.
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+from fis_fixtures import CORPUS_DIR, load_corpus
+from fis_parsers import PARSER_ENGINES, get_parser
+from fis_scraper import FISScraper
+from fis_stub_server import start_stub_server
+
+SUITES = ("scrape", "parse", "process", "sync")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Scraper/processor benchmark suite")
+    p.add_argument("--suites", default=",".join(SUITES), help="comma-separated: " + ",".join(SUITES))
+    p.add_argument("--sizes", default="43,500,2000,10000", help="synthetic roster sizes")
+    p.add_argument("--scrape-max-size", type=int, default=2000, help="skip scrape runs above this roster size")
+    p.add_argument("--corpus-dir", default=CORPUS_DIR)
+    p.add_argument("--workers", type=int, default=4, help="scraper workers")
+    p.add_argument("--parse-workers", type=int, default=0, help="scraper parse processes (0 = parse in the fetch workers)")
+    p.add_argument("--parser-engine", choices=sorted(PARSER_ENGINES), default="bs4")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="stub server latency")
+    p.add_argument("--error-rate", type=float, default=0.0, help="stub server 503 rate")
+    p.add_argument("--parse-repeat", type=int, default=3, help="passes over the corpus per parser engine")
+    p.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL", ""), help="scratch Postgres for the sync suite (tables are truncated)")
+    p.add_argument("--sync-chunk-size", type=int, default=500, help="rows per upsert request in the sync suite")
+    p.add_argument("--output", default="", help="optional JSON report path")
+    return p.parse_args()
+
+
+def synthetic_ids(corpus_ids, size):
+    ids = list(corpus_ids[:size])
+    next_id = 9000000
+    while len(ids) < size:
+        ids.append(str(next_id))
+        next_id += 1
+    return ids
+
+
+def bench_scrape(args, sizes, corpus):
+    server = start_stub_server(corpus_dir=args.corpus_dir, latency_ms=args.latency_ms, error_rate=args.error_rate, seed=7)
+    out = []
+    try:
+        for size in sizes:
+            if size > args.scrape_max_size:
+                print(f"  scrape size={size}: skipped (--scrape-max-size {args.scrape_max_size})")
+                continue
+            urls = [server.biography_url(cid) for cid in synthetic_ids(sorted(corpus), size)]
+            with tempfile.TemporaryDirectory() as tmp:
+                scraper = FISScraper(
+                    cache_file=os.path.join(tmp, "scraper_cache.json"),
+                    force_refresh=True,
+                    max_retries=0,
+                    request_interval_sec=0,
+                    max_workers=args.workers,
+                    parse_workers=args.parse_workers,
+                    parser_engine=args.parser_engine,
+                )
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    profiles = scraper.scrape_all(urls)
+                elapsed = time.perf_counter() - t0
+            row = {
+                "suite": "scrape",
+                "size": size,
+                "workers": args.workers,
+                "parse_workers": args.parse_workers,
+                "parser_engine": args.parser_engine,
+                "seconds": round(elapsed, 3),
+                "pages_per_sec": round(size / elapsed, 1) if elapsed else None,
+                "profiles": len(profiles),
+                "stats": dict(scraper.stats),
+            }
+            print(f"  scrape size={size} pages/sec={row['pages_per_sec']} ({elapsed:.2f}s, {len(profiles)} ok)")
+            out.append(row)
+    finally:
+        server.shutdown()
+    return out
+
+
+def bench_parse(args, corpus):
+    out = []
+    pages = [body for _, body in corpus.values()]
+    for name in sorted(PARSER_ENGINES):
+        parser = get_parser(name)
+        rows = 0
+        t0 = time.perf_counter()
+        for _ in range(args.parse_repeat):
+            for body in pages:
+                rows += len(parser.parse(body)["results"])
+        elapsed = time.perf_counter() - t0
+        row = {
+            "suite": "parse",
+            "engine": name,
+            "pages": len(pages) * args.parse_repeat,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "us_per_row": round(elapsed / rows * 1e6, 1) if rows else None,
+        }
+        print(f"  parse engine={name} us/row={row['us_per_row']} ({rows} rows)")
+        out.append(row)
+    return out
+
+
+def raw_profiles_from_corpus(corpus):
+    parser = get_parser("stream")
+    profiles = []
+    for cid, (url, body) in sorted(corpus.items()):
+        page = parser.parse(body)
+        profiles.append({
+            "fis_url": url,
+            "fis_code": cid,
+            "sport_code": url.split("sectorcode=")[1].split("&")[0] if url and "sectorcode=" in url else "FS",
+            "name_en": page["name"] or f"Athlete {cid}",
+            "birth_date": page["birth_date"],
+            "gender": None,
+            "results": page["results"],
+        })
+    return profiles
+
+
+def synthetic_roster(base, size):
+    roster = []
+    for i, cid in enumerate(synthetic_ids([p["fis_code"] for p in base], size)):
+        athlete = copy.deepcopy(base[i % len(base)])
+        athlete["fis_code"] = cid
+        roster.append(athlete)
+    return roster
+
+
+def bench_process(args, sizes, corpus):
+    from data_processor import DataProcessor
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = DataProcessor()
+    base = raw_profiles_from_corpus(corpus)
+    out = []
+    for size in sizes:
+        roster = synthetic_roster(base, size)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            processed = processor.process(roster)
+        elapsed = time.perf_counter() - t0
+        row = {
+            "suite": "process",
+            "size": size,
+            "seconds": round(elapsed, 3),
+            "athletes_per_sec": round(size / elapsed, 1) if elapsed else None,
+            "results": sum(len(a["recent_results"]) for a in processed),
+        }
+        print(f"  process size={size} athletes/sec={row['athletes_per_sec']} ({elapsed:.2f}s)")
+        out.append(row)
+    return out
+
+
+SYNC_TABLES = ("athletes", "athlete_results")
+
+
+def _sync_upsert(conn, table, rows, conflict_cols, chunk_size):
+    """Upsert like PostgREST does: one json_populate_recordset statement (and commit) per request."""
+    cols = [c for c in rows[0] if c != "synced_at"] if rows else []
+    keys = set(conflict_cols.split(","))
+    col_list = ", ".join(cols)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c not in keys)
+    sql = (
+        f"insert into public.{table} ({col_list}) select {col_list} "
+        f"from json_populate_recordset(null::public.{table}, %s::json) "
+        f"on conflict ({conflict_cols}) do update set {updates}"
+    )
+    for i in range(0, len(rows), chunk_size):
+        with conn.cursor() as cur:
+            cur.execute(sql, (json.dumps(rows[i : i + chunk_size]),))
+
+
+def _sync_state(conn):
+    with conn.cursor() as cur:
+        cur.execute("select fis_code, row_hash from public.athletes order by 1")
+        athletes = cur.fetchall()
+        cur.execute("select result_uid, row_hash from public.athlete_results order by 1")
+        return athletes, cur.fetchall()
+
+
+def _sync_reset(conn, seed_rows, chunk_size):
+    from supabase_sync import TABLE_KEYS
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "truncate public.athletes, public.athlete_results, public.deleted_results, "
+            "public.athletes_staging, public.athlete_results_staging"
+        )
+    for table, rows in zip(SYNC_TABLES, seed_rows):
+        _sync_upsert(conn, table, rows, TABLE_KEYS[table], chunk_size)
+    with conn.cursor() as cur:
+        cur.execute("vacuum analyze public.athletes")
+        cur.execute("vacuum analyze public.athlete_results")
+
+
+def bench_sync(args, sizes, corpus):
+    """Full sync (upsert all + delete_stale) vs staged sync (staging load + apply_staged_sync).
+
+    Each size seeds the tables with one sync, then times a second sync in
+    which a few athletes dropped out and some results changed. "window" is
+    how long readers could see a half-applied sync: from the first visible
+    commit to the last one.
+    """
+    try:
+        import psycopg
+    except ImportError:
+        print("  sync: skipped (psycopg not installed)")
+        return []
+    if not args.dsn:
+        print("  sync: skipped (no --dsn)")
+        return []
+    from data_processor import DataProcessor
+    from records import json_default
+    from supabase_sync import STAGING_TABLES, TABLE_KEYS, build_rows
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = DataProcessor()
+    base = raw_profiles_from_corpus(corpus)
+    out = []
+    with psycopg.connect(args.dsn, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("select count(*) from public.athletes where sync_run_id not like 'bench-%'")
+            if cur.fetchone()[0]:
+                print("  sync: skipped (--dsn has non-benchmark rows; use a scratch database)")
+                return []
+        for size in sizes:
+            with contextlib.redirect_stdout(io.StringIO()):
+                processed = processor.process(synthetic_roster(base, size))
+            doc = json.loads(json.dumps({"metadata": {}, "athletes": processed}, default=json_default))
+            seed = build_rows(doc, "bench-1")[:2]
+            # Next sync: 2% of athletes gone, every 20th result re-scored (same result_uid, new row_hash)
+            doc["athletes"] = doc["athletes"][: size - max(1, size // 50)]
+            for athlete in doc["athletes"]:
+                for r in athlete["recent_results"][::20]:
+                    r["points"] = (r.get("points") or 0) + 1
+            athlete_rows, result_rows, _ = build_rows(doc, "bench-2")
+
+            timings, states = {}, {}
+            _sync_reset(conn, seed, args.sync_chunk_size)
+            t0 = time.perf_counter()
+            _sync_upsert(conn, "athletes", athlete_rows, "fis_code", args.sync_chunk_size)
+            _sync_upsert(conn, "athlete_results", result_rows, "result_uid", args.sync_chunk_size)
+            with conn.cursor() as cur:
+                for table in ("athlete_results", "athletes"):
+                    cur.execute(f"delete from public.{table} where sync_run_id <> %s", ("bench-2",))
+            timings["full"] = time.perf_counter() - t0
+            states["full"] = _sync_state(conn)
+
+            _sync_reset(conn, seed, args.sync_chunk_size)
+            t0 = time.perf_counter()
+            for table, rows in zip(SYNC_TABLES, (athlete_rows, result_rows)):
+                _sync_upsert(conn, STAGING_TABLES[table], rows, f"sync_run_id,{TABLE_KEYS[table]}", args.sync_chunk_size)
+            t_apply = time.perf_counter()
+            with conn.cursor() as cur:
+                cur.execute(
+                    "select public.apply_staged_sync(%s, %s, %s)",
+                    ("bench-2", len(athlete_rows), len(result_rows)),
+                )
+                applied = cur.fetchone()[0]
+            timings["staged"] = time.perf_counter() - t0
+            timings["staged_apply"] = time.perf_counter() - t_apply
+            states["staged"] = _sync_state(conn)
+
+            row = {
+                "suite": "sync",
+                "size": size,
+                "result_rows": len(result_rows),
+                "full_seconds": round(timings["full"], 3),
+                "staged_seconds": round(timings["staged"], 3),
+                "staged_apply_seconds": round(timings["staged_apply"], 3),
+                "full_window_seconds": round(timings["full"], 3),
+                "staged_window_seconds": 0.0,
+                "speedup": round(timings["full"] / timings["staged"], 2) if timings["staged"] else None,
+                "applied": applied,
+                "identical": states["full"] == states["staged"],
+            }
+            print(
+                f"  sync size={size} results={len(result_rows)} full={row['full_seconds']}s "
+                f"staged={row['staged_seconds']}s (apply {row['staged_apply_seconds']}s) identical={row['identical']}"
+            )
+            out.append(row)
+    return out
+
+
+def main():
+    args = parse_args()
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    corpus = load_corpus(args.corpus_dir)
+    if not corpus:
+        print(f"❌ Empty corpus at {args.corpus_dir}; run fis_fixtures.py record or synthesize")
+        raise SystemExit(2)
+
+    print(f"⏱️ Benchmark: corpus={len(corpus)} pages sizes={sizes} suites={suites}")
+    report = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "corpus_pages": len(corpus), "runs": []}
+    if "scrape" in suites:
+        report["runs"] += bench_scrape(args, sizes, corpus)
+    if "parse" in suites:
+        report["runs"] += bench_parse(args, corpus)
+    if "process" in suites:
+        report["runs"] += bench_process(args, sizes, corpus)
+    if "sync" in suites:
+        report["runs"] += bench_sync(args, sizes, corpus)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📝 Report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""In-process access to the `ma=[...]` athlete block of the dashboard bundle.
+
+The block is a JS array literal between `ma=[` and `,Ko=()=>`. After the
+first pipeline patch it is plain JSON; older minified bundles may use JS
+shorthand (`!0`, `void 0`, unquoted keys, single quotes). Parsed values
+follow JSON.stringify semantics: undefined properties are dropped and
+NaN/Infinity become null.
+"""
+import hashlib
+import json
+import os
+import re
+
+MA_START = "ma=["
+MA_END = ",Ko=()=>"
+
+
+class BundleParseError(ValueError):
+    pass
+
+
+_UNDEFINED = object()
+_NUMBER_RE = re.compile(r"[+-]?(?:0[xX][0-9a-fA-F]+|0[bB][01]+|0[oO][0-7]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+_IDENT_RE = re.compile(r"[A-Za-z_$][\w$]*")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+
+
+def _js_float(text):
+    # JSON.stringify prints integral doubles without a fraction (1.0 -> 1)
+    value = float(text)
+    if value.is_integer() and abs(value) < 1e21:
+        return int(value)
+    return value
+
+
+def _js_truthy(value):
+    if value is _UNDEFINED or value is None:
+        return False
+    if isinstance(value, (dict, list)):
+        return True
+    return bool(value)
+
+
+class _LiteralParser:
+    """Recursive-descent parser for JS object/array literals (no expressions)."""
+
+    def __init__(self, text):
+        self.s = text
+        self.i = 0
+        self.n = len(text)
+
+    def fail(self, msg):
+        raise BundleParseError(f"{msg} at offset {self.i}: {self.s[self.i:self.i + 40]!r}")
+
+    def ws(self):
+        s, i, n = self.s, self.i, self.n
+        while i < n:
+            c = s[i]
+            if c in " \t\r\n":
+                i += 1
+            elif s.startswith("//", i):
+                j = s.find("\n", i)
+                i = n if j < 0 else j + 1
+            elif s.startswith("/*", i):
+                j = s.find("*/", i + 2)
+                if j < 0:
+                    self.i = i
+                    self.fail("Unterminated comment")
+                i = j + 2
+            else:
+                break
+        self.i = i
+
+    def parse(self):
+        value = self.value()
+        self.ws()
+        if self.i != self.n:
+            self.fail("Trailing characters")
+        return None if value is _UNDEFINED else value
+
+    def value(self):
+        self.ws()
+        if self.i >= self.n:
+            self.fail("Unexpected end")
+        c = self.s[self.i]
+        if c == "{":
+            return self.obj()
+        if c == "[":
+            return self.arr()
+        if c in "\"'":
+            return self.string(c)
+        if c == "`":
+            return self.template()
+        if c == "!":
+            self.i += 1
+            return not _js_truthy(self.value())
+        if c in "+-.0123456789":
+            return self.number()
+        m = _IDENT_RE.match(self.s, self.i)
+        if not m:
+            self.fail("Unexpected token")
+        word = m.group(0)
+        self.i = m.end()
+        if word == "true":
+            return True
+        if word == "false":
+            return False
+        if word == "null":
+            return None
+        if word == "undefined":
+            return _UNDEFINED
+        if word == "void":
+            self.value()
+            return _UNDEFINED
+        if word in ("NaN", "Infinity"):
+            return None
+        self.fail(f"Unsupported identifier {word!r}")
+
+    def number(self):
+        m = _NUMBER_RE.match(self.s, self.i)
+        if not m:
+            if self.s.startswith("-Infinity", self.i) or self.s.startswith("+Infinity", self.i):
+                self.i += len("-Infinity")
+                return None
+            self.fail("Bad number")
+        self.i = m.end()
+        text = m.group(0)
+        sign = -1 if text.startswith("-") else 1
+        body = text.lstrip("+-")
+        if body[:2].lower() in ("0x", "0b", "0o"):
+            return sign * int(body, 0)
+        if re.fullmatch(r"\d+", body):
+            return sign * int(body)
+        return _js_float(text)
+
+    def string(self, quote):
+        s = self.s
+        i = self.i + 1
+        out = []
+        while True:
+            j = i
+            while j < self.n and s[j] != quote and s[j] != "\\":
+                j += 1
+            if j >= self.n:
+                self.fail("Unterminated string")
+            out.append(s[i:j])
+            if s[j] == quote:
+                self.i = j + 1
+                return "".join(out)
+            esc = s[j + 1] if j + 1 < self.n else ""
+            if esc == "u":
+                if s[j + 2:j + 3] == "{":
+                    k = s.index("}", j + 3)
+                    out.append(chr(int(s[j + 3:k], 16)))
+                    i = k + 1
+                else:
+                    code = int(s[j + 2:j + 6], 16)
+                    i = j + 6
+                    # Join UTF-16 surrogate pairs the way JS strings do
+                    if 0xD800 <= code < 0xDC00 and s[i:i + 2] == "\\u":
+                        low = int(s[i + 2:i + 6], 16)
+                        if 0xDC00 <= low < 0xE000:
+                            code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                            i += 6
+                    out.append(chr(code))
+            elif esc == "x":
+                out.append(chr(int(s[j + 2:j + 4], 16)))
+                i = j + 4
+            elif esc in "\r\n":
+                i = j + 2 + (1 if esc == "\r" and s[j + 2:j + 3] == "\n" else 0)
+            else:
+                out.append(_ESCAPES.get(esc, esc))
+                i = j + 2
+
+    def template(self):
+        end = self.i + 1
+        while True:
+            end = self.s.find("`", end)
+            if end < 0:
+                self.fail("Unterminated template literal")
+            if self.s[end - 1] != "\\":
+                break
+            end += 1
+        raw = self.s[self.i + 1:end]
+        if "${" in raw:
+            self.fail("Template substitutions are not supported")
+        inner = _LiteralParser('"' + raw.replace('"', '\\"').replace("\n", "\\n") + '"')
+        self.i = end + 1
+        return inner.string('"')
+
+    def key(self):
+        self.ws()
+        c = self.s[self.i]
+        if c in "\"'":
+            return self.string(c)
+        if c == "[":
+            self.fail("Computed keys are not supported")
+        if c in "+-.0123456789":
+            n = self.number()
+            return str(n)
+        m = _IDENT_RE.match(self.s, self.i)
+        if not m:
+            self.fail("Bad object key")
+        self.i = m.end()
+        return m.group(0)
+
+    def obj(self):
+        self.i += 1
+        out = {}
+        while True:
+            self.ws()
+            if self.s[self.i] == "}":
+                self.i += 1
+                return out
+            k = self.key()
+            self.ws()
+            if self.s[self.i] != ":":
+                self.fail("Expected ':'")
+            self.i += 1
+            v = self.value()
+            if v is _UNDEFINED:
+                out.pop(k, None)
+            else:
+                out[k] = v
+            self.ws()
+            c = self.s[self.i]
+            if c == ",":
+                self.i += 1
+            elif c != "}":
+                self.fail("Expected ',' or '}'")
+
+    def arr(self):
+        self.i += 1
+        out = []
+        while True:
+            self.ws()
+            c = self.s[self.i]
+            if c == "]":
+                self.i += 1
+                return out
+            if c == ",":
+                # Array hole
+                out.append(None)
+                self.i += 1
+                continue
+            v = self.value()
+            out.append(None if v is _UNDEFINED else v)
+            self.ws()
+            c = self.s[self.i]
+            if c == ",":
+                self.i += 1
+            elif c != "]":
+                self.fail("Expected ',' or ']'")
+
+
+def parse_js_literal(text):
+    """Parse a JS literal; JSON input takes the C-accelerated json path."""
+    try:
+        return json.loads(text, parse_float=_js_float)
+    except ValueError:
+        return _LiteralParser(text).parse()
+
+
+def find_ma_block(js):
+    """Returns (start, end) so that js[start:end] == 'ma=[...]', or None."""
+    start = js.find(MA_START)
+    if start < 0:
+        return None
+    end = js.find(MA_END, start)
+    if end < 0:
+        return None
+    return start, end
+
+
+def extract_ma_athletes(js):
+    span = find_ma_block(js)
+    if not span:
+        return []
+    start, end = span
+    arr = parse_js_literal(js[start + 3:end])
+    if not isinstance(arr, list):
+        raise BundleParseError("ma block is not an array")
+    return arr
+
+
+def load_bundle_athletes(bundle_path, cache_dir=None):
+    """Athlete list from a bundle, memoized on disk by the bundle's SHA-256.
+
+    Entries are named ma_<bundle basename>_<sha>.json, so several bundles
+    can share one cache_dir. Only the entry for a bundle's current content
+    is kept; that bundle's older entries are removed when a new one is
+    written.
+    """
+    with open(bundle_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    prefix = f"ma_{os.path.basename(bundle_path)}_"
+    cache_path = os.path.join(cache_dir, f"{prefix}{digest}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    athletes = extract_ma_athletes(raw.decode("utf-8"))
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(athletes, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+        _prune_bundle_cache(cache_dir, prefix, keep=os.path.basename(cache_path))
+    return athletes
+
+
+_CACHE_DIGEST_RE = re.compile(r"[0-9a-f]{64}\.json")
+
+
+def _prune_bundle_cache(cache_dir, prefix, keep):
+    """Remove `prefix`'s stale entries, plus the unprefixed ma_<sha>.json of older versions."""
+    for name in os.listdir(cache_dir):
+        if name == keep:
+            continue
+        own = name.startswith(prefix) and _CACHE_DIGEST_RE.fullmatch(name[len(prefix):])
+        legacy = name.startswith("ma_") and _CACHE_DIGEST_RE.fullmatch(name[3:])
+        if own or legacy:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def athletes_by_code(athletes):
+    out = {}
+    for a in athletes or []:
+        if not isinstance(a, dict) or not a.get("fis_code"):
+            continue
+        out[str(a["fis_code"])] = a
+    return out
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""In-process replacement for patch_real_site_data.js + audit_results_consistency.js.
+
+Parses the bundle's ma=[...] block once, merges the pipeline's athletes
+into it, splices the new block back in and audits the merged data, all
+from memory. The merge is a port of patch_real_site_data.js and follows
+its JavaScript semantics (Number(), ||, ??, String(), stable sort), and
+js_stringify() produces the same bytes as JSON.stringify, so the patched
+index.js is byte-identical to what the Node script wrote.
+
+    python3 scripts/bundle_patcher.py patch --target index.js --data scripts/data/athletes.json
+    python3 scripts/bundle_patcher.py verify --target index.js --min-athletes "$(grep -c . scripts/data/raw/athlete_urls.txt)"
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import time
+
+from bundle_data import BundleParseError, extract_ma_athletes, find_ma_block, parse_js_literal
+from records import Record
+
+# Stands in for JS undefined (missing property); keys holding it are dropped on output
+UNDEFINED = type("Undefined", (), {"__repr__": lambda self: "undefined"})()
+_JS_WS = " \t\n\r\v\f\u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+_DECIMAL_RE = re.compile(r"[+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)")
+_RADIX_RE = re.compile(r"0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+")
+_LONE_SURROGATE_RE = re.compile("[\ud800-\udfff]")
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+PLACEHOLDER_PHOTO_URL = "https://via.placeholder.com/150?text=No+Image"
+
+
+# --- JavaScript value semantics -------------------------------------------------
+
+def js_get(obj, key):
+    if isinstance(obj, (dict, Record)):
+        return obj.get(key, UNDEFINED)
+    return UNDEFINED
+
+
+def js_truthy(v):
+    if v is UNDEFINED or v is None or v is False:
+        return False
+    if isinstance(v, (int, float)):
+        return v == v and v != 0
+    if isinstance(v, str):
+        return v != ""
+    return True
+
+
+def js_or(*values):
+    """a || b || ... : first truthy operand, else the last one."""
+    for v in values[:-1]:
+        if js_truthy(v):
+            return v
+    return values[-1]
+
+
+def js_nullish(v, fallback):
+    """v ?? fallback"""
+    return fallback if v is UNDEFINED or v is None else v
+
+
+def js_number_str(x):
+    """Number.prototype.toString() for a finite or non-finite number."""
+    if isinstance(x, bool):
+        return "true" if x else "false"
+    if isinstance(x, int):
+        return str(x)
+    if x != x:
+        return "NaN"
+    if math.isinf(x):
+        return "Infinity" if x > 0 else "-Infinity"
+    if x == 0:
+        return "0"
+    sign = "-" if x < 0 else ""
+    mantissa, _, exp = repr(abs(x)).partition("e")
+    int_part, _, frac_part = mantissa.partition(".")
+    digits = (int_part + frac_part).lstrip("0")
+    e = (int(exp) if exp else 0) - len(frac_part)
+    stripped = digits.rstrip("0")
+    e += len(digits) - len(stripped)
+    digits = stripped
+    k = len(digits)
+    n = e + k
+    if k <= n <= 21:
+        return sign + digits + "0" * (n - k)
+    if 0 < n <= 21:
+        return sign + digits[:n] + "." + digits[n:]
+    if -6 < n <= 0:
+        return sign + "0." + "0" * (-n) + digits
+    exponent = n - 1
+    exp_str = ("+" if exponent > 0 else "-") + str(abs(exponent))
+    if k == 1:
+        return sign + digits + "e" + exp_str
+    return sign + digits[0] + "." + digits[1:] + "e" + exp_str
+
+
+def js_string(v):
+    """String(v)"""
+    if isinstance(v, str):
+        return v
+    if v is UNDEFINED:
+        return "undefined"
+    if v is None:
+        return "null"
+    if isinstance(v, (bool, int, float)):
+        return js_number_str(v)
+    if isinstance(v, list):
+        return ",".join("" if x is None or x is UNDEFINED else js_string(x) for x in v)
+    return "[object Object]"
+
+
+def js_number(v):
+    """Number(v)"""
+    if v is UNDEFINED:
+        return math.nan
+    if v is None:
+        return 0
+    if isinstance(v, bool):
+        return 1 if v else 0
+    if isinstance(v, (int, float)):
+        return v
+    if isinstance(v, (list, str)):
+        text = js_string(v).strip(_JS_WS)
+        if not text:
+            return 0
+        if _RADIX_RE.fullmatch(text):
+            return int(text, 0)
+        if _DECIMAL_RE.fullmatch(text):
+            if text.lstrip("+-") == "Infinity":
+                return -math.inf if text.startswith("-") else math.inf
+            return float(text)
+        return math.nan
+    return math.nan
+
+
+def js_is_finite_number(v):
+    """Number.isFinite(v) (no coercion)"""
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+
+
+def js_join(values, sep):
+    """Array.prototype.join: null/undefined become empty strings."""
+    return sep.join("" if v is None or v is UNDEFINED else js_string(v) for v in values)
+
+
+def _js_str_literal(s):
+    out = json.dumps(s, ensure_ascii=False)
+    if _LONE_SURROGATE_RE.search(out):
+        out = _LONE_SURROGATE_RE.sub(lambda m: "\\u%04x" % ord(m.group(0)), out)
+    return out
+
+
+def js_stringify(v):
+    """JSON.stringify(v) without indentation."""
+    if v is None or v is UNDEFINED:
+        return "null"
+    if v is True:
+        return "true"
+    if v is False:
+        return "false"
+    if isinstance(v, str):
+        return _js_str_literal(v)
+    if isinstance(v, int):
+        return str(v)
+    if isinstance(v, float):
+        return js_number_str(v) if math.isfinite(v) else "null"
+    if isinstance(v, (dict, Record)):
+        return "{" + ",".join(
+            _js_str_literal(str(k)) + ":" + js_stringify(val) for k, val in v.items() if val is not UNDEFINED
+        ) + "}"
+    if isinstance(v, (list, tuple)):
+        return "[" + ",".join(js_stringify(x) for x in v) + "]"
+    raise TypeError(f"Cannot serialize {type(v).__name__}")
+
+
+# --- Port of patch_real_site_data.js ---------------------------------------------
+
+def to_num(v, fallback=0):
+    n = js_number(v)
+    return n if js_is_finite_number(n) else fallback
+
+
+def category_code(category=""):
+    c = js_string(category).lower()
+    if "qualif" in c or c == "qua":
+        return "QUA"
+    if "world cup" in c:
+        return "WC"
+    if "world championships" in c:
+        return "WSC"
+    if "olympic" in c:
+        return "OWG"
+    if "asian winter" in c:
+        return "AWG"
+    if "far east cup" in c:
+        return "FEC"
+    if c == "fis":
+        return "FIS"
+    return ""
+
+
+def map_result(r):
+    rank = to_num(js_get(r, "rank"), 0)
+    category = js_get(r, "category")
+    return {
+        "result_uid": js_or(js_get(r, "result_uid"), None),
+        "date": js_or(js_get(r, "date"), None),
+        "place": js_or(js_get(r, "place"), None),
+        "category": js_or(category, None),
+        "category_code": category_code(js_or(category, "")),
+        "category_name": js_or(category, None),
+        "discipline": js_or(js_get(r, "discipline"), js_get(r, "event"), None),
+        "rank": rank,
+        "result_code": None if rank > 0 else js_or(js_get(r, "rank_status"), "DNF"),
+        "fis_points": to_num(js_get(r, "points"), 0),
+        "cup_points": to_num(js_get(r, "cup_points"), 0),
+    }
+
+
+def normalized_category_code(r):
+    return js_or(js_get(r, "category_code"), category_code(js_or(js_get(r, "category"), js_get(r, "category_name"), "")))
+
+
+def stage_priority(text=""):
+    t = js_string(text).strip(_JS_WS).lower()
+    if "qualif" in t or t == "qua":
+        return 0
+    if "final" in t:
+        return 2
+    return 1
+
+
+def has_qualification(text=""):
+    t = js_string(text).strip(_JS_WS).lower()
+    return "qualif" in t or t == "qua"
+
+
+def rank_score(r):
+    rank = js_number(js_get(r, "rank"))
+    if js_is_finite_number(rank) and rank > 0:
+        return -rank
+    return -9999
+
+
+def _finite_or_blank(v):
+    n = js_number(v)
+    return n if js_is_finite_number(n) else ""
+
+
+def result_key(r):
+    # Stable id from the pipeline's result identity index; a corrected score replaces, not duplicates
+    if js_truthy(js_get(r, "result_uid")):
+        return js_string(js_get(r, "result_uid"))
+    return js_join([
+        js_or(js_get(r, "date"), ""),
+        js_or(js_get(r, "place"), ""),
+        js_or(js_get(r, "discipline"), ""),
+        js_or(js_get(r, "category"), ""),
+        normalized_category_code(r),
+        _finite_or_blank(js_get(r, "rank")),
+        js_or(js_get(r, "result_code"), ""),
+        _finite_or_blank(js_get(r, "fis_points")),
+        _finite_or_blank(js_get(r, "cup_points")),
+    ], "|")
+
+
+def dedupe_and_sort_results(results):
+    # Later duplicates replace the value but keep the first one's position, like a JS Map
+    by_key = {}
+    for r in results or []:
+        normalized = dict(r, category_code=normalized_category_code(r))
+        by_key[result_key(normalized)] = normalized
+    # Dates are ISO strings, for which localeCompare orders like plain string comparison
+    return sorted(
+        by_key.values(),
+        key=lambda r: (
+            js_string(js_or(js_get(r, "date"), "")),
+            stage_priority(js_or(js_get(r, "category"), js_get(r, "category_name"), "")),
+            rank_score(r),
+        ),
+        reverse=True,
+    )
+
+
+def map_athlete(old, new):
+    mapped = [map_result(r) for r in js_or(js_get(new, "recent_results"), [])]
+    next_results = dedupe_and_sort_results(mapped)
+    found = next((r for r in next_results if js_is_finite_number(r["fis_points"]) and r["fis_points"] > 0), None)
+    latest_points = js_nullish(found["fis_points"] if found else UNDEFINED, js_nullish(js_get(old, "fis_points"), 0))
+
+    merged = dict(old)
+    merged.update({
+        "name_ko": js_or(js_get(new, "name_ko"), js_get(old, "name_ko")),
+        "name_en": js_or(js_get(new, "name_en"), js_get(old, "name_en")),
+        "sport": js_or(js_get(new, "sport"), js_get(old, "sport")),
+        "sport_display": js_or(js_get(new, "sport_display"), js_get(old, "sport_display")),
+        "team": js_or(js_get(new, "team"), js_get(old, "team")),
+        "fis_code": js_string(js_or(js_get(new, "fis_code"), js_get(old, "fis_code"))),
+        "fis_url": js_or(js_get(new, "fis_url"), js_get(old, "fis_url")),
+        "birth_date": js_or(js_get(new, "birth_date"), js_get(old, "birth_date")),
+        "birth_year": to_num(js_get(new, "birth_year"), js_or(js_get(old, "birth_year"), None)),
+        "age": to_num(js_get(new, "age"), js_or(js_get(old, "age"), None)),
+        "current_rank": to_num(js_get(new, "current_rank"), js_or(js_get(old, "current_rank"), 0)),
+        "fis_points": latest_points,
+        # Always replace with latest pipeline data so every page/modal shares one canonical source.
+        "recent_results": next_results,
+    })
+    return merged
+
+
+def new_bundle_athlete(n):
+    """ma entry for an athlete the bundle does not list yet (e.g. from roster discovery), in the bundle's key order."""
+    code = js_string(js_get(n, "fis_code"))
+    return {
+        "id": code,
+        "fis_code": code,
+        "fis_url": None,
+        "name_en": None,
+        "name_ko": None,
+        "gender": js_or(js_get(n, "gender"), None),
+        "sport": None,
+        "sport_display": None,
+        "team": None,
+        "birth_date": None,
+        "birth_year": None,
+        "age": None,
+        "current_rank": 0,
+        "fis_points": 0,
+        "rank_context": "Unranked",
+        "status": "Active",
+        "photo_url": PLACEHOLDER_PHOTO_URL,
+        "recent_results": [],
+    }
+
+
+def merge_athletes(old_data, incoming):
+    """Update the bundle's athletes in place and append incoming ones it lacks; returns (merged, updated, added)."""
+    by_code = {js_string(js_get(a, "fis_code")): a for a in incoming}
+    updated = 0
+    matched = set()
+    merged = []
+    for a in old_data:
+        code = js_string(js_get(a, "fis_code"))
+        n = by_code.get(code)
+        if n is None:
+            merged.append(a)
+            continue
+        updated += 1
+        matched.add(code)
+        merged.append(map_athlete(a, n))
+    # Athletes the bundle does not list yet are appended in athletes.json order
+    added = [n for code, n in by_code.items() if code not in matched]
+    merged.extend(map_athlete(new_bundle_athlete(n), n) for n in added)
+    return merged, updated, len(added)
+
+
+# --- Port of audit_results_consistency.js ----------------------------------------
+
+def audit_athletes(athletes):
+    by_sport = {}
+    order_issues = []
+    mismatches = []
+    for a in athletes:
+        sport = js_or(js_get(a, "sport"), "unknown")
+        by_sport[sport] = by_sport.get(sport, 0) + 1
+        name = js_or(js_get(a, "name_ko"), js_get(a, "name_en"))
+
+        profile = js_or(js_get(a, "recent_results"), [])
+        modal = js_or(js_get(a, "modal_results"), profile)
+        if js_stringify(profile) != js_stringify(modal):
+            mismatches.append({"fis_code": js_get(a, "fis_code"), "name": name})
+
+        groups = {}
+        for r in profile:
+            key = js_join([js_or(js_get(r, "date"), ""), js_or(js_get(r, "place"), ""), js_or(js_get(r, "discipline"), "")], "|")
+            groups.setdefault(key, []).append(r)
+
+        for key, rows in groups.items():
+            labels = [js_or(js_get(r, "category"), js_get(r, "category_name"), "") for r in rows]
+            if not (any(has_qualification(t) for t in labels) and any(not has_qualification(t) for t in labels)):
+                continue
+            issue = {"fis_code": js_get(a, "fis_code"), "name": name, "sport": sport, "key": key, "first_category": labels[0]}
+            if has_qualification(labels[0]):
+                order_issues.append(issue)
+                continue
+            expected = sorted(
+                rows,
+                key=lambda r: (
+                    -stage_priority(js_or(js_get(r, "category"), js_get(r, "category_name"), "")),
+                    js_or(js_number(js_get(r, "rank")), 9999),
+                ),
+            )
+            if [js_stringify(r) for r in rows] != [js_stringify(r) for r in expected]:
+                order_issues.append(issue)
+
+    return {
+        "athletes": len(athletes),
+        "sports": by_sport,
+        "order_issue_count": len(order_issues),
+        "profile_modal_mismatch_count": len(mismatches),
+        "order_issues_preview": order_issues[:20],
+        "profile_modal_mismatch_preview": mismatches[:20],
+    }
+
+
+def result_stats(athletes):
+    """(result_count, max_event_date) over dated results, as the Node patcher/shell reported them."""
+    count = 0
+    max_date = ""
+    for a in athletes:
+        for r in js_or(js_get(a, "recent_results"), []):
+            d = js_get(r, "date")
+            if not js_truthy(d):
+                continue
+            count += 1
+            if isinstance(d, str) and _ISO_DATE_RE.fullmatch(d) and d > max_date:
+                max_date = d
+    return count, max_date
+
+
+# --- Patch / verify stages ---------------------------------------------------------
+
+def _report(target, body, athletes, audit, **extra):
+    result_count, max_event_date = result_stats(athletes)
+    passed = audit["order_issue_count"] == 0 and audit["profile_modal_mismatch_count"] == 0
+    return dict(
+        target=target,
+        athletes=len(athletes),
+        result_count=result_count,
+        max_event_date=max_event_date,
+        sha256=hashlib.sha256(body).hexdigest(),
+        audit=audit,
+        passed=passed,
+        **extra,
+    )
+
+
+def patch_bundle(target_path, incoming, backup=True):
+    """Merge `incoming` athletes into the bundle's ma block and rewrite it; returns the report dict."""
+    with open(target_path, "r", encoding="utf-8") as f:
+        js = f.read()
+    span = find_ma_block(js)
+    if not span:
+        raise BundleParseError("Cannot locate ma data block in target bundle")
+    start, end = span
+    old_data = parse_js_literal(js[start + 3:end])
+    if not isinstance(old_data, list):
+        raise BundleParseError("Existing ma data block is not an array")
+
+    merged, updated, added = merge_athletes(old_data, incoming)
+    backup_path = None
+    if backup:
+        backup_path = f"{target_path}.bak_{int(time.time() * 1000)}"
+        shutil.copyfile(target_path, backup_path)
+
+    body = (js[:start] + "ma=" + js_stringify(merged) + js[end:]).encode("utf-8")
+    tmp_path = target_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, target_path)
+    return _report(target_path, body, merged, audit_athletes(merged), backup=backup_path, updated_athletes=updated, added_athletes=added)
+
+
+def verify_bundle(target_path):
+    with open(target_path, "rb") as f:
+        body = f.read()
+    athletes = extract_ma_athletes(body.decode("utf-8"))
+    return _report(target_path, body, athletes, audit_athletes(athletes))
+
+
+def print_report(report):
+    if report.get("backup"):
+        print(f"backup={report['backup']}")
+    print(f"athletes={report['athletes']}")
+    if "updated_athletes" in report:
+        print(f"updated_athletes={report['updated_athletes']}")
+        print(f"added_athletes={report['added_athletes']}")
+    print(f"result_count={report['result_count']}")
+    print(f"max_event_date={report['max_event_date']}")
+    print(f"sha256={report['sha256']}")
+    print(json.dumps(report["audit"], ensure_ascii=False, indent=2))
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Patch and verify the dashboard bundle's ma=[...] block")
+    sub = p.add_subparsers(dest="command", required=True)
+    pa = sub.add_parser("patch", help="merge athletes.json into the bundle, then audit")
+    pa.add_argument("--target", required=True, help="index.js to patch")
+    pa.add_argument("--data", required=True, help="athletes.json from the pipeline")
+    pa.add_argument("--no-backup", action="store_true", help="do not keep <target>.bak_<ms>")
+    pa.add_argument("--report", default="", help="optional JSON report path")
+    va = sub.add_parser("verify", help="audit the bundle as it is")
+    va.add_argument("--target", required=True)
+    va.add_argument("--expect-athletes", type=int, default=None, help="fail unless the ma block has this many athletes")
+    va.add_argument("--min-athletes", type=int, default=None, help="fail if the ma block has fewer athletes (e.g. the URL list size)")
+    va.add_argument("--report", default="")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "patch":
+        with open(args.data, "r", encoding="utf-8") as f:
+            incoming = json.load(f).get("athletes") or []
+        report = patch_bundle(args.target, incoming, backup=not args.no_backup)
+    else:
+        report = verify_bundle(args.target)
+        if args.expect_athletes is not None and report["athletes"] != args.expect_athletes:
+            report["passed"] = False
+            report["error"] = f"Expected {args.expect_athletes} athletes, got {report['athletes']}"
+        if args.min_athletes is not None and report["athletes"] < args.min_athletes:
+            report["passed"] = False
+            report["error"] = f"Expected at least {args.min_athletes} athletes, got {report['athletes']}"
+        if not report["max_event_date"]:
+            report["passed"] = False
+            report["error"] = "No result dates found"
+
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not report["passed"]:
+        print(f"❌ Bundle check failed{': ' + report['error'] if report.get('error') else ''}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
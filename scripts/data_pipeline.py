@@ -12,6 +12,16 @@ sys.path.insert(0, SCRIPT_DIR)
 
 from fis_scraper import FISScraper
 from data_processor import DataProcessor
+from bundle_patcher import patch_bundle
+from fis_parsers import PARSER_ENGINES
+from page_archive import ARCHIVE_DIR, PageArchive
+from scraper_cache import CACHE_BACKENDS, entry_usable
+from pipeline_metrics import METRIC_FORMATS, PipelineMetrics
+from refresh_scheduler import RefreshScheduler
+from result_identity import IDENTITY_PATH
+from results_store import ResultsStore
+from roster_discovery import FIS_BASE_URL, SECTORS, run_discovery, split_codes
+from run_journal import KEEP_RUNS, RUNS_DIR, RunJournal, prune_runs
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Team Korea data pipeline")
@@ -19,6 +29,49 @@ def parse_args():
     parser.add_argument("--cache-ttl-seconds", type=int, default=86400, help="Cache freshness TTL in seconds")
     parser.add_argument("--max-retries", type=int, default=2, help="Retries per URL request")
     parser.add_argument("--request-timeout", type=int, default=10, help="HTTP request timeout in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent fetch workers (1 = serial)")
+    parser.add_argument("--max-per-host", type=int, default=4, help="Max in-flight requests per host in concurrent mode")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Global requests/sec limit in concurrent mode (default: 1/request interval)")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Parse pages in this many processes while --workers threads only download (0 = parse in the fetch workers)")
+    parser.add_argument("--stage-queue-size", type=int, default=None, help="Max URLs in flight between download and parse with --parse-workers (default: 2 x total workers)")
+    parser.add_argument("--cache-backend", choices=CACHE_BACKENDS, default="sqlite", help="Scraper cache store (json = legacy whole-file cache)")
+    parser.add_argument("--parser-engine", choices=sorted(PARSER_ENGINES), default="bs4", help="HTML parser engine for biography pages")
+    parser.add_argument("--incremental", action="store_true", help="Reuse processed athletes whose raw payload and identity are unchanged")
+    parser.add_argument(
+        "--processor-state",
+        default=os.path.join(SCRIPT_DIR, "data", "cache", "processor_state.json"),
+        help="Fingerprint/record store used by --incremental",
+    )
+    parser.add_argument("--result-identity", default=IDENTITY_PATH, help="Persistent result_uid index (empty = rebuild from the previous athletes.json each run)")
+    parser.add_argument("--stream", action="store_true", help="Overlap scraping, processing and writing as a generator pipeline")
+    parser.add_argument("--shards-dir", default="", help="Also write compact per-sport shards + index.json (content-hashed file names) here")
+    parser.add_argument("--results-store", default="", help="Append every result to the columnar store at this directory (e.g. scripts/data/cache/results_store)")
+    parser.add_argument("--patch-target", default="", help="Patch this bundle's ma=[...] block with the output and audit it (e.g. index.js)")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="Keep every fetched page here for page_archive.py reparse ('' disables)")
+    parser.add_argument("--refresh-schedule", action="store_true", help="Fetch only URLs due per the activity-aware schedule (replaces the global TTL)")
+    parser.add_argument(
+        "--schedule-path",
+        default=os.path.join(SCRIPT_DIR, "data", "cache", "refresh_schedule.json"),
+        help="Where --refresh-schedule keeps per-URL due times",
+    )
+    parser.add_argument("--fetch-budget", type=int, default=None, help="Max URLs fetched per run with --refresh-schedule (URLs without a usable cache are always fetched)")
+    parser.add_argument("--discover-nations", default="", help="Rebuild the URL list from FIS list pages for these nations first (e.g. KOR)")
+    parser.add_argument("--discover-sectors", default=",".join(SECTORS), help="Sector codes for --discover-nations")
+    parser.add_argument("--discover-base-url", default=FIS_BASE_URL, help="FIS host used by discovery")
+    parser.add_argument("--inactive-days", type=int, default=None, help="Discovery: skip athletes with no result in this many days")
+    parser.add_argument("--max-urls", type=int, default=None, help="Discovery: cap on URLs to scrape (pinned athletes always kept)")
+    parser.add_argument("--run-id", default=None, help="Journal this run under the given id (default: timestamp)")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None, help="Resume a crashed run, skipping completed URLs and stages")
+    parser.add_argument("--runs-dir", default=RUNS_DIR, help="Where run journals and stage outputs are kept")
+    parser.add_argument("--keep-runs", type=int, default=KEEP_RUNS, help="Run journals kept in --runs-dir; completed runs also drop their stage files")
+    parser.add_argument("--metrics-output", default="", help="Optional Prometheus textfile path for stage timings and fetch/parse histograms")
+    parser.add_argument("--metrics-format", choices=METRIC_FORMATS, default="prometheus", help="Text format for --metrics-output")
+    parser.add_argument("--profile", action="store_true", help="Run stages under cProfile/tracemalloc and dump reports for the slowest one")
+    parser.add_argument(
+        "--profile-dir",
+        default=os.path.join(SCRIPT_DIR, "data", "cache", "profiles"),
+        help="Where --profile reports are written",
+    )
     parser.add_argument("--strict-min-success-rate", type=float, default=1.0, help="Minimum acceptable success rate")
     parser.add_argument("--stale-threshold-days", type=int, default=30, help="Mark athletes stale if latest result is older than this")
     parser.add_argument(
@@ -28,46 +81,123 @@ def parse_args():
     )
     return parser.parse_args()
 
-def summarize_freshness(processed_athletes, stale_threshold_days=30):
-    all_dates = []
-    athlete_latest = []
-    stale_athletes = []
-    today = datetime.now().date()
-    for athlete in processed_athletes:
+class FreshnessTracker:
+    """Accumulates freshness stats one athlete at a time (used by streaming runs).
+
+    latest_by_code keeps each athlete's latest result date for the refresh scheduler.
+    """
+
+    def __init__(self, stale_threshold_days=30):
+        self.stale_threshold_days = stale_threshold_days
+        self.today = datetime.now().date()
+        self.max_event_date = None
+        self.min_latest = None
+        self.athletes_with_results = 0
+        self.total_events = 0
+        self.stale_athletes = []
+        self.latest_by_code = {}
+
+    def add(self, athlete):
         dates = [r.get("date") for r in athlete.get("recent_results", []) if r.get("date")]
-        if dates:
-            latest = max(dates)
-            athlete_latest.append(latest)
-            all_dates.extend(dates)
-            try:
-                latest_dt = datetime.strptime(latest, "%Y-%m-%d").date()
-                age_days = (today - latest_dt).days
-                if age_days > stale_threshold_days:
-                    stale_athletes.append({
-                        "fis_code": athlete.get("fis_code"),
-                        "name": athlete.get("name_en"),
-                        "latest_result_date": latest,
-                        "age_days": age_days,
-                    })
-            except Exception:
-                pass
-    return {
-        "max_event_date": max(all_dates) if all_dates else None,
-        "min_latest_per_athlete": min(athlete_latest) if athlete_latest else None,
-        "athletes_with_results": len(athlete_latest),
-        "total_events": len(all_dates),
-        "stale_threshold_days": stale_threshold_days,
-        "stale_athletes_count": len(stale_athletes),
-        "stale_athletes_preview": sorted(stale_athletes, key=lambda x: x["age_days"], reverse=True)[:10],
-    }
+        if not dates:
+            return
+        latest = max(dates)
+        self.latest_by_code[str(athlete.get("fis_code"))] = latest
+        self.athletes_with_results += 1
+        self.total_events += len(dates)
+        if self.max_event_date is None or latest > self.max_event_date:
+            self.max_event_date = latest
+        if self.min_latest is None or latest < self.min_latest:
+            self.min_latest = latest
+        try:
+            latest_dt = datetime.strptime(latest, "%Y-%m-%d").date()
+            age_days = (self.today - latest_dt).days
+            if age_days > self.stale_threshold_days:
+                self.stale_athletes.append({
+                    "fis_code": athlete.get("fis_code"),
+                    "name": athlete.get("name_en"),
+                    "latest_result_date": latest,
+                    "age_days": age_days,
+                })
+        except Exception:
+            pass
+
+    def summary(self):
+        return {
+            "max_event_date": self.max_event_date,
+            "min_latest_per_athlete": self.min_latest,
+            "athletes_with_results": self.athletes_with_results,
+            "total_events": self.total_events,
+            "stale_threshold_days": self.stale_threshold_days,
+            "stale_athletes_count": len(self.stale_athletes),
+            "stale_athletes_preview": sorted(self.stale_athletes, key=lambda x: x["age_days"], reverse=True)[:10],
+        }
+
+def freshness_tracker(processed_athletes, stale_threshold_days=30):
+    tracker = FreshnessTracker(stale_threshold_days)
+    for athlete in processed_athletes:
+        tracker.add(athlete)
+    return tracker
+
+def summarize_freshness(processed_athletes, stale_threshold_days=30):
+    return freshness_tracker(processed_athletes, stale_threshold_days).summary()
+
+def resume_profiles(scraper, journal, urls):
+    """Profiles of URLs the journal already completed, read back from the scraper cache.
+
+    URLs whose cache entry has gone missing are left out so they are fetched again.
+    """
+    done = journal.completed_urls()
+    resumed = {}
+    for url in urls:
+        if url not in done:
+            continue
+        entry = scraper.cache.get(url)
+        if entry and entry.get("data"):
+            resumed[url] = entry["data"]
+    return resumed
+
+def merged_profiles(urls, resumed, live):
+    """Yield profiles in URL order, taking resumed ones from `resumed` and the rest from `live`.
+
+    `live` yields (url, profile-or-None) for the non-resumed URLs in the same relative order.
+    """
+    live = iter(live)
+    for url in urls:
+        if url in resumed:
+            yield resumed[url]
+            continue
+        _, data = next(live)
+        if data:
+            yield data
+    # Run the scraper's epilogue (failed-URL log, stats, stage shutdown)
+    for _ in live:
+        pass
 
 def main():
     args = parse_args()
     print("🚀 Team Korea Data Pipeline (V6 Agent System)")
     print("=============================================")
     
-    # 1. Load URLs
+    metrics = PipelineMetrics(profile=args.profile, profile_dir=args.profile_dir)
+
+    # 1. Load URLs (optionally rediscovered from FIS list pages; a resumed run keeps its list)
     url_file = os.path.join(SCRIPT_DIR, "data", "raw", "athlete_urls.txt")
+    discovery_report = None
+    if args.discover_nations and not args.resume:
+        print(f"🧭 Discovering roster: nations={args.discover_nations} sectors={args.discover_sectors}")
+        with metrics.stage("discover"):
+            discovery_report = run_discovery(
+                split_codes(args.discover_nations),
+                split_codes(args.discover_sectors),
+                url_file=url_file,
+                base_url=args.discover_base_url,
+                inactive_days=args.inactive_days,
+                max_urls=args.max_urls,
+                request_timeout=args.request_timeout,
+                max_retries=args.max_retries,
+            )
+        print(f"📋 Roster: {discovery_report['roster_size']} athletes ({discovery_report['new']} new), {discovery_report['urls']} URLs queued")
     if not os.path.exists(url_file):
         print(f"❌ Error: URL file not found at {url_file}")
         return
@@ -77,50 +207,224 @@ def main():
     
     print(f"📋 Found {len(urls)} athlete URLs.")
     
+    # Run journal: per-URL and per-stage checkpoints for --resume
+    run_id = args.resume or args.run_id or RunJournal.new_run_id()
+    if args.resume and not RunJournal.exists(args.resume, args.runs_dir):
+        print(f"❌ Error: no journal for run {args.resume} in {args.runs_dir}")
+        raise SystemExit(2)
+    journal = RunJournal(run_id, args.runs_dir)
+    print(f"🧾 Run id: {run_id}{' (resuming)' if args.resume else ''}")
+    if not args.resume:
+        journal.record_meta(input_urls=len(urls), stream=args.stream, incremental=args.incremental)
+    if journal.stage_output("health"):
+        print(f"✅ Run {run_id} already completed: {journal.stage_output('health')['path']}")
+        journal.close()
+        return
+
+    scheduler = None
+    if args.refresh_schedule:
+        if args.force_refresh:
+            print("⚠️ --force-refresh fetches every URL; the refresh schedule only records due times.")
+        scheduler = RefreshScheduler.load(args.schedule_path)
+
     # 2. Agent A: Scraping
     scraper = FISScraper(
         cache_ttl_seconds=args.cache_ttl_seconds,
         force_refresh=args.force_refresh,
         max_retries=args.max_retries,
         request_timeout=args.request_timeout,
+        max_workers=args.workers,
+        max_per_host=args.max_per_host,
+        rate_limit_per_sec=args.rate_limit,
+        parse_workers=args.parse_workers,
+        stage_queue_size=args.stage_queue_size,
+        cache_backend=args.cache_backend,
+        parser_engine=args.parser_engine,
+        metrics=metrics,
+        scheduler=scheduler,
+        archive=PageArchive(args.archive_dir) if args.archive_dir else None,
     )
-    raw_data = scraper.scrape_all(urls)
-    print(f"✓ Agent A finished: {len(raw_data)} profiles collected.")
+    with metrics.stage("load_existing"):
+        processor = DataProcessor(
+            incremental_state_path=args.processor_state if args.incremental else None,
+            identity_path=args.result_identity or None,
+        )
+    output_path = os.path.join(SCRIPT_DIR, "data", "athletes.json")
+
+    resumed = resume_profiles(scraper, journal, urls)
+    pending = [url for url in urls if url not in resumed]
+    if resumed:
+        print(f"⏩ Resuming: {len(resumed)} URLs already scraped, {len(pending)} remaining.")
+    if scheduler:
+        plan = scheduler.plan(pending, lambda url: entry_usable(scraper.cache.get(url, {})), budget=args.fetch_budget)
+        print(f"🗓️ Refresh schedule: {plan['selected']} of {plan['urls']} URLs due ({plan['deferred']} deferred by budget, {plan['not_due']} not due)")
+    live = scraper.iter_scrape_results(pending, on_result=journal.record_url) if pending else ()
+
+    shard_athletes = [] if args.shards_dir else None
+    store_writer = ResultsStore(args.results_store).writer() if args.results_store else None
+    patch_athletes = None
+    tracker = None
+    saved = journal.stage_output("save")
+    if saved:
+        # Output already written; only the health report is missing
+        scraped_profiles = journal.stage_output("scrape")["profiles"]
+        freshness = saved["freshness"]
+        print(f"⏩ Skipping scrape/process/save (done in run {run_id}).")
+        if shard_athletes is not None or store_writer:
+            # Derived outputs are rebuilt from the saved athletes.json
+            with open(output_path, "r", encoding="utf-8") as f:
+                saved_athletes = json.load(f).get("athletes", [])
+            if shard_athletes is not None:
+                shard_athletes = saved_athletes
+            if store_writer:
+                for athlete in saved_athletes:
+                    store_writer.add(athlete)
+    elif args.stream:
+        # 2-4. Scrape -> process -> save as one generator chain
+        tracker = FreshnessTracker(args.stale_threshold_days)
+        scraped_count = [0]
+
+        def counted(profiles):
+            for profile in profiles:
+                scraped_count[0] += 1
+                yield profile
+
+        def tracked(athletes):
+            for athlete in athletes:
+                tracker.add(athlete)
+                if store_writer:
+                    store_writer.add(athlete)
+                if shard_athletes is not None:
+                    shard_athletes.append(athlete)
+                yield athlete
+
+        # Stages overlap here, so they are timed as one
+        with metrics.stage("stream"):
+            processor.save_to_app_stream(tracked(processor.iter_process(counted(merged_profiles(urls, resumed, live)))), output_path)
+        scraped_profiles = scraped_count[0]
+        print(f"✓ Agent A finished: {scraped_profiles} profiles collected.")
+        freshness = tracker.summary()
+        journal.record_stage("scrape", profiles=scraped_profiles)
+        journal.record_stage("process", athletes=scraped_profiles)
+        journal.record_stage("save", path=output_path, freshness=freshness)
+    else:
+        if journal.stage_output("process"):
+            scraped_profiles = journal.stage_output("scrape")["profiles"]
+            processed_athletes = journal.read_stage_file("processed.json")
+            print(f"⏩ Skipping scrape/process: {len(processed_athletes)} processed athletes restored.")
+        else:
+            with metrics.stage("scrape"):
+                raw_data = list(merged_profiles(urls, resumed, live))
+            scraped_profiles = len(raw_data)
+            print(f"✓ Agent A finished: {scraped_profiles} profiles collected.")
+            journal.record_stage("scrape", profiles=scraped_profiles)
 
-    success_rate = (len(raw_data) / len(urls)) if urls else 0.0
+            # 3. Agent B: Processing
+            with metrics.stage("process"):
+                processed_athletes = processor.process(raw_data)
+            journal.record_stage("process", path=journal.write_stage_file("processed.json", processed_athletes))
+
+        # 4. Save to local pipeline output inside v7_복구
+        with metrics.stage("save"):
+            processor.save_to_app(processed_athletes, output_path)
+        tracker = freshness_tracker(processed_athletes, stale_threshold_days=args.stale_threshold_days)
+        freshness = tracker.summary()
+        patch_athletes = processed_athletes
+        if shard_athletes is not None:
+            shard_athletes = processed_athletes
+        if store_writer:
+            with metrics.stage("results_store"):
+                for athlete in processed_athletes:
+                    store_writer.add(athlete)
+        journal.record_stage("save", path=output_path, freshness=freshness)
+
+    if shard_athletes:
+        with metrics.stage("shards"):
+            processor.save_shards(shard_athletes, args.shards_dir)
+
+    success_rate = (scraped_profiles / len(urls)) if urls else 0.0
     print(f"📈 Success rate: {success_rate:.2%}")
-    
-    # 3. Agent B: Processing
-    processor = DataProcessor()
-    processed_athletes = processor.process(raw_data)
-    
-    # 4. Save to local pipeline output inside v7_복구
-    output_path = os.path.join(SCRIPT_DIR, "data", "athletes.json")
-    processor.save_to_app(processed_athletes, output_path)
+    rate_passed = success_rate >= args.strict_min_success_rate
+
+    # A failed or partial scrape must not reach the deployed bundle
+    bundle_report = journal.stage_output("bundle_patch")
+    patch_skipped = bool(args.patch_target) and bundle_report is None and not rate_passed
+    if patch_skipped:
+        print(f"⏭️ Bundle patch skipped: success rate below {args.strict_min_success_rate:.2%}")
+    elif args.patch_target and bundle_report is None:
+        if patch_athletes is None:
+            with open(output_path, "r", encoding="utf-8") as f:
+                patch_athletes = json.load(f).get("athletes", [])
+        with metrics.stage("bundle_patch"):
+            bundle_report = patch_bundle(args.patch_target, patch_athletes)
+        journal.record_stage("bundle_patch", **bundle_report)
+    if bundle_report:
+        print(
+            f"🧩 Bundle patched: {bundle_report['athletes']} athletes, {bundle_report['result_count']} results, "
+            f"max date {bundle_report['max_event_date']}, audit {'passed' if bundle_report['passed'] else 'FAILED'}"
+        )
+
+    schedule_report = scheduler.finish(tracker.latest_by_code if tracker else None) if scheduler else None
+    if schedule_report:
+        print(f"🗓️ Next refresh due: {schedule_report['next_due_min']}")
+
+    results_store_stats = store_writer.commit() if store_writer else None
+    if results_store_stats:
+        print(f"🗄️ Results store: {results_store_stats}")
 
-    freshness = summarize_freshness(processed_athletes, stale_threshold_days=args.stale_threshold_days)
     health = {
         "generated_at": datetime.now().isoformat(),
+        "run_id": run_id,
+        "discovery": discovery_report,
+        "refresh_schedule": schedule_report,
+        "resumed_urls": len(resumed),
         "force_refresh": args.force_refresh,
         "cache_ttl_seconds": args.cache_ttl_seconds,
         "input_urls": len(urls),
-        "scraped_profiles": len(raw_data),
+        "scraped_profiles": scraped_profiles,
         "success_rate": success_rate,
         "scraper_stats": scraper.stats,
+        "conditional_refresh": {
+            "not_modified": scraper.stats["not_modified"],
+            "unchanged_body": scraper.stats["unchanged_body"],
+            "parse_skipped": scraper.stats["not_modified"] + scraper.stats["unchanged_body"],
+        },
         "freshness": freshness,
+        "processor": processor.last_report,
+        "timing": metrics.to_dict(),
+        "results_store": results_store_stats,
+        "bundle_patch": bundle_report,
+        "bundle_patch_skipped": patch_skipped,
         "output_path": output_path,
         "strict_min_success_rate": args.strict_min_success_rate,
-        "passed": success_rate >= args.strict_min_success_rate,
+        "passed": rate_passed and (bundle_report is None or bundle_report["passed"]),
     }
+    if args.profile:
+        profile_paths = metrics.dump_profile()
+        health["profile"] = profile_paths
+        if profile_paths:
+            print(f"🔬 Profile of slowest stage '{profile_paths['stage']}': {profile_paths['profile_txt']}")
+    if args.metrics_output:
+        health["metrics_output"] = metrics.write_prometheus(args.metrics_output, fmt=args.metrics_format)
+        print(f"📏 Metrics saved: {args.metrics_output}")
     os.makedirs(os.path.dirname(args.health_output), exist_ok=True)
     with open(args.health_output, "w", encoding="utf-8") as f:
         json.dump(health, f, ensure_ascii=False, indent=2)
     print(f"🩺 Health report saved: {args.health_output}")
+    journal.record_stage("health", path=args.health_output, passed=health["passed"])
+    journal.finish()
+    pruned = prune_runs(args.runs_dir, keep=args.keep_runs, current=run_id)
+    if pruned:
+        print(f"🧹 Removed {len(pruned)} old run journal(s) from {args.runs_dir}")
     
     print("=============================================")
-    if success_rate < args.strict_min_success_rate:
+    if not rate_passed:
         print("❌ Pipeline failed strict success-rate gate.")
         raise SystemExit(2)
+    if bundle_report and not bundle_report["passed"]:
+        print(f"❌ Bundle audit failed: {bundle_report['audit']['order_issue_count']} order issues, "
+              f"{bundle_report['audit']['profile_modal_mismatch_count']} profile/modal mismatches.")
+        raise SystemExit(2)
     print("✅ Pipeline Complete. V6 Dashboard Data Updated.")
 
 if __name__ == "__main__":
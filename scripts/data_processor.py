@@ -1,14 +1,42 @@
+import hashlib
 import json
 from datetime import datetime
 import os
-import subprocess
 import re
+import shutil
+
+from athlete_indexes import IndexBuilder, indexes_path_for, write_indexes
+from bundle_data import athletes_by_code, load_bundle_athletes
+from records import Athlete, RecentResult, Record, Result, json_default
+from result_identity import ResultIdentityIndex
+from roster_discovery import ROSTER_PATH, load_roster
+
+# Fields of the merged identity record that feed into a processed athlete
+IDENTITY_FIELDS = ("sport", "name_en", "name_ko", "birth_date", "sport_display", "team", "medals")
+# Per-athlete fields copied into the sharded output's index.json
+SUMMARY_FIELDS = ("id", "fis_code", "name_ko", "name_en", "sport", "sport_display", "current_rank", "best_rank")
+# Part of the incremental fingerprint; bump when the processed record shape changes
+RECORD_VERSION = 4
+
+def _fingerprint_default(obj):
+    return json_default(obj) if isinstance(obj, Record) else str(obj)
 
 class DataProcessor:
     """Data Processing Agent (Agent B)"""
     
-    def __init__(self):
+    def __init__(self, incremental_state_path=None, identity_path=None, roster_path=ROSTER_PATH):
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.incremental_state_path = incremental_state_path
+        # Nation of each discovered athlete, from the FIS list page it was found on
+        self.roster_nations = {
+            cid: entry["nation"]
+            for cid, entry in load_roster(roster_path).get("athletes", {}).items()
+            if entry.get("nation")
+        } if roster_path else {}
+        # result_uid per result; without a path it lives in memory, seeded from the last output
+        self.identity = ResultIdentityIndex.load(identity_path)
+        self.identity.seed_from_output(os.path.join(self.script_dir, "data", "athletes.json"))
+        self.last_report = {}
         self.sport_mapping = {
             "AL": "alpine_skiing",
             "SX": "ski_cross",
@@ -78,58 +106,14 @@ class DataProcessor:
             return out
 
         # 1) Primary identity source: current real-site bundle (keeps Korean names/sport mapping)
-        index_js = os.path.abspath(os.path.join(self.script_dir, "..", "index.js"))
-        if os.path.exists(index_js):
-            try:
-                node_script = r"""
-const fs = require('fs');
-const p = process.argv[1];
-const js = fs.readFileSync(p, 'utf8');
-const s = js.indexOf('ma=[');
-const e = js.indexOf(',Ko=()=>', s);
-if (s < 0 || e < 0) {
-  process.stdout.write('{}');
-  process.exit(0);
-}
-const arr = eval('(' + js.slice(s + 3, e) + ')');
-const out = {};
-for (const a of arr || []) {
-  if (!a || !a.fis_code) continue;
-  out[String(a.fis_code)] = a;
-}
-process.stdout.write(JSON.stringify(out));
-"""
-                raw = subprocess.check_output(["node", "-e", node_script, index_js], text=True)
-                parsed = json.loads(raw or "{}")
-                for code, athlete in parsed.items():
-                    merged[code] = merge_athlete(merged.get(code), athlete)
-            except Exception:
-                pass
-
         # 1.5) Backup deployed bundle fallback (recovers Korean names if current index got polluted)
-        backup_js = os.path.abspath(os.path.join(self.script_dir, "..", "deployed_index_js_20260212.js"))
-        if os.path.exists(backup_js):
+        bundle_cache_dir = os.path.join(self.script_dir, "data", "cache", "bundle")
+        for bundle_name in ("index.js", "deployed_index_js_20260212.js"):
+            bundle_path = os.path.abspath(os.path.join(self.script_dir, "..", bundle_name))
+            if not os.path.exists(bundle_path):
+                continue
             try:
-                node_script = r"""
-const fs = require('fs');
-const p = process.argv[1];
-const js = fs.readFileSync(p, 'utf8');
-const s = js.indexOf('ma=[');
-const e = js.indexOf(',Ko=()=>', s);
-if (s < 0 || e < 0) {
-  process.stdout.write('{}');
-  process.exit(0);
-}
-const arr = eval('(' + js.slice(s + 3, e) + ')');
-const out = {};
-for (const a of arr || []) {
-  if (!a || !a.fis_code) continue;
-  out[String(a.fis_code)] = a;
-}
-process.stdout.write(JSON.stringify(out));
-"""
-                raw = subprocess.check_output(["node", "-e", node_script, backup_js], text=True)
-                parsed = json.loads(raw or "{}")
+                parsed = athletes_by_code(load_bundle_athletes(bundle_path, bundle_cache_dir))
                 for code, athlete in parsed.items():
                     merged[code] = merge_athlete(merged.get(code), athlete)
             except Exception:
@@ -172,91 +156,153 @@ process.stdout.write(JSON.stringify(out));
 
         return existing_sport or "snowboard_park"
 
+    def _identity_fields(self, existing):
+        return {k: existing.get(k) for k in IDENTITY_FIELDS}
+
+    def _team(self, code, existing):
+        """Curated team name, else the nation from roster discovery, else 'KOR'.
+
+        The nation column of biography result rows is the event's host
+        country, not the athlete's, so it is never used here.
+        """
+        return existing.get('team') or self.roster_nations.get(code) or 'KOR'
+
+    def _fingerprint(self, athlete, existing):
+        # Age is derived from the current year, so a new year invalidates every record
+        payload = {
+            "raw": athlete,
+            "identity": self._identity_fields(existing),
+            "roster_nation": self.roster_nations.get(str(athlete.get('fis_code'))),
+            "year": datetime.now().year,
+            "version": RECORD_VERSION,
+        }
+        blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=_fingerprint_default)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _load_state(self):
+        if not self.incremental_state_path or not os.path.exists(self.incremental_state_path):
+            return {}
+        try:
+            with open(self.incremental_state_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("athletes", {})
+        except Exception:
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.incremental_state_path), exist_ok=True)
+        tmp_path = self.incremental_state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": datetime.now().isoformat(), "athletes": state}, f, ensure_ascii=False, default=json_default)
+        os.replace(tmp_path, self.incremental_state_path)
+
     def process(self, raw_data):
+        return list(self.iter_process(raw_data))
+
+    def iter_process(self, raw_data):
+        """Generator form of process(); consumes raw profiles lazily."""
         print("⚙️ Agent B: Processing data...")
-        processed = []
+        previous = self._load_state() if self.incremental_state_path else {}
+        state = {}
+        report = {"total": 0, "recomputed": 0, "reused": 0}
+        codes = set()
+
+        for athlete in raw_data:
+            code = str(athlete.get('fis_code'))
+            codes.add(code)
+            existing = self.existing.get(code, {})
+            fingerprint = self._fingerprint(athlete, existing) if self.incremental_state_path else None
+            cached = previous.get(code)
+            if fingerprint and cached and cached.get("fingerprint") == fingerprint:
+                processed_athlete = Athlete.from_mapping(cached["record"])
+                report["reused"] += 1
+            else:
+                processed_athlete = self._build_athlete(athlete, existing)
+                report["recomputed"] += 1
+            if fingerprint:
+                state[code] = {"fingerprint": fingerprint, "record": processed_athlete}
+            report["total"] += 1
+            yield processed_athlete
+
+        if self.incremental_state_path:
+            self._save_state(state)
+            print(f"♻️ Agent B incremental: {report['recomputed']} recomputed, {report['reused']} reused")
+        self.identity.prune(codes)
+        self.identity.save()
+        report["result_identity"] = dict(self.identity.stats, keys=len(self.identity.keys))
+        self.last_report = report
+
+    def _build_athlete(self, athlete, existing):
+        sport_code = athlete.get('sport_code', 'AL')
+        sport = self._infer_sport(sport_code, athlete.get('results') or [], existing.get('sport'))
         
-        for i, athlete in enumerate(raw_data):
-            sport_code = athlete.get('sport_code', 'AL')
-            existing = self.existing.get(str(athlete.get('fis_code')), {})
-            sport = self._infer_sport(sport_code, athlete.get('results') or [], existing.get('sport'))
-            
-            # Simple Korean Name Mapping (Mock - real world would use a dictionary)
-            # Since we don't have the dictionary here, we key off the english name or ID
-            # This is a placeholder logic
-            name_en = existing.get('name_en') or athlete.get('name_en', 'Unknown')
-            existing_name_ko = existing.get('name_ko')
-            name_ko = existing_name_ko if self._has_hangul(existing_name_ko) else name_en
-
-            birth_date = athlete.get('birth_date') or existing.get('birth_date')
-            birth_year = None
-            age = None
-            if birth_date and isinstance(birth_date, str) and len(birth_date) >= 4:
-                try:
-                    birth_year = int(birth_date.split('-')[0])
-                    age = datetime.now().year - birth_year
-                except ValueError:
-                    birth_year = None
-                    age = None
-
-            # Recent results
-            results = athlete.get('results') or []
-            # Filter valid results with date
-            results = [r for r in results if r.get('date')]
-            results.sort(
-                key=lambda r: (
-                    r.get('date', ''),
-                    self._stage_priority(r.get('category') or r.get('discipline') or ''),
-                    self._rank_score(r)
-                ),
-                reverse=True
-            )
-            recent_results = []
-            numeric_ranks = []
-            for r in results:
-                rank = r.get('rank')
-                rank_status = r.get('rank_status')
-                if isinstance(rank, int) and rank > 0:
-                    numeric_ranks.append(rank)
-                # Keep valid numeric rank or explicit status (DNS/DNF/DSQ)
-                if (isinstance(rank, int) and rank > 0) or (rank_status and isinstance(rank_status, str)):
-                    recent_results.append({
-                        'date': r.get('date'),
-                        'event': r.get('discipline') or r.get('category') or 'Result',
-                        'rank': rank,
-                        'rank_status': rank_status,
-                        'points': r.get('fis_points') if r.get('fis_points') is not None else 0.0,
-                        'place': r.get('place'),
-                        'category': r.get('category'),
-                        'discipline': r.get('discipline'),
-                        'cup_points': r.get('cup_points')
-                    })
-
-            current_rank = numeric_ranks[0] if numeric_ranks else None
-            best_rank = min(numeric_ranks) if numeric_ranks else None
-            season_starts = len(results)
-            
-            processed_athlete = {
-                'id': f"KOR{i+1:03d}",
-                'name_ko': name_ko, 
-                'name_en': name_en,
-                'birth_date': birth_date,
-                'birth_year': birth_year,
-                'age': age,
-                'sport': sport,
-                'sport_display': existing.get('sport_display') or self.sport_display.get(sport, sport),
-                'team': existing.get('team') or 'KOR',
-                'fis_code': athlete.get('fis_code'),
-                'fis_url': athlete.get('fis_url'),
-                'current_rank': current_rank,
-                'best_rank': best_rank,
-                'season_starts': season_starts,
-                'medals': existing.get('medals') or {'gold': 0, 'silver': 0, 'bronze': 0},
-                'recent_results': recent_results
-            }
-            processed.append(processed_athlete)
-            
-        return processed
+        # Simple Korean Name Mapping (Mock - real world would use a dictionary)
+        # Since we don't have the dictionary here, we key off the english name or ID
+        # This is a placeholder logic
+        name_en = existing.get('name_en') or athlete.get('name_en', 'Unknown')
+        existing_name_ko = existing.get('name_ko')
+        name_ko = existing_name_ko if self._has_hangul(existing_name_ko) else name_en
+
+        birth_date = athlete.get('birth_date') or existing.get('birth_date')
+        birth_year = None
+        age = None
+        if birth_date and isinstance(birth_date, str) and len(birth_date) >= 4:
+            try:
+                birth_year = int(birth_date.split('-')[0])
+                age = datetime.now().year - birth_year
+            except ValueError:
+                birth_year = None
+                age = None
+
+        # Recent results
+        results = athlete.get('results') or []
+        # Filter valid results with date
+        results = [r for r in results if r.get('date')]
+        results.sort(
+            key=lambda r: (
+                r.get('date', ''),
+                self._stage_priority(r.get('category') or r.get('discipline') or ''),
+                self._rank_score(r)
+            ),
+            reverse=True
+        )
+        recent_results = []
+        numeric_ranks = []
+        for r in results:
+            rank = r.get('rank')
+            rank_status = r.get('rank_status')
+            if isinstance(rank, int) and rank > 0:
+                numeric_ranks.append(rank)
+            # Keep valid numeric rank or explicit status (DNS/DNF/DSQ)
+            if (isinstance(rank, int) and rank > 0) or (rank_status and isinstance(rank_status, str)):
+                # A view over the parsed row, not a copy; cached profiles still hold dicts
+                recent_results.append(RecentResult(Result.coerce(r)))
+        for view, uid in zip(recent_results, self.identity.assign(athlete.get('fis_code'), recent_results)):
+            view.result_uid = uid
+
+        current_rank = numeric_ranks[0] if numeric_ranks else None
+        best_rank = min(numeric_ranks) if numeric_ranks else None
+        season_starts = len(results)
+        
+        processed_athlete = Athlete(
+            # The bundle's ids are fis_codes too, so an athlete keeps its id however the URL list is ordered
+            id=str(athlete.get('fis_code')),
+            name_ko=name_ko,
+            name_en=name_en,
+            birth_date=birth_date,
+            birth_year=birth_year,
+            age=age,
+            sport=sport,
+            sport_display=existing.get('sport_display') or self.sport_display.get(sport, sport),
+            team=self._team(str(athlete.get('fis_code')), existing),
+            fis_code=athlete.get('fis_code'),
+            fis_url=athlete.get('fis_url'),
+            current_rank=current_rank,
+            best_rank=best_rank,
+            season_starts=season_starts,
+            medals=existing.get('medals') or {'gold': 0, 'silver': 0, 'bronze': 0},
+            recent_results=recent_results,
+        )
+        return processed_athlete
 
     def save_to_app(self, athletes, output_path="src/data/athletes.json"):
         final_data = {
@@ -271,6 +317,104 @@ process.stdout.write(JSON.stringify(out));
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
+            json.dump(final_data, f, indent=2, ensure_ascii=False, default=json_default)
             
         print(f"✅ Agent B: Data pushed to {output_path} ({len(athletes)} records)")
+        indexes = IndexBuilder()
+        for athlete in athletes:
+            indexes.add(athlete)
+        self._save_indexes(indexes, output_path)
+
+    def _save_indexes(self, indexes, output_path):
+        path = write_indexes(indexes.build(), indexes_path_for(output_path))
+        print(f"🗂️ Agent B: Indexes pushed to {path}")
+
+    def save_to_app_stream(self, athletes, output_path="src/data/athletes.json"):
+        """Write athletes as they arrive; produces the same bytes as save_to_app.
+
+        Records are spooled to a side file because metadata (with the final
+        total_athletes) comes first in the document; the two are joined once
+        the input is exhausted.
+        """
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        spool_path = output_path + ".part"
+        count = 0
+        indexes = IndexBuilder()
+        with open(spool_path, 'w', encoding='utf-8') as spool:
+            for athlete in athletes:
+                indexes.add(athlete)
+                body = json.dumps(athlete, indent=2, ensure_ascii=False, default=json_default).replace("\n", "\n    ")
+                spool.write((",\n    " if count else "\n    ") + body)
+                count += 1
+
+        header = json.dumps({
+            "metadata": {
+                "last_updated": datetime.now().isoformat(),
+                "total_athletes": count
+            }
+        }, indent=2, ensure_ascii=False)
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as out, open(spool_path, 'r', encoding='utf-8') as spool:
+            out.write(header[:-2] + ',\n  "athletes": [')
+            shutil.copyfileobj(spool, out)
+            out.write("\n  ]\n}" if count else "]\n}")
+        os.replace(tmp_path, output_path)
+        os.remove(spool_path)
+
+        print(f"✅ Agent B: Data pushed to {output_path} ({count} records)")
+        self._save_indexes(indexes, output_path)
+        return count
+
+    def save_shards(self, athletes, output_dir):
+        """Write compact per-sport shards plus a small summary index for the dashboard.
+
+        Shard files are named by the SHA-256 of their bytes and carry no
+        timestamp, so a sport whose athletes did not change keeps the same
+        file name (and stays cacheable) across syncs. index.json lists every
+        athlete's summary fields and the shard file/hash for each sport.
+        """
+        athletes = list(athletes)
+        by_sport = {}
+        for athlete in athletes:
+            by_sport.setdefault(athlete.get('sport') or 'unknown', []).append(athlete)
+
+        shard_dir = os.path.join(output_dir, "shards")
+        os.makedirs(shard_dir, exist_ok=True)
+        shards = {}
+        summary = []
+        for sport, members in sorted(by_sport.items()):
+            body = json.dumps({"sport": sport, "athletes": members}, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+            digest = hashlib.sha256(body).hexdigest()
+            name = f"{sport}.{digest[:12]}.json"
+            path = os.path.join(shard_dir, name)
+            if not os.path.exists(path):
+                with open(path + ".tmp", "wb") as f:
+                    f.write(body)
+                os.replace(path + ".tmp", path)
+            shards[sport] = {"file": f"shards/{name}", "sha256": digest, "athletes": len(members), "bytes": len(body)}
+
+        for athlete in athletes:
+            summary.append({k: athlete.get(k) for k in SUMMARY_FIELDS})
+
+        index = {
+            "metadata": {
+                "last_updated": datetime.now().isoformat(),
+                "total_athletes": len(summary),
+            },
+            "shards": shards,
+            "athletes": summary,
+        }
+        index_path = os.path.join(output_dir, "index.json")
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(index_path + ".tmp", index_path)
+
+        # Shards no longer referenced by the index are from earlier syncs
+        live = {os.path.basename(entry["file"]) for entry in shards.values()}
+        for name in os.listdir(shard_dir):
+            if name.endswith(".json") and name not in live:
+                os.remove(os.path.join(shard_dir, name))
+
+        print(f"✅ Agent B: {len(shards)} shards + index pushed to {output_dir} ({len(summary)} records)")
+        return index
+
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Offline corpus of FIS biography pages for tests and benchmarks.
+
+    python3 scripts/fis_fixtures.py record       # capture live pages from athlete_urls.txt
+    python3 scripts/fis_fixtures.py synthesize   # render pages from athletes.json (no network)
+
+Pages are stored gzip-compressed as <competitorid>.html.gz next to a
+manifest.json describing where each page came from.
+"""
+import argparse
+import gzip
+import html
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+URL_FILE = os.path.join(SCRIPT_DIR, "data", "raw", "athlete_urls.txt")
+ATHLETES_JSON = os.path.join(SCRIPT_DIR, "data", "athletes.json")
+CORPUS_DIR = os.path.join(SCRIPT_DIR, "data", "fixtures", "fis_pages")
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def competitor_id(url):
+    m = re.search(r"competitorid=(\d+)", url)
+    return m.group(1) if m else None
+
+
+def read_urls(path=URL_FILE):
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_manifest(corpus_dir=CORPUS_DIR):
+    path = os.path.join(corpus_dir, "manifest.json")
+    if not os.path.exists(path):
+        return {"pages": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, corpus_dir=CORPUS_DIR):
+    with open(os.path.join(corpus_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def write_page(corpus_dir, cid, body):
+    # mtime=0 keeps the gzip bytes stable across re-runs
+    with open(os.path.join(corpus_dir, f"{cid}.html.gz"), "wb") as f:
+        with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+            gz.write(body)
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """Returns {competitorid: (url, html_bytes)} for every page in the corpus."""
+    manifest = load_manifest(corpus_dir)
+    pages = {}
+    for cid, meta in sorted(manifest.get("pages", {}).items()):
+        path = os.path.join(corpus_dir, f"{cid}.html.gz")
+        if os.path.exists(path):
+            with gzip.open(path, "rb") as f:
+                pages[cid] = (meta.get("url"), f.read())
+    return pages
+
+
+def record(urls, corpus_dir=CORPUS_DIR, request_timeout=10, request_interval_sec=0.5):
+    import requests
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    manifest = load_manifest(corpus_dir)
+    failures = 0
+    for url in urls:
+        cid = competitor_id(url)
+        try:
+            r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=request_timeout)
+        except Exception as e:
+            print(f"  [Fail] {cid}: {e}")
+            failures += 1
+            continue
+        if r.status_code != 200:
+            print(f"  [Fail] {cid}: status {r.status_code}")
+            failures += 1
+            continue
+        write_page(corpus_dir, cid, r.content)
+        manifest["pages"][cid] = {"url": url, "source": "recorded", "captured_at": datetime.now().isoformat()}
+        print(f"  [Recorded] {cid} ({len(r.content)} bytes)")
+        time.sleep(request_interval_sec)
+    save_manifest(manifest, corpus_dir)
+    return failures
+
+
+def _fmt_points(v):
+    if v is None:
+        return ""
+    return f"{float(v):.2f}"
+
+
+def render_page(athlete):
+    """Render a biography page using the DOM structure the parsers target."""
+    rows = []
+    for r in athlete.get("recent_results") or []:
+        if not r.get("date"):
+            continue
+        y, m, d = r["date"].split("-")
+        rank = str(r["rank"]) if r.get("rank") else (r.get("rank_status") or "DNF")
+        rows.append(
+            '<a class="table-row" href="#" target="_self">\n'
+            '  <div class="container g-row px-sm-1 px-xs-0">\n'
+            '    <div class="g-row justify-sb">\n'
+            f'      <div class="g-lg-4 g-md-4 g-sm-4 g-xs-4 justify-left">{d}-{m}-{y}</div>\n'
+            f'      <div class="g-lg g-md justify-left hidden-sm-down">{html.escape(r.get("place") or "")}</div>\n'
+            '      <div class="g-lg-1 g-md-1 g-sm-2 g-xs-3 justify-left">\n'
+            '        <div class="country country_flag"><span class="country__flag"><span class="flag-KOR flag"></span></span>'
+            '<span class="country__name-short">KOR</span></div>\n'
+            '      </div>\n'
+            f'      <div class="g-lg-5 g-md-5 justify-left hidden-sm-down">{html.escape(r.get("category") or "")}</div>\n'
+            f'      <div class="g-lg-3 g-md-3 justify-left hidden-sm-down">{html.escape(r.get("discipline") or r.get("event") or "")}</div>\n'
+            '      <div class="g-lg-6 g-md-6 g-sm-6 g-xs-6 justify-right flex-xs-wrap">\n'
+            f'        <div class="g-lg-8 g-md-8 g-sm-8 g-xs-8 justify-right">{rank}</div>\n'
+            f'        <div class="g-lg-8 g-md-8 hidden-sm-down justify-right">{_fmt_points(r.get("points"))}</div>\n'
+            f'        <div class="g-lg-8 g-md-8 hidden-sm-down justify-right">{_fmt_points(r.get("cup_points"))}</div>\n'
+            '      </div>\n'
+            '    </div>\n'
+            '  </div>\n'
+            '</a>'
+        )
+    birth = athlete.get("birth_date") or ""
+    birth_text = "-".join(reversed(birth.split("-"))) if birth else ""
+    name = (athlete.get("name_en") or "").title().replace(" ", "")
+    return (
+        "<!doctype html>\n<html lang=\"en\"><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(athlete.get('name_en') or '')} - Biography</title></head><body>\n"
+        '<div class="athlete-profile">\n'
+        f'  <h1 class="athlete-profile__name">{html.escape(name)}</h1>\n'
+        '  <ul class="profile-info">\n'
+        '    <li class="profile-info__entry"><span class="profile-info__field">Nation</span>'
+        '<span class="profile-info__value">KOR</span></li>\n'
+        '    <li class="profile-info__entry"><span class="profile-info__field">Birthdate</span>'
+        f'<span class="profile-info__value">{birth_text}</span></li>\n'
+        '  </ul>\n'
+        '</div>\n'
+        '<div class="table__body">\n' + "\n".join(rows) + "\n</div>\n</body></html>\n"
+    ).encode("utf-8")
+
+
+def render_list_page(entries):
+    """Render a biographies search page (one a.table-row per competitor), as roster_discovery parses it."""
+    rows = []
+    for e in entries:
+        href = f"https://www.fis-ski.com/DB/general/athlete-biography.html?sectorcode={e['sector']}&amp;competitorid={e['competitorid']}&amp;type=result"
+        nation = html.escape(e.get("nation") or "")
+        rows.append(
+            f'<a class="table-row" href="{href}" target="_self">\n'
+            '  <div class="container g-row px-sm-1 px-xs-0">\n'
+            '    <div class="g-row justify-sb">\n'
+            '      <div class="g-lg-2 g-md-2 g-sm-2 hidden-xs justify-left">Active</div>\n'
+            f'      <div class="g-lg-2 g-md-2 g-sm-3 hidden-xs justify-left">{html.escape(e.get("fiscode") or "")}</div>\n'
+            f'      <div class="g-lg-10 g-md-10 g-sm-9 g-xs-24 justify-left bold">{html.escape(e.get("name") or "")}</div>\n'
+            '      <div class="g-lg-3 g-md-3 g-sm-3 hidden-xs justify-left">\n'
+            f'        <div class="country country_flag"><span class="country__flag"><span class="flag-{nation} flag"></span></span>'
+            f'<span class="country__name-short">{nation}</span></div>\n'
+            '      </div>\n'
+            f'      <div class="g-lg-2 g-md-2 hidden-sm-down justify-left">{e.get("birth_year") or ""}</div>\n'
+            f'      <div class="g-lg-1 g-md-1 hidden-sm-down justify-left">{e.get("gender") or ""}</div>\n'
+            '    </div>\n'
+            '  </div>\n'
+            '</a>'
+        )
+    return (
+        "<!doctype html>\n<html lang=\"en\"><head><meta charset=\"utf-8\"><title>Biographies</title></head><body>\n"
+        '<div class="table__body">\n' + "\n".join(rows) + "\n</div>\n</body></html>\n"
+    ).encode("utf-8")
+
+
+def synthesize(urls, corpus_dir=CORPUS_DIR, athletes_path=ATHLETES_JSON):
+    with open(athletes_path, "r", encoding="utf-8") as f:
+        by_code = {str(a.get("fis_code")): a for a in json.load(f).get("athletes", [])}
+    os.makedirs(corpus_dir, exist_ok=True)
+    manifest = load_manifest(corpus_dir)
+    for url in urls:
+        cid = competitor_id(url)
+        athlete = by_code.get(cid)
+        if not athlete:
+            print(f"  [Skip] {cid}: not in {athletes_path}")
+            continue
+        if manifest["pages"].get(cid, {}).get("source") == "recorded":
+            continue
+        write_page(corpus_dir, cid, render_page(athlete))
+        manifest["pages"][cid] = {"url": url, "source": "synthesized"}
+    save_manifest(manifest, corpus_dir)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Manage the offline FIS page corpus")
+    p.add_argument("command", choices=["record", "synthesize"])
+    p.add_argument("--urls", default=URL_FILE, help="athlete URL list")
+    p.add_argument("--corpus-dir", default=CORPUS_DIR, help="corpus directory")
+    p.add_argument("--request-timeout", type=int, default=10, help="HTTP timeout for record")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    urls = read_urls(args.urls)
+    if args.command == "record":
+        failures = record(urls, args.corpus_dir, request_timeout=args.request_timeout)
+        if failures:
+            print(f"⚠️ {failures} pages failed to record")
+            sys.exit(2)
+    else:
+        synthesize(urls, args.corpus_dir)
+    print(f"📦 Corpus: {len(load_corpus(args.corpus_dir))} pages in {args.corpus_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""HTML parser engines for FIS athlete biography pages.
+
+`bs4` is the reference implementation (CSS selectors on a full soup tree).
+`stream` walks the same token stream in a single pass without building a
+tree and must produce identical output; run this module on saved pages to
+check that:
+
+    python3 scripts/fis_parsers.py page1.html page2.html.gz ...
+
+tests/test_fis_parsers.py runs the same comparison over the fixture
+corpus and a set of hand-written edge-case pages in CI.
+"""
+import argparse
+import gzip
+import json
+import re
+import sys
+import time
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+
+from records import Result, json_default
+
+DATE_CLASSES = frozenset(["g-xs-4", "g-sm-4", "g-md-4", "g-lg-4"])
+PLACE_CLASSES = frozenset(["g-md", "g-lg", "justify-left", "hidden-sm-down"])
+CATEGORY_CLASSES = frozenset(["g-md-5", "g-lg-5", "justify-left", "hidden-sm-down"])
+DISCIPLINE_CLASSES = frozenset(["g-md-3", "g-lg-3", "justify-left", "hidden-sm-down"])
+NATION_CLASSES = frozenset(["country__name-short"])
+RIGHT_COLS_CLASSES = frozenset(["g-xs-6", "g-sm-6", "g-md-6", "g-lg-6", "justify-right", "flex-xs-wrap"])
+
+# (field, tag, required classes) for the single-value columns of a result row
+ROW_FIELDS = (
+    ("date", "div", DATE_CLASSES),
+    ("place", "div", PLACE_CLASSES),
+    ("category", "div", CATEGORY_CLASSES),
+    ("discipline", "div", DISCIPLINE_CLASSES),
+    ("nation", "span", NATION_CLASSES),
+)
+
+# Same list BeautifulSoup's HTML builders treat as void elements
+VOID_ELEMENTS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer",
+])
+
+
+def parse_date(text):
+    if not text or not re.match(r'\d{2}-\d{2}-\d{4}', text):
+        return None
+    day, month, year = text.split('-')
+    return f"{year}-{month}-{day}"
+
+
+def _parse_float(text):
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def build_result(date_text, place, category, discipline, nation, rank_text, fis_points_text, cup_points_text):
+    """Normalize the raw column texts of one result row into a Result."""
+    rank = None
+    rank_status = None
+    if rank_text:
+        if rank_text.isdigit():
+            rank = int(rank_text)
+        else:
+            rank_status = rank_text.strip().upper()
+    return Result(
+        date=parse_date(date_text),
+        place=place,
+        category=category,
+        discipline=discipline,
+        nation=nation,
+        rank=rank,
+        rank_status=rank_status,
+        fis_points=_parse_float(fis_points_text),
+        cup_points=_parse_float(cup_points_text),
+    )
+
+
+def decode_markup(content):
+    if isinstance(content, str):
+        return content
+    return UnicodeDammit(content, is_html=True).unicode_markup
+
+
+class SoupPageParser:
+    """Reference engine: BeautifulSoup tree + CSS selectors."""
+
+    name = "bs4"
+
+    def parse(self, content):
+        soup = BeautifulSoup(content, 'html.parser')
+        name = soup.find('h1', class_='athlete-profile__name')
+        return {
+            'name': name.get_text(strip=True) if name else None,
+            'birth_date': self.parse_birthdate(soup),
+            'results': self.parse_results(soup),
+        }
+
+    def parse_birthdate(self, soup):
+        field = soup.find('span', class_='profile-info__field', string=lambda s: s and 'Birthdate' in s)
+        if not field:
+            return None
+        value = field.find_next('span', class_='profile-info__value')
+        if not value:
+            return None
+        return parse_date(value.get_text(strip=True))
+
+    def parse_results(self, soup):
+        results = []
+        for row in soup.select('a.table-row'):
+            def text(sel):
+                el = row.select_one(sel)
+                return el.get_text(' ', strip=True) if el else None
+
+            right_cols = row.select('div.g-xs-6.g-sm-6.g-md-6.g-lg-6.justify-right.flex-xs-wrap > div')
+            if len(right_cols) >= 3:
+                rank_text, fis_points_text, cup_points_text = (c.get_text(' ', strip=True) for c in right_cols[:3])
+            else:
+                rank_text = fis_points_text = cup_points_text = None
+
+            results.append(build_result(
+                text('div.g-xs-4.g-sm-4.g-md-4.g-lg-4'),
+                text('div.g-md.g-lg.justify-left.hidden-sm-down'),
+                text('div.g-md-5.g-lg-5.justify-left.hidden-sm-down'),
+                text('div.g-md-3.g-lg-3.justify-left.hidden-sm-down'),
+                text('span.country__name-short'),
+                rank_text,
+                fis_points_text,
+                cup_points_text,
+            ))
+        return results
+
+
+class _Frame:
+    __slots__ = ("tag", "classes", "captures", "children")
+
+    def __init__(self, tag, classes):
+        self.tag = tag
+        self.classes = classes
+        self.captures = None
+        self.children = None
+
+
+class _StreamHandler(HTMLParser):
+    """Single pass over the token stream, mirroring BeautifulSoup's html.parser tree rules."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.pending = []
+        self.active = []
+        self.name = None
+        self.name_seen = False
+        self.birth_field_found = False
+        self.birth_value = None
+        self.rows = []
+        self.row = None
+        self.row_frame = None
+
+    # -- text runs ---------------------------------------------------------
+    def _flush(self):
+        if not self.pending:
+            return
+        run = "".join(self.pending)
+        self.pending = []
+        if self.stack and self.stack[-1].children is not None:
+            self.stack[-1].children.append(run)
+        stripped = run.strip()
+        if stripped:
+            for buf in self.active:
+                buf.append(stripped)
+
+    def handle_data(self, data):
+        self.pending.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+        if self.stack and self.stack[-1].children is not None:
+            self.stack[-1].children.append(None)
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    # -- tags --------------------------------------------------------------
+    def _capture(self, frame, key, sep):
+        buf = []
+        self.active.append(buf)
+        if frame.captures is None:
+            frame.captures = []
+        frame.captures.append((key, sep, buf))
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        classes = frozenset()
+        for k, v in attrs:
+            if k == "class" and v:
+                classes = frozenset(v.split())
+                break
+        parent = self.stack[-1] if self.stack else None
+        frame = _Frame(tag, classes)
+        if parent is not None and parent.children is not None:
+            parent.children.append(frame)
+            frame.children = []
+
+        if self.row is not None:
+            for field, field_tag, required in ROW_FIELDS:
+                if tag == field_tag and field not in self.row and required <= classes:
+                    self.row[field] = None
+                    self._capture(frame, ("row", field), " ")
+            if tag == "div" and parent is not None and parent.tag == "div" and RIGHT_COLS_CLASSES <= parent.classes:
+                self._capture(frame, ("right", None), " ")
+        elif tag == "a" and "table-row" in classes:
+            self.row = {"right": []}
+            self.row_frame = frame
+
+        if tag == "h1" and not self.name_seen and "athlete-profile__name" in classes:
+            self.name_seen = True
+            self._capture(frame, ("name", None), "")
+        if tag == "span":
+            if "profile-info__field" in classes and not self.birth_field_found:
+                frame.children = []
+            elif "profile-info__value" in classes and self.birth_field_found and self.birth_value is None:
+                self.birth_value = ""
+                self._capture(frame, ("birth", None), "")
+
+        self.stack.append(frame)
+        if tag in VOID_ELEMENTS:
+            self._close_top()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i].tag == tag:
+                while len(self.stack) > i:
+                    self._close_top()
+                return
+
+    def _close_top(self):
+        frame = self.stack.pop()
+        if frame.captures:
+            for key, sep, buf in frame.captures:
+                self.active.remove(buf)
+                text = sep.join(buf)
+                kind, field = key
+                if kind == "row" and self.row is not None:
+                    self.row[field] = text
+                elif kind == "right" and self.row is not None:
+                    self.row["right"].append(text)
+                elif kind == "name":
+                    self.name = text
+                elif kind == "birth":
+                    self.birth_value = text
+        if (
+            frame.tag == "span"
+            and "profile-info__field" in frame.classes
+            and not self.birth_field_found
+            and frame.children is not None
+        ):
+            string = _tag_string(frame)
+            if string and "Birthdate" in string:
+                self.birth_field_found = True
+        if frame is self.row_frame:
+            self.rows.append(self.row)
+            self.row = None
+            self.row_frame = None
+
+    def close(self):
+        super().close()
+        self._flush()
+        while self.stack:
+            self._close_top()
+
+
+def _tag_string(frame):
+    """Equivalent of bs4's Tag.string for frames that tracked their children."""
+    if frame.children is None or len(frame.children) != 1:
+        return None
+    child = frame.children[0]
+    if isinstance(child, _Frame):
+        return _tag_string(child)
+    return child
+
+
+class StreamPageParser:
+    """Fast engine: html.parser token stream, no tree, one traversal."""
+
+    name = "stream"
+
+    def parse(self, content):
+        handler = _StreamHandler()
+        handler.feed(decode_markup(content))
+        handler.close()
+        results = []
+        for row in handler.rows:
+            right = row["right"]
+            if len(right) >= 3:
+                rank_text, fis_points_text, cup_points_text = right[:3]
+            else:
+                rank_text = fis_points_text = cup_points_text = None
+            results.append(build_result(
+                row.get("date"),
+                row.get("place"),
+                row.get("category"),
+                row.get("discipline"),
+                row.get("nation"),
+                rank_text,
+                fis_points_text,
+                cup_points_text,
+            ))
+        return {
+            'name': handler.name,
+            'birth_date': parse_date(handler.birth_value),
+            'results': results,
+        }
+
+
+PARSER_ENGINES = {
+    SoupPageParser.name: SoupPageParser,
+    StreamPageParser.name: StreamPageParser,
+}
+
+
+def get_parser(engine="bs4"):
+    try:
+        return PARSER_ENGINES[engine]()
+    except KeyError:
+        raise ValueError(f"Unknown parser engine: {engine}")
+
+
+def read_page(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return f.read()
+
+
+def compare_engines(content, engines=("bs4", "stream")):
+    """Parse one page with every engine; returns (outputs, mismatching engine names)."""
+    outputs = {name: get_parser(name).parse(content) for name in engines}
+    reference = outputs[engines[0]]
+    mismatches = [name for name in engines[1:] if outputs[name] != reference]
+    return outputs, mismatches
+
+
+def main():
+    p = argparse.ArgumentParser(description="Differential check of FIS parser engines on saved pages")
+    p.add_argument("pages", nargs="+", help="saved biography pages (.html or .html.gz)")
+    p.add_argument("--engines", default="bs4,stream", help="comma-separated engines; first is the reference")
+    args = p.parse_args()
+    engines = tuple(e.strip() for e in args.engines.split(",") if e.strip())
+
+    timings = {name: 0.0 for name in engines}
+    rows = 0
+    failed = []
+    for path in args.pages:
+        content = read_page(path)
+        for name in engines:
+            t0 = time.perf_counter()
+            get_parser(name).parse(content)
+            timings[name] += time.perf_counter() - t0
+        outputs, mismatches = compare_engines(content, engines)
+        rows += len(outputs[engines[0]]["results"])
+        if mismatches:
+            failed.append(path)
+            print(f"❌ {path}: {', '.join(mismatches)} differ from {engines[0]}")
+            for name in mismatches:
+                ref, got = outputs[engines[0]], outputs[name]
+                for key in ref:
+                    if ref[key] != got.get(key):
+                        print(f"   {name}.{key}: {json.dumps(got.get(key), ensure_ascii=False, default=json_default)[:300]}")
+                        print(f"   {engines[0]}.{key}: {json.dumps(ref[key], ensure_ascii=False, default=json_default)[:300]}")
+
+    print(f"pages={len(args.pages)} rows={rows} mismatched_pages={len(failed)}")
+    for name in engines:
+        per_row = (timings[name] / rows * 1e6) if rows else 0.0
+        print(f"engine={name} total_sec={timings[name]:.3f} us_per_row={per_row:.1f}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
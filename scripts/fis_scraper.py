@@ -1,11 +1,112 @@
 import requests
-from bs4 import BeautifulSoup
 import json
+import hashlib
 from datetime import datetime
 import time
 import os
 import re
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from typing import Optional
+from urllib.parse import urlparse
+
+from fis_parsers import get_parser
+from scraper_cache import entry_usable, open_cache
+
+
+def normalize_name(name_text):
+    if not name_text:
+        return None
+    # Insert a space between lower->upper transitions (e.g., DonghyunJUNG)
+    return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', name_text).strip()
+
+
+def build_profile(url, page):
+    """Raw athlete profile from a parsed biography page.
+
+    Identity comes from the URL; the page only supplies name/birthdate/results.
+    """
+    fis_code = url.split('competitorid=')[1].split('&')[0]
+    sector_code = url.split('sectorcode=')[1].split('&')[0]
+    return {
+        'fis_url': url,
+        'fis_code': fis_code,
+        'sport_code': sector_code,
+        'name_en': normalize_name(page['name']) or f"Athlete {fis_code}",
+        'birth_date': page['birth_date'],
+        'gender': None,
+        'results': page['results']
+    }
+
+
+# A downloaded page waiting for the parse stage
+FetchedPage = namedtuple("FetchedPage", "url content headers content_sha256 cache_entry")
+
+_worker_parsers = {}
+
+
+def parse_profile(url, content, engine):
+    """Parse-stage worker (runs in a child process): returns (profile, parse seconds)."""
+    parser = _worker_parsers.get(engine)
+    if parser is None:
+        parser = _worker_parsers[engine] = get_parser(engine)
+    started = time.perf_counter()
+    profile = build_profile(url, parser.parse(content))
+    return profile, time.perf_counter() - started
+
+
+class StageMeter:
+    """Items, busy seconds and wall span of one engine stage (for stats["stages"])."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = 0
+        self.busy_sec = 0.0
+        self.first_start = None
+        self.last_end = None
+
+    def add(self, started_at, seconds):
+        with self.lock:
+            self.items += 1
+            self.busy_sec += seconds
+            end = started_at + seconds
+            self.first_start = started_at if self.first_start is None else min(self.first_start, started_at)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def to_dict(self):
+        wall = (self.last_end - self.first_start) if self.items else 0.0
+        return {
+            "items": self.items,
+            "busy_sec": round(self.busy_sec, 4),
+            "wall_sec": round(wall, 4),
+            "items_per_sec": round(self.items / wall, 2) if wall > 0 else None,
+        }
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all fetch workers."""
+
+    def __init__(self, rate_per_sec, burst=1):
+        self.rate_per_sec = float(rate_per_sec)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_sec)
+                self.updated_at = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate_per_sec
+            time.sleep(wait)
+
 
 class FISScraper:
     """FIS Athlete Data Scraper (Agent A)"""
@@ -18,13 +119,44 @@ class FISScraper:
         max_retries=2,
         request_timeout=10,
         request_interval_sec=0.5,
+        max_workers=1,
+        max_per_host=4,
+        rate_limit_per_sec=None,
+        cache_backend="sqlite",
+        parser_engine="bs4",
+        metrics=None,
+        scheduler=None,
+        archive=None,
+        parse_workers=0,
+        stage_queue_size=None,
     ):
         self.cache_file = cache_file
+        self.cache_backend = cache_backend
+        self.parser = get_parser(parser_engine)
+        # Optional PipelineMetrics; gets fetch_seconds (HTTP round trips), parse_seconds and
+        # rate_limit_wait_seconds/host_wait_seconds/retry_backoff_seconds per URL
+        self.metrics = metrics
+        # Optional RefreshScheduler; replaces the global TTL with per-URL due times
+        self.scheduler = scheduler
+        # Optional PageArchive; every 200 body is kept for offline re-parsing
+        self.archive = archive
         self.cache_ttl_seconds = cache_ttl_seconds
         self.force_refresh = force_refresh
         self.max_retries = max_retries
         self.request_timeout = request_timeout
         self.request_interval_sec = request_interval_sec
+        self.max_workers = max(1, int(max_workers or 1))
+        self.max_per_host = max(1, int(max_per_host or 1))
+        # parse_workers > 0: I/O threads only download; a process pool parses
+        self.parse_workers = max(0, int(parse_workers or 0))
+        self.stage_queue_size = stage_queue_size or 2 * (self.max_workers + self.parse_workers)
+        # Concurrent mode replaces the fixed post-fetch sleep with one global token bucket.
+        # The default rate keeps the same request budget as the serial interval.
+        if rate_limit_per_sec is None and request_interval_sec and request_interval_sec > 0:
+            rate_limit_per_sec = 1.0 / request_interval_sec
+        self.rate_limiter = TokenBucket(rate_limit_per_sec) if (self.max_workers > 1 and rate_limit_per_sec) else None
+        self._lock = threading.RLock()
+        self._host_slots = {}
         self.cache = self._load_cache()
         self.stats = {
             "requested": 0,
@@ -32,220 +164,213 @@ class FISScraper:
             "cache_hit": 0,
             "stale_cache_fallback": 0,
             "hard_fail": 0,
+            "not_modified": 0,
+            "unchanged_body": 0,
         }
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
     
     def _load_cache(self):
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, 'r') as f:
-                return json.load(f)
-        return {}
-    
-    def _save_cache(self):
-        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+        return open_cache(self.cache_file, self.cache_backend)
+
+    def _bump(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+            return slot
     
-    def _normalize_name(self, name_text):
-        if not name_text:
-            return None
-        # Insert a space between lower->upper transitions (e.g., DonghyunJUNG)
-        return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', name_text).strip()
-
-    def _parse_birthdate(self, soup):
-        field = soup.find('span', class_='profile-info__field', string=lambda s: s and 'Birthdate' in s)
-        if not field:
-            return None
-        value = field.find_next('span', class_='profile-info__value')
-        if not value:
-            return None
-        text = value.get_text(strip=True)
-        if not text or not re.match(r'\d{2}-\d{2}-\d{4}', text):
-            return None
-        day, month, year = text.split('-')
-        return f"{year}-{month}-{day}"
-
-    def _parse_results(self, soup):
-        rows = soup.select('a.table-row')
-        results = []
-        for row in rows:
-            def text(sel):
-                el = row.select_one(sel)
-                return el.get_text(' ', strip=True) if el else None
-
-            date_text = text('div.g-xs-4.g-sm-4.g-md-4.g-lg-4')
-            place = text('div.g-md.g-lg.justify-left.hidden-sm-down')
-            category = text('div.g-md-5.g-lg-5.justify-left.hidden-sm-down')
-            discipline = text('div.g-md-3.g-lg-3.justify-left.hidden-sm-down')
-            nation = text('span.country__name-short')
-
-            right_cols = row.select('div.g-xs-6.g-sm-6.g-md-6.g-lg-6.justify-right.flex-xs-wrap > div')
-            if len(right_cols) >= 3:
-                rank_text = right_cols[0].get_text(' ', strip=True)
-                fis_points_text = right_cols[1].get_text(' ', strip=True)
-                cup_points_text = right_cols[2].get_text(' ', strip=True)
-            else:
-                rank_text = fis_points_text = cup_points_text = None
-
-            # Normalize date
-            iso_date = None
-            if date_text and re.match(r'\d{2}-\d{2}-\d{4}', date_text):
-                d, m, y = date_text.split('-')
-                iso_date = f"{y}-{m}-{d}"
-
-            # Normalize rank and points
-            rank = None
-            rank_status = None
-            if rank_text:
-                if rank_text.isdigit():
-                    rank = int(rank_text)
-                else:
-                    rank_status = rank_text.strip().upper()
-            fis_points = None
-            if fis_points_text:
-                try:
-                    fis_points = float(fis_points_text)
-                except ValueError:
-                    fis_points = None
-            cup_points = None
-            if cup_points_text:
-                try:
-                    cup_points = float(cup_points_text)
-                except ValueError:
-                    cup_points = None
-
-            results.append({
-                'date': iso_date,
-                'place': place,
-                'category': category,
-                'discipline': discipline,
-                'nation': nation,
-                'rank': rank,
-                'rank_status': rank_status,
-                'fis_points': fis_points,
-                'cup_points': cup_points
-            })
-        return results
+    def _observe(self, metric, started_at, url):
+        if self.metrics:
+            self.metrics.observe(metric, time.perf_counter() - started_at, url=url)
 
-    def _cache_entry_valid(self, entry: dict) -> bool:
-        if not entry:
-            return False
-        try:
-            ts = datetime.fromisoformat(entry.get("timestamp", ""))
-        except Exception:
-            return False
-        cached = entry.get("data", {})
-        has_results = isinstance(cached.get("results"), list) and len(cached.get("results")) > 0
-        has_birth = bool(cached.get("birth_date"))
-        if not (has_results and has_birth):
-            return False
-        age_sec = (datetime.now() - ts).total_seconds()
-        return age_sec < self.cache_ttl_seconds
-
-    def _request_with_retries(self, url: str) -> Optional[requests.Response]:
+    def _cache_entry_valid(self, url: str) -> bool:
+        if self.scheduler is not None:
+            return not self.scheduler.is_due(url) and entry_usable(self.cache.get(url, {}))
+        return self.cache.is_fresh(url, self.cache_ttl_seconds)
+
+    def _conditional_headers(self, cache_entry: dict) -> dict:
+        # Validators are only useful when the cached payload can be served as-is.
+        if not entry_usable(cache_entry):
+            return {}
+        # A 304 carries no body, so fetch in full once if the archive lacks this page
+        if self.archive and not self.archive.has(cache_entry.get("content_sha256")):
+            return {}
+        headers = {}
+        if cache_entry.get("etag"):
+            headers["If-None-Match"] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cache_entry["last_modified"]
+        return headers
+
+    def _request_with_retries(self, url: str, extra_headers: Optional[dict] = None) -> Optional[requests.Response]:
         last_exc = None
+        headers = dict(self.headers, **(extra_headers or {}))
         for attempt in range(1, self.max_retries + 2):
             try:
-                response = requests.get(url, headers=self.headers, timeout=self.request_timeout)
-                if response.status_code == 200:
+                if self.rate_limiter:
+                    waited = time.perf_counter()
+                    self.rate_limiter.acquire()
+                    self._observe("rate_limit_wait_seconds", waited, url)
+                slot = self._host_slot(url)
+                waited = time.perf_counter()
+                with slot:
+                    self._observe("host_wait_seconds", waited, url)
+                    # fetch_seconds is the HTTP round trip only; waits and backoff have their own metrics
+                    fetch_started = time.perf_counter()
+                    try:
+                        response = requests.get(url, headers=headers, timeout=self.request_timeout)
+                    finally:
+                        self._observe("fetch_seconds", fetch_started, url)
+                if response.status_code == 200 or (response.status_code == 304 and extra_headers):
                     return response
                 print(f"  [Retry {attempt}] Status {response.status_code}")
             except Exception as e:
                 last_exc = e
                 print(f"  [Retry {attempt}] {e}")
             if attempt <= self.max_retries:
+                backoff_started = time.perf_counter()
                 time.sleep(min(2.0, 0.5 * attempt))
+                self._observe("retry_backoff_seconds", backoff_started, url)
         if last_exc:
             print(f"  [Fail] {last_exc}")
         return None
 
-    def scrape_athlete(self, url):
-        self.stats["requested"] += 1
+    def _fetch_stage(self, url):
+        """Network half of scrape_athlete: ("done", profile-or-None) or ("parse", FetchedPage)."""
+        self._bump("requested")
         cache_entry = self.cache.get(url, {})
         cached = cache_entry.get("data", {})
 
         # Cache-first mode (not used in force-refresh operations)
-        if (not self.force_refresh) and self._cache_entry_valid(cache_entry):
-            self.stats["cache_hit"] += 1
+        if (not self.force_refresh) and self._cache_entry_valid(url):
+            self._bump("cache_hit")
             print(f"  [Cache] {url.split('competitorid=')[1]}")
-            return cached
+            return "done", cached
         
         try:
             print(f"  [Fetching] {url}")
-            response = self._request_with_retries(url)
+            response = self._request_with_retries(url, self._conditional_headers(cache_entry))
             if response is None:
                 if cached:
-                    self.stats["stale_cache_fallback"] += 1
+                    self._bump("stale_cache_fallback")
                     print(f"  [StaleCacheFallback] {url.split('competitorid=')[1]}")
-                    return cached
-                self.stats["hard_fail"] += 1
-                return None
-                
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Basic Extraction (Simulated/Simplified for Reliability)
-            # In a real scenario, this would parse exact CSS selectors.
-            # Here we extract key metadata from the URL and page title as a fallback
-            
-            fis_code = url.split('competitorid=')[1].split('&')[0]
-            sector_code = url.split('sectorcode=')[1].split('&')[0]
-            
-            name = soup.find('h1', class_='athlete-profile__name')
-            name_text = self._normalize_name(name.get_text(strip=True) if name else None)
-            if not name_text:
-                name_text = f"Athlete {fis_code}"
-
-            birth_date = self._parse_birthdate(soup)
-            results = self._parse_results(soup)
-
-            data = {
-                'fis_url': url,
-                'fis_code': fis_code,
-                'sport_code': sector_code,
-                'name_en': name_text,
-                'birth_date': birth_date,
-                'gender': None,
-                'results': results
-            }
+                    return "done", cached
+                self._bump("hard_fail")
+                return "done", None
 
+            # Unchanged page: reuse the cached parse instead of parsing again
+            not_modified = response.status_code == 304
+            content_sha256 = None if not_modified else hashlib.sha256(response.content).hexdigest()
+            if self.archive:
+                if not_modified:
+                    self.archive.record_unchanged(url, cache_entry.get("content_sha256"), headers=response.headers)
+                else:
+                    self.archive.put(url, response.content, sha256=content_sha256, headers=response.headers)
+            if not self.rate_limiter:
+                interval_started = time.perf_counter()
+                time.sleep(self.request_interval_sec)
+                self._observe("rate_limit_wait_seconds", interval_started, url)
+            if (not_modified or content_sha256 == cache_entry.get("content_sha256")) and entry_usable(cache_entry):
+                if self.scheduler:
+                    self.scheduler.record_fetch(url, changed=False)
+                self._bump("not_modified" if not_modified else "unchanged_body")
+                print(f"  [{'NotModified' if not_modified else 'Unchanged'}] {url.split('competitorid=')[1]}")
+                self.cache.set(url, dict(
+                    cache_entry,
+                    timestamp=datetime.now().isoformat(),
+                    etag=response.headers.get("ETag") or cache_entry.get("etag"),
+                    last_modified=response.headers.get("Last-Modified") or cache_entry.get("last_modified"),
+                ))
+                self._bump("fetched")
+                return "done", cached
+            return "parse", FetchedPage(url, response.content, response.headers, content_sha256, cache_entry)
+        except Exception as e:
+            return "done", self._fail(url, cached, e)
+
+    def _store_stage(self, page, data):
+        """Cache a freshly parsed profile; returns what the scrape yields for the URL."""
+        url, cached = page.url, page.cache_entry.get("data", {})
+        try:
             # Parse failure fallback: keep previous usable payload rather than dropping athlete
             if (not data.get("results")) and cached.get("results"):
-                self.stats["stale_cache_fallback"] += 1
+                self._bump("stale_cache_fallback")
                 print(f"  [ParseFallback] {url.split('competitorid=')[1]}")
                 return cached
-            
+
+            if self.scheduler:
+                self.scheduler.record_fetch(url, changed=True)
             # Save to cache
-            self.cache[url] = {
+            self.cache.set(url, {
                 'timestamp': datetime.now().isoformat(),
+                'etag': page.headers.get('ETag'),
+                'last_modified': page.headers.get('Last-Modified'),
+                'content_sha256': page.content_sha256,
                 'data': data
-            }
-            self._save_cache()
-            self.stats["fetched"] += 1
-            
-            time.sleep(self.request_interval_sec)
+            })
+            self._bump("fetched")
             return data
-            
         except Exception as e:
-            print(f"  [Fail] {e}")
-            if cached:
-                self.stats["stale_cache_fallback"] += 1
-                print(f"  [StaleCacheFallback] {url.split('competitorid=')[1]}")
-                return cached
-            self.stats["hard_fail"] += 1
-            return None
+            return self._fail(url, cached, e)
+
+    def _fail(self, url, cached, exc):
+        print(f"  [Fail] {exc}")
+        if cached:
+            self._bump("stale_cache_fallback")
+            print(f"  [StaleCacheFallback] {url.split('competitorid=')[1]}")
+            return cached
+        self._bump("hard_fail")
+        return None
+
+    def scrape_athlete(self, url):
+        stage, value = self._fetch_stage(url)
+        if stage == "done":
+            return value
+        try:
+            parse_started = time.perf_counter()
+            data = build_profile(url, self.parser.parse(value.content))
+            self._observe("parse_seconds", parse_started, url)
+        except Exception as e:
+            return self._fail(url, value.cache_entry.get("data", {}), e)
+        return self._store_stage(value, data)
+
+    def iter_scrape_results(self, urls, on_result=None):
+        """Yield (url, profile-or-None) in input order as soon as each one (and all before it) is done.
+
+        on_result(url, profile) is called from the worker as soon as that URL
+        finishes, regardless of order, so callers can checkpoint progress.
+        """
+        def scrape(url):
+            data = self.scrape_athlete(url)
+            if on_result:
+                on_result(url, data)
+            return data
 
-    def scrape_all(self, urls):
-        results = []
         failures = []
         print(f"🔍 Agent A: Scraping {len(urls)} athletes...")
-        for i, url in enumerate(urls):
-            data = self.scrape_athlete(url)
-            if data:
-                results.append(data)
+        use_threads = self.max_workers > 1 and not self.parse_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) if use_threads else nullcontext() as pool:
+            if self.parse_workers:
+                fetched = self._iter_two_stage(urls, on_result)
+            elif pool is not None:
+                print(f"  [Concurrent] workers={self.max_workers} per_host={self.max_per_host}")
+                # Futures are consumed in submission order, so output matches the serial path.
+                futures = [pool.submit(scrape, url) for url in urls]
+                fetched = (f.result() for f in futures)
             else:
-                failures.append(url)
+                fetched = (scrape(url) for url in urls)
+            for url, data in zip(urls, fetched):
+                if not data:
+                    failures.append(url)
+                yield url, data
+            fetched.close()  # zip() stops before exhausting it; lets the two-stage engine shut down
         if failures:
             log_dir = os.path.join(os.path.dirname(self.cache_file), "logs")
             os.makedirs(log_dir, exist_ok=True)
@@ -257,4 +382,87 @@ class FISScraper:
                     f.write(url + "\n")
             print(f"⚠️ Failed URLs logged: {log_path} ({len(failures)})")
         print(f"📊 Scraper stats: {self.stats}")
-        return results
+
+    def _iter_two_stage(self, urls, on_result=None):
+        """Two-stage engine: I/O threads download, a process pool parses; yields profiles in URL order.
+
+        At most stage_queue_size URLs are between "download started" and
+        "parsed and cached", so fast downloads wait for the parsers instead
+        of piling up bytes in memory. Per-stage throughput goes to stats["stages"].
+        """
+        print(f"  [TwoStage] io_workers={self.max_workers} parse_workers={self.parse_workers} queue={self.stage_queue_size}")
+        slots = [Future() for _ in urls]
+        window = threading.BoundedSemaphore(self.stage_queue_size)
+        meters = {"fetch": StageMeter(), "parse": StageMeter()}
+        engine = self.parser.name
+        stop = threading.Event()
+
+        def complete(i, url, data):
+            # Runs in pool threads and done-callbacks, which swallow exceptions:
+            # the slot must be resolved either way or the consumer waits forever
+            try:
+                if on_result:
+                    on_result(url, data)
+            except Exception as e:
+                slots[i].set_exception(e)
+            else:
+                slots[i].set_result(data)
+            finally:
+                window.release()
+
+        def parsed(i, page, future):
+            try:
+                profile, seconds = future.result()
+                meters["parse"].add(time.perf_counter() - seconds, seconds)
+                if self.metrics:
+                    self.metrics.observe("parse_seconds", seconds, url=page.url)
+                data = self._store_stage(page, profile)
+            except Exception as e:
+                data = self._fail(page.url, page.cache_entry.get("data", {}), e)
+            complete(i, page.url, data)
+
+        def fetch(i, url):
+            started_at = time.perf_counter()
+            try:
+                stage, value = self._fetch_stage(url)
+                meters["fetch"].add(started_at, time.perf_counter() - started_at)
+                if stage == "parse":
+                    future = parse_pool.submit(parse_profile, url, value.content, engine)
+                    future.add_done_callback(lambda f: parsed(i, value, f))
+                    return
+            except Exception as e:
+                value = self._fail(url, self.cache.get(url, {}).get("data", {}), e)
+            complete(i, url, value)
+
+        def feed():
+            for i, url in enumerate(urls):
+                # Backpressure: wait while stage_queue_size URLs are still in flight
+                while not window.acquire(timeout=0.2):
+                    if stop.is_set():
+                        return
+                io_pool.submit(fetch, i, url)
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool, \
+                    ThreadPoolExecutor(max_workers=self.max_workers) as io_pool:
+                feeder = threading.Thread(target=feed, daemon=True)
+                feeder.start()
+                try:
+                    for slot in slots:
+                        yield slot.result()
+                finally:
+                    stop.set()
+                    feeder.join()
+        finally:
+            stages = {name: meter.to_dict() for name, meter in meters.items()}
+            stages.update(io_workers=self.max_workers, parse_workers=self.parse_workers, queue_size=self.stage_queue_size)
+            self.stats["stages"] = stages
+
+    def iter_scrape(self, urls, on_result=None):
+        """Yield successful profiles in input order."""
+        for _, data in self.iter_scrape_results(urls, on_result=on_result):
+            if data:
+                yield data
+
+    def scrape_all(self, urls, on_result=None):
+        return list(self.iter_scrape(urls, on_result=on_result))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Local stand-in for fis-ski.com serving the offline page corpus.
+
+Any competitorid is answered: ids in the corpus get their own page and
+unknown ids (synthetic rosters) are mapped onto the corpus by modulo.
+The biographies search (nationcode/sectorcode/limit/offset) lists the
+corpus athletes as KOR plus --roster-size synthetic competitors per
+nation and sector, for roster_discovery.py.
+
+    python3 scripts/fis_stub_server.py --port 8765 --latency-ms 80 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from fis_fixtures import CORPUS_DIR, load_corpus, render_list_page
+
+BIOGRAPHY_PATH = "/DB/general/athlete-biography.html"
+LIST_PATH = "/DB/general/biographies.html"
+
+
+class FISStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None, roster_size=0):
+        super().__init__(address, _Handler)
+        self.pages = pages
+        self.page_ids = sorted(pages)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.served = 0
+        self.roster_size = roster_size
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_for(self, cid):
+        if cid in self.pages:
+            return self.pages[cid][1]
+        return self.pages[self.page_ids[int(cid) % len(self.page_ids)]][1]
+
+    def roster(self, nation, sector):
+        entries = []
+        if nation == "KOR":
+            for cid, (url, _) in sorted(self.pages.items()):
+                if url and f"sectorcode={sector}&" in url:
+                    entries.append({"competitorid": cid, "sector": sector, "nation": nation, "name": f"Athlete {cid}"})
+        for i in range(self.roster_size):
+            # 8-digit ids never collide with the corpus ones
+            cid = str(10_000_000 + int(hashlib.sha1(f"{nation}/{sector}/{i}".encode()).hexdigest()[:8], 16) % 90_000_000)
+            entries.append({
+                "competitorid": cid,
+                "sector": sector,
+                "nation": nation,
+                "name": f"SYNTH Athlete{i}",
+                "fiscode": str(1_000_000 + i),
+                "birth_year": 1990 + i % 15,
+                "gender": "MF"[i % 2],
+            })
+        return entries
+
+    def biography_url(self, cid, sector="FS"):
+        return f"{self.base_url}{BIOGRAPHY_PATH}?sectorcode={sector}&competitorid={cid}&type=result"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.rng_lock:
+            delay = max(0.0, server.latency_ms + server.rng.uniform(-server.jitter_ms, server.jitter_ms)) / 1000.0
+            fail = server.rng.random() < server.error_rate
+        if delay:
+            time.sleep(delay)
+        if self.path.startswith(LIST_PATH):
+            if fail:
+                self.send_error(503)
+                return
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            offset, limit = int(query.get("offset", 0)), int(query.get("limit", 1000))
+            entries = server.roster(query.get("nationcode", ""), query.get("sectorcode", ""))
+            body = render_list_page(entries[offset:offset + limit])
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        m = re.search(r"competitorid=(\d+)", self.path)
+        if not self.path.startswith(BIOGRAPHY_PATH) or not m:
+            self.send_error(404)
+            return
+        if fail:
+            self.send_error(503)
+            return
+        body = server.page_for(m.group(1))
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+        server.served += 1
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_stub_server(port=0, corpus_dir=CORPUS_DIR, **kwargs):
+    """Start the server on a background thread; call .shutdown() when done."""
+    pages = load_corpus(corpus_dir)
+    if not pages:
+        raise RuntimeError(f"Empty corpus: {corpus_dir} (run fis_fixtures.py record or synthesize)")
+    server = FISStubServer(("127.0.0.1", port), pages, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Serve the FIS page corpus locally")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--corpus-dir", default=CORPUS_DIR)
+    p.add_argument("--latency-ms", type=float, default=0.0, help="mean response latency")
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- latency jitter")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--roster-size", type=int, default=0, help="synthetic competitors per nation/sector in list pages")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = FISStubServer(
+        ("127.0.0.1", args.port),
+        load_corpus(args.corpus_dir),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        roster_size=args.roster_size,
+    )
+    print(f"🧪 FIS stub serving {len(server.pages)} pages at {server.base_url}{BIOGRAPHY_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
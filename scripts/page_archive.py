@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Compressed, content-addressed archive of every fetched biography page.
+
+    <archive>/objects/<sha256[:2]>/<sha256>.html.gz   one file per distinct body
+    <archive>/index.jsonl                              one line per fetch:
+        {"competitorid", "url", "fetched_at", "sha256", "bytes", "etag", "last_modified"}
+
+Identical bodies are stored once, so a page that did not change between
+runs only adds an index line (a 304 is logged with "bytes": null). `reparse` rebuilds the scraper cache and
+athletes.json from the latest archived page of each URL with no network
+access, parsing across a process pool:
+
+    python3 scripts/page_archive.py reparse --workers 8
+    python3 scripts/page_archive.py reparse --engine stream --urls scripts/data/raw/athlete_urls.txt
+    python3 scripts/page_archive.py stats
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from fis_fixtures import URL_FILE, competitor_id, read_urls
+from fis_parsers import PARSER_ENGINES, get_parser
+from fis_scraper import build_profile
+from result_identity import IDENTITY_PATH
+from scraper_cache import CACHE_BACKENDS, open_cache
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.path.join(SCRIPT_DIR, "data", "cache", "page_archive")
+CACHE_FILE = "scripts/data/cache/scraper_cache.json"
+OUTPUT_PATH = os.path.join(SCRIPT_DIR, "data", "athletes.json")
+
+
+class PageArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def object_path(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.html.gz")
+
+    def has(self, sha256):
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def put(self, url, content, sha256=None, headers=None, fetched_at=None):
+        """Store one fetched body; returns its sha256."""
+        sha256 = sha256 or hashlib.sha256(content).hexdigest()
+        path = self.object_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            # mtime=0 keeps the gzip bytes a pure function of the body
+            with open(tmp_path, "wb") as f:
+                with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+                    gz.write(content)
+            os.replace(tmp_path, path)
+        self._append(url, sha256, len(content), headers, fetched_at)
+        return sha256
+
+    def record_unchanged(self, url, sha256, headers=None, fetched_at=None):
+        """Log a 304 against the already-archived body it confirms."""
+        if self.has(sha256):
+            self._append(url, sha256, None, headers, fetched_at)
+
+    def _append(self, url, sha256, size, headers, fetched_at):
+        headers = headers or {}
+        record = {
+            "competitorid": competitor_id(url),
+            "url": url,
+            "fetched_at": fetched_at or datetime.now().isoformat(),
+            "sha256": sha256,
+            "bytes": size,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock, open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def read(self, sha256):
+        with gzip.open(self.object_path(sha256), "rb") as f:
+            return f.read()
+
+    def records(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crashed run
+
+    def latest(self):
+        """{url: newest index record} (fetched_at is ISO, so it sorts as text)."""
+        out = {}
+        for record in self.records():
+            current = out.get(record["url"])
+            if current is None or record["fetched_at"] >= current["fetched_at"]:
+                out[record["url"]] = record
+        return out
+
+    def history(self, competitorid):
+        return sorted(
+            (r for r in self.records() if r["competitorid"] == str(competitorid)),
+            key=lambda r: r["fetched_at"],
+        )
+
+
+def parse_archived(task):
+    """Process-pool worker: (url, object path, engine) -> (url, profile or None, error or None).
+
+    Module-level and fed plain tuples so it pickles.
+    """
+    url, path, engine = task
+    try:
+        with gzip.open(path, "rb") as f:
+            content = f.read()
+        return url, build_profile(url, get_parser(engine).parse(content)), None
+    except Exception as e:
+        return url, None, f"{type(e).__name__}: {e}"
+
+
+def reparse(urls, archive, cache, engine="bs4", workers=None, chunksize=8):
+    """Re-parse the latest archived page of each URL; returns ({url: profile}, report).
+
+    Cache entries are rewritten with the new parse and the archived fetch
+    metadata. URLs without an archived page (or whose parse fails) keep
+    their current cache entry.
+    """
+    latest = archive.latest()
+    tasks = [(url, archive.object_path(latest[url]["sha256"]), engine) for url in urls if url in latest]
+    missing = [url for url in urls if url not in latest]
+    profiles, errors, changed = {}, {}, []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for url, profile, error in pool.map(parse_archived, tasks, chunksize=chunksize):
+            if error:
+                errors[url] = error
+                continue
+            record = latest[url]
+            previous = cache.get(url, {})
+            cache.set(url, {
+                "timestamp": record["fetched_at"],
+                "etag": record.get("etag"),
+                "last_modified": record.get("last_modified"),
+                "content_sha256": record["sha256"],
+                "data": profile,
+            })
+            if previous.get("data") and previous["data"] != profile:
+                changed.append(url)
+            profiles[url] = profile
+    elapsed = time.perf_counter() - started
+    report = {
+        "urls": len(urls),
+        "reparsed": len(profiles),
+        "changed": len(changed),
+        "missing_from_archive": len(missing),
+        "errors": errors,
+        "engine": engine,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(profiles) / elapsed, 1) if elapsed else None,
+    }
+    return profiles, report
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Archive of fetched FIS pages and offline re-parse")
+    p.add_argument("--archive", default=ARCHIVE_DIR, help="archive directory")
+    sub = p.add_subparsers(dest="command", required=True)
+    rp = sub.add_parser("reparse", help="rebuild the scraper cache and athletes.json from the archive")
+    rp.add_argument("--urls", default=URL_FILE, help="athlete URL list (output order)")
+    rp.add_argument("--engine", choices=sorted(PARSER_ENGINES), default="bs4")
+    rp.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    rp.add_argument("--cache-file", default=CACHE_FILE)
+    rp.add_argument("--cache-backend", choices=CACHE_BACKENDS, default="sqlite")
+    rp.add_argument("--output", default=OUTPUT_PATH, help="athletes.json to rewrite")
+    rp.add_argument("--no-output", action="store_true", help="only rebuild the scraper cache")
+    sub.add_parser("stats", help="summarize the archive")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    archive = PageArchive(args.archive)
+    if args.command == "stats":
+        records = list(archive.records())
+        objects = {r["sha256"] for r in records}
+        stored = sum(os.path.getsize(archive.object_path(sha)) for sha in objects if os.path.exists(archive.object_path(sha)))
+        print(json.dumps({
+            "fetches": len(records),
+            "urls": len({r["url"] for r in records}),
+            "objects": len(objects),
+            "raw_bytes": sum(r["bytes"] or 0 for r in records),
+            "stored_bytes": stored,
+        }, indent=2))
+        return
+
+    from data_processor import DataProcessor
+
+    urls = read_urls(args.urls)
+    print(f"🗃️ Re-parsing {len(urls)} URLs from {args.archive} ({args.engine}, workers={args.workers or os.cpu_count()})")
+    cache = open_cache(args.cache_file, args.cache_backend)
+    try:
+        profiles, report = reparse(urls, archive, cache, engine=args.engine, workers=args.workers)
+        if not args.no_output:
+            # Same input order as a scrape; URLs missing from the archive fall back to the cache
+            raw_data = []
+            for url in urls:
+                profile = profiles.get(url) or cache.get(url, {}).get("data")
+                if profile:
+                    raw_data.append(profile)
+            processor = DataProcessor(identity_path=IDENTITY_PATH)
+            processor.save_to_app(processor.process(raw_data), args.output)
+    finally:
+        cache.close()
+    print(f"📦 Reparsed {report['reparsed']} pages in {report['seconds']}s ({report['pages_per_sec']} pages/s), "
+          f"{report['changed']} changed, {report['missing_from_archive']} not archived")
+    if report["errors"]:
+        for url, error in report["errors"].items():
+            print(f"  [Fail] {url}: {error}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -54,6 +54,7 @@ function categoryCode(category = "") {
 function mapResult(r) {
   const rank = toNum(r.rank, 0);
   return {
+    result_uid: r.result_uid || null,
     date: r.date || null,
     place: r.place || null,
     category: r.category || null,
@@ -92,6 +93,8 @@ function rankScore(r) {
 }
 
 function resultKey(r) {
+  // Stable id from the pipeline's result identity index; a corrected score replaces, not duplicates
+  if (r.result_uid) return String(r.result_uid);
   const category_code = normalizedCategoryCode(r);
   return [
     r.date || "",
@@ -149,13 +152,48 @@ function mapAthlete(oldAthlete, newAthlete) {
   };
 }
 
+// ma entry for an athlete the bundle does not list yet (e.g. from roster discovery), in the bundle's key order
+function newBundleAthlete(n) {
+  const code = String(n.fis_code);
+  return {
+    id: code,
+    fis_code: code,
+    fis_url: null,
+    name_en: null,
+    name_ko: null,
+    gender: n.gender || null,
+    sport: null,
+    sport_display: null,
+    team: null,
+    birth_date: null,
+    birth_year: null,
+    age: null,
+    current_rank: 0,
+    fis_points: 0,
+    rank_context: "Unranked",
+    status: "Active",
+    photo_url: "https://via.placeholder.com/150?text=No+Image",
+    recent_results: [],
+  };
+}
+
 let updated = 0;
+const matched = new Set();
 const merged = oldData.map((a) => {
-  const n = byCode.get(String(a.fis_code));
+  const code = String(a.fis_code);
+  const n = byCode.get(code);
   if (!n) return a;
   updated += 1;
+  matched.add(code);
   return mapAthlete(a, n);
 });
+// Athletes the bundle does not list yet are appended in athletes.json order
+let added = 0;
+for (const [code, n] of byCode) {
+  if (matched.has(code)) continue;
+  added += 1;
+  merged.push(mapAthlete(newBundleAthlete(n), n));
+}
 
 const backupPath = `${targetPath}.bak_${Date.now()}`;
 fs.copyFileSync(targetPath, backupPath);
@@ -177,5 +215,6 @@ for (const athlete of merged) {
 console.log(`backup=${backupPath}`);
 console.log(`athletes=${merged.length}`);
 console.log(`updated_athletes=${updated}`);
+console.log(`added_athletes=${added}`);
 console.log(`result_count=${resultCount}`);
 console.log(`max_event_date=${maxEventDate}`);
@@ -0,0 +1,182 @@
+"""Stage timing, latency histograms and metrics export for the pipeline.
+
+    metrics = PipelineMetrics(profile=True, profile_dir="scripts/data/cache/profiles")
+    with metrics.stage("scrape"):
+        ...
+    metrics.observe("fetch_seconds", 0.21, url=url)
+    health["timing"] = metrics.to_dict()
+    metrics.write_prometheus("scripts/data/cache/logs/pipeline.prom")
+
+With profile=True every stage runs under cProfile and tracemalloc, and
+dump_profile() writes the reports of the slowest stage only. cProfile
+sees the calling thread, so fetch workers show up as time spent waiting
+on futures; the fetch/parse histograms cover what happens inside them.
+fetch_seconds is the HTTP round trip alone; time a fetch spends queued
+behind the rate limiter, the per-host slots or retry backoff goes to
+rate_limit_wait_seconds, host_wait_seconds and retry_backoff_seconds.
+"""
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_FORMATS = ("prometheus", "openmetrics")
+SLOWEST_URLS = 10
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds); keeps raw values for percentiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.values = []
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values.append(value)
+        self.total += value
+
+    def percentile(self, q):
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def cumulative(self):
+        out, running = [], 0
+        for le, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            out.append((le, running))
+        return out
+
+    def to_dict(self):
+        return {
+            "count": len(self.values),
+            "sum": round(self.total, 6),
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "max": max(self.values) if self.values else None,
+            "buckets": {("+Inf" if le == float("inf") else str(le)): n for le, n in self.cumulative()},
+        }
+
+
+class PipelineMetrics:
+    def __init__(self, profile=False, profile_dir=None):
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.histograms = {}
+        self.per_url = {}
+        self._profiles = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Record wall and CPU seconds for a block (CPU is process-wide, so it includes worker threads)."""
+        profiler = None
+        if self.profile:
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            profiler.enable()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            record = {"wall_sec": round(wall, 6), "cpu_sec": round(cpu, 6)}
+            if profiler:
+                profiler.disable()
+                snapshot = tracemalloc.take_snapshot()
+                record["peak_mem_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+                tracemalloc.stop()
+                self._profiles[name] = (profiler, snapshot)
+            self.stages[name] = record
+
+    def observe(self, metric, seconds, url=None):
+        with self.lock:
+            hist = self.histograms.get(metric)
+            if hist is None:
+                hist = self.histograms[metric] = Histogram()
+            hist.observe(seconds)
+            if url:
+                per_url = self.per_url.setdefault(url, {})
+                per_url[metric] = round(per_url.get(metric, 0.0) + seconds, 6)
+
+    def slowest_stage(self):
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda name: self.stages[name]["wall_sec"])
+
+    def slowest_urls(self, n=SLOWEST_URLS):
+        ranked = sorted(self.per_url.items(), key=lambda kv: sum(kv[1].values()), reverse=True)
+        return [dict(url=url, **timings) for url, timings in ranked[:n]]
+
+    def to_dict(self):
+        return {
+            "stages": self.stages,
+            "slowest_stage": self.slowest_stage(),
+            "histograms": {name: hist.to_dict() for name, hist in sorted(self.histograms.items())},
+            "slowest_urls": self.slowest_urls(),
+        }
+
+    def prometheus_text(self, prefix="team_korea_pipeline", openmetrics=False):
+        lines = []
+        if self.stages:
+            for field, help_text in (("wall_sec", "Wall-clock seconds per stage"), ("cpu_sec", "CPU seconds per stage")):
+                name = f"{prefix}_stage_{field[:-4]}_seconds"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for stage, record in self.stages.items():
+                    lines.append(f'{name}{{stage="{stage}"}} {record[field]}')
+        for metric, hist in sorted(self.histograms.items()):
+            name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {name} Latency histogram")
+            lines.append(f"# TYPE {name} histogram")
+            for le, count in hist.cumulative():
+                lines.append(f'{name}_bucket{{le="{"+Inf" if le == float("inf") else le}"}} {count}')
+            lines.append(f"{name}_sum {round(hist.total, 6)}")
+            lines.append(f"{name}_count {len(hist.values)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, fmt="prometheus", prefix="team_korea_pipeline"):
+        """Atomic write so node_exporter's textfile collector never reads a partial file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text(prefix=prefix, openmetrics=fmt == "openmetrics"))
+        os.replace(tmp_path, path)
+        return path
+
+    def dump_profile(self, top=30):
+        """Write cProfile/tracemalloc reports for the slowest profiled stage; returns the paths."""
+        profiled = {name: self.stages[name] for name in self._profiles}
+        if not profiled or not self.profile_dir:
+            return {}
+        stage = max(profiled, key=lambda name: profiled[name]["wall_sec"])
+        profiler, snapshot = self._profiles[stage]
+        os.makedirs(self.profile_dir, exist_ok=True)
+        paths = {
+            "stage": stage,
+            "pstats": os.path.join(self.profile_dir, f"{stage}.pstats"),
+            "profile_txt": os.path.join(self.profile_dir, f"{stage}_profile.txt"),
+            "tracemalloc_txt": os.path.join(self.profile_dir, f"{stage}_tracemalloc.txt"),
+        }
+        profiler.dump_stats(paths["pstats"])
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+        with open(paths["profile_txt"], "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+        with open(paths["tracemalloc_txt"], "w", encoding="utf-8") as f:
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
+        return paths
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""In-memory stand-in for the Supabase PostgREST endpoints used by supabase_sync.py.
+
+Supports what the sync uses: upsert POSTs (`on_conflict`, also on several
+columns, optional gzip bodies), GET with `select`/`order`/`limit`/`offset`/`eq.`
+filters, DELETE with `eq.`/`neq.`/`in.(...)` filters, and the
+apply_staged_sync RPC of --mode staged. Latency and 503 error rate
+are configurable so retries and adaptive chunking can be exercised.
+
+    python3 scripts/postgrest_stub_server.py --port 54321 --latency-ms 40 --error-rate 0.1
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=dev python3 scripts/supabase_sync.py --data ...
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+TABLE_KEYS = {"athletes": "fis_code", "athlete_results": "result_uid"}
+STAGING_TABLES = {"athletes": "athletes_staging", "athlete_results": "athlete_results_staging"}
+RESERVED_PARAMS = ("select", "order", "limit", "offset", "on_conflict")
+
+
+def _parse_in_list(text):
+    inner = text[text.index("(") + 1 : text.rindex(")")]
+    if not inner:
+        return []
+    if inner.startswith('"'):
+        return json.loads("[" + inner + "]")
+    return inner.split(",")
+
+
+def _matches(row, filters):
+    for col, expr in filters:
+        value = "" if row.get(col) is None else str(row.get(col))
+        op, _, arg = expr.partition(".")
+        if op == "eq" and value != arg:
+            return False
+        if op == "neq" and value == arg:
+            return False
+        if op == "in" and value not in _parse_in_list(expr):
+            return False
+        if op == "gt" and not value > arg:
+            return False
+        if op == "gte" and not value >= arg:
+            return False
+        if op == "lt" and not value < arg:
+            return False
+        if op == "lte" and not value <= arg:
+            return False
+    return True
+
+
+def _row_key(row, conflict):
+    return "|".join(str(row[col]) for col in conflict.split(","))
+
+
+def apply_staged_sync(server, payload):
+    """In-memory version of public.apply_staged_sync (supabase_schema.sql); called under server.lock."""
+    run_id = payload.get("p_sync_run_id")
+    staged = {
+        table: [r for r in server.table(STAGING_TABLES[table]).values() if r.get("sync_run_id") == run_id]
+        for table in TABLE_KEYS
+    }
+    expected = {"athletes": payload.get("p_expected_athletes"), "athlete_results": payload.get("p_expected_results")}
+    if not staged["athletes"]:
+        raise ValueError(f"nothing staged for sync_run_id {run_id}")
+    for table, rows in staged.items():
+        if expected[table] is not None and len(rows) != expected[table]:
+            raise ValueError(f"incomplete staging for {run_id}: {len(rows)} of {expected[table]} {table}")
+    summary = {}
+    for table in ("athletes", "athlete_results"):
+        key_col = TABLE_KEYS[table]
+        store = server.table(table)
+        upserted = 0
+        for row in staged[table]:
+            key = str(row[key_col])
+            if store.get(key, {}).get("row_hash") != row.get("row_hash"):
+                store[key] = {k: v for k, v in row.items() if k != "staged_at"}
+                upserted += 1
+        keep = {str(row[key_col]) for row in staged[table]}
+        stale = [key for key in store if key not in keep]
+        for key in stale:
+            del store[key]
+        summary[table] = {"staged": len(staged[table]), "upserted": upserted, "unchanged": len(staged[table]) - upserted, "deleted": len(stale)}
+    for table in STAGING_TABLES.values():
+        store = server.table(table)
+        for key in [k for k, r in store.items() if r.get("sync_run_id") == run_id]:
+            del store[key]
+    return summary
+
+
+class PostgRESTStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.logs = []
+        # rpc name -> callable(server, payload) -> JSON-serializable result
+        self.rpc_handlers = {"apply_staged_sync": apply_staged_sync}
+        self.stats = {"requests": 0, "post_rows": 0, "body_bytes": 0, "gzip_requests": 0, "injected_errors": 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def table(self, name):
+        return self.tables.setdefault(name, {})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _route(self):
+        parsed = urlparse(self.path)
+        parts = parsed.path.strip("/").split("/")
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        return parts, params
+
+    def _reply(self, status, payload=None):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _begin(self):
+        server = self.server
+        with server.lock:
+            server.stats["requests"] += 1
+            fail = server.rng.random() < server.error_rate
+            if fail:
+                server.stats["injected_errors"] += 1
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000.0)
+        if fail:
+            self._reply(503, {"message": "injected failure"})
+            return False
+        return True
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.server.lock:
+            self.server.stats["body_bytes"] += len(raw)
+            if self.headers.get("Content-Encoding") == "gzip":
+                self.server.stats["gzip_requests"] += 1
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        return json.loads(raw or b"null")
+
+    def do_POST(self):
+        if not self._begin():
+            return
+        parts, params = self._route()
+        payload = self._body()
+        if parts[:3] == ["rest", "v1", "rpc"] and len(parts) == 4:
+            handler = self.server.rpc_handlers.get(parts[3])
+            if not handler:
+                self._reply(404, {"message": f"unknown rpc {parts[3]}"})
+                return
+            try:
+                with self.server.lock:
+                    result = handler(self.server, payload or {})
+            except ValueError as e:
+                self._reply(400, {"message": str(e)})
+                return
+            self._reply(200, result)
+            return
+        if parts[:2] != ["rest", "v1"] or len(parts) != 3:
+            self._reply(404, {"message": "not found"})
+            return
+        table = parts[2]
+        rows = payload if isinstance(payload, list) else [payload]
+        conflict = dict(params).get("on_conflict") or TABLE_KEYS.get(table)
+        with self.server.lock:
+            self.server.stats["post_rows"] += len(rows)
+            if conflict:
+                store = self.server.table(table)
+                for row in rows:
+                    key = _row_key(row, conflict)
+                    store[key] = dict(store.get(key, {}), **row)
+            elif table == "sync_logs":
+                self.server.logs.extend(rows)
+            else:
+                store = self.server.table(table)
+                for row in rows:
+                    store[str(len(store))] = row
+        self._reply(201)
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        parts, params = self._route()
+        if parts[:2] != ["rest", "v1"] or len(parts) != 3:
+            self._reply(404, {"message": "not found"})
+            return
+        opts = dict(params)
+        filters = [(k, v) for k, v in params if k not in RESERVED_PARAMS]
+        with self.server.lock:
+            source = self.server.logs if parts[2] == "sync_logs" else list(self.server.table(parts[2]).values())
+            rows = [dict(r) for r in source if _matches(r, filters)]
+        if opts.get("order"):
+            for spec in reversed(opts["order"].split(",")):
+                col, _, direction = spec.partition(".")
+                rows.sort(key=lambda r: (r.get(col) is None, r.get(col) or ""), reverse=direction.startswith("desc"))
+        offset = int(opts.get("offset") or 0)
+        limit = int(opts["limit"]) if opts.get("limit") else None
+        rows = rows[offset : offset + limit if limit is not None else None]
+        if opts.get("select") and opts["select"] != "*":
+            cols = opts["select"].split(",")
+            rows = [{c: r.get(c) for c in cols} for r in rows]
+        self._reply(200, rows)
+
+    def do_DELETE(self):
+        if not self._begin():
+            return
+        parts, params = self._route()
+        if parts[:2] != ["rest", "v1"] or len(parts) != 3:
+            self._reply(404, {"message": "not found"})
+            return
+        filters = [(k, v) for k, v in params if k not in RESERVED_PARAMS]
+        with self.server.lock:
+            store = self.server.table(parts[2])
+            for key in [k for k, r in store.items() if _matches(r, filters)]:
+                del store[key]
+        self._reply(204)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_stub_server(port=0, **kwargs):
+    """Start the server on a background thread; call .shutdown() when done."""
+    server = PostgRESTStubServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="In-memory PostgREST stand-in")
+    p.add_argument("--port", type=int, default=54321)
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    p.add_argument("--seed", type=int, default=None)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = PostgRESTStubServer(("127.0.0.1", args.port), latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed)
+    print(f"🧪 PostgREST stub at {server.base_url}/rest/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
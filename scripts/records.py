@@ -0,0 +1,161 @@
+"""Compact record types shared by the scraper, processor and writers.
+
+A result is parsed once into a slotted `Result` whose categorical strings
+(date, place, category, discipline, nation, rank status) are interned, so
+the thousands of rows from one World Cup venue share a single "Kitzbuehel"
+and a single "World Cup". The processor does not copy it into a new dict:
+`RecentResult` is a view (the Result plus its result_uid) that derives
+the dashboard fields (event, points) from the Result it wraps, and `Athlete` holds the
+processed athlete in slots instead of a 16-key dict.
+
+All three behave like read-only mappings (get, [], in, keys, items,
+dict(record)) so code written against the old dicts keeps working, and
+compare equal to the dict they stand for. They become dicts only at the
+JSON boundary:
+
+    json.dumps(athlete, default=json_default)
+"""
+import sys
+
+
+def intern_text(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record:
+    """Read-only mapping interface over __slots__; subclasses list their keys in `fields`."""
+
+    __slots__ = ()
+    fields = ()
+    _field_set = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.fields)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._field_set else default
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._field_set
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def keys(self):
+        return self.fields
+
+    def values(self):
+        return [getattr(self, f) for f in self.fields]
+
+    def items(self):
+        return [(f, getattr(self, f)) for f in self.fields]
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.fields}
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self.fields == other.fields and self.values() == other.values()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Result(Record):
+    """One row of a biography page, as the parsers produce it."""
+
+    fields = ("date", "place", "category", "discipline", "nation", "rank", "rank_status", "fis_points", "cup_points")
+    __slots__ = fields
+
+    def __init__(self, date=None, place=None, category=None, discipline=None, nation=None,
+                 rank=None, rank_status=None, fis_points=None, cup_points=None):
+        self.date = intern_text(date)
+        self.place = intern_text(place)
+        self.category = intern_text(category)
+        self.discipline = intern_text(discipline)
+        self.nation = intern_text(nation)
+        self.rank = rank
+        self.rank_status = intern_text(rank_status)
+        self.fis_points = fis_points
+        self.cup_points = cup_points
+
+    @classmethod
+    def coerce(cls, value):
+        """Result from a Result or from its dict form (scraper cache, older runs)."""
+        if isinstance(value, cls):
+            return value
+        return cls(**{f: value.get(f) for f in cls.fields})
+
+
+class RecentResult(Record):
+    """A Result as it appears in an athlete's recent_results (no copy of the row).
+
+    Two slots: the shared parsed Result and the result_uid from the identity
+    index. A view is 48 bytes (56 with its list entry); the uid string is
+    the identity index's own object, not a copy.
+    """
+
+    fields = ("result_uid", "date", "event", "rank", "rank_status", "points", "place", "category", "discipline", "cup_points")
+    __slots__ = ("result", "result_uid")
+
+    def __init__(self, result, result_uid=None):
+        self.result = result
+        self.result_uid = result_uid
+
+    date = property(lambda self: self.result.date)
+    rank = property(lambda self: self.result.rank)
+    rank_status = property(lambda self: self.result.rank_status)
+    place = property(lambda self: self.result.place)
+    category = property(lambda self: self.result.category)
+    discipline = property(lambda self: self.result.discipline)
+    cup_points = property(lambda self: self.result.cup_points)
+
+    @property
+    def event(self):
+        return self.result.discipline or self.result.category or "Result"
+
+    @property
+    def points(self):
+        points = self.result.fis_points
+        return points if points is not None else 0.0
+
+
+class Athlete(Record):
+    """A processed athlete (one entry of athletes.json)."""
+
+    fields = (
+        "id", "name_ko", "name_en", "birth_date", "birth_year", "age", "sport", "sport_display", "team",
+        "fis_code", "fis_url", "current_rank", "best_rank", "season_starts", "medals", "recent_results",
+    )
+    __slots__ = fields
+
+    def __init__(self, **values):
+        for field in self.fields:
+            setattr(self, field, values.pop(field, None))
+        if values:
+            raise TypeError(f"Unknown Athlete fields: {', '.join(sorted(values))}")
+
+    @classmethod
+    def from_mapping(cls, mapping, **overrides):
+        return cls(**{f: overrides.get(f, mapping.get(f)) for f in cls.fields})
+
+
+def json_default(obj):
+    """`default=` hook for json.dump(s): records serialize as the dicts they replace."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
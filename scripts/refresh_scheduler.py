@@ -0,0 +1,171 @@
+"""Activity-aware refresh scheduling for athlete profile pages.
+
+Each URL gets a next_due time instead of one global cache TTL. The
+interval grows with the age of the athlete's latest result, is stretched
+outside the competition season and is scaled by how often a fetch has
+actually found a changed page:
+
+    latest result age   <= 7d: 12h   <= 30d: 1d   <= 120d: 3d   <= 365d: 7d   older/none: 30d
+    off-season (May-Jul): x3
+    observed change rate (after 4+ checks): < 10% -> x2, > 50% -> x0.5
+
+A run calls plan() to pick the due subset (URLs without a usable cached
+page first, then the most overdue) within the fetch budget; the scraper
+asks is_due() from _cache_entry_valid() and reports each fetch through
+record_fetch(); finish() stores the new latest-result dates and
+next_due times.
+
+    scheduler = RefreshScheduler.load("scripts/data/cache/refresh_schedule.json")
+    scheduler.plan(urls, has_usable_cache, budget=200)
+    ...
+    scheduler.finish(tracker.latest_by_code)
+"""
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from fis_fixtures import competitor_id
+
+HOUR = 3600
+# (max age of the latest result in days, refresh interval in hours)
+ACTIVITY_TIERS = ((7, 12), (30, 24), (120, 72), (365, 168))
+INACTIVE_INTERVAL_HOURS = 720
+OFF_SEASON_MONTHS = (5, 6, 7)
+OFF_SEASON_FACTOR = 3.0
+MIN_CHECKS_FOR_RATE = 4
+MIN_INTERVAL_HOURS = 6
+MAX_INTERVAL_HOURS = 1440
+
+
+def _parse_time(text):
+    try:
+        return datetime.fromisoformat(text) if text else None
+    except ValueError:
+        return None
+
+
+class RefreshScheduler:
+    def __init__(self, path=None, state=None, now=None):
+        self.path = path
+        self.now = now or datetime.now()
+        self.entries = (state or {}).get("urls", {})
+        self.selected = set()
+        self.lock = threading.Lock()
+        self.report = {}
+
+    @classmethod
+    def load(cls, path, now=None):
+        state = None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                print(f"  [Schedule] unreadable {path}; every URL is due")
+        return cls(path, state, now=now)
+
+    def interval_hours(self, entry, today=None):
+        today = today or self.now.date()
+        latest = entry.get("latest_result")
+        hours = INACTIVE_INTERVAL_HOURS
+        if latest:
+            try:
+                age_days = (today - date.fromisoformat(latest)).days
+            except ValueError:
+                age_days = None
+            if age_days is not None:
+                for max_age, tier_hours in ACTIVITY_TIERS:
+                    if age_days <= max_age:
+                        hours = tier_hours
+                        break
+        if today.month in OFF_SEASON_MONTHS:
+            hours *= OFF_SEASON_FACTOR
+        checks = entry.get("checks", 0)
+        if checks >= MIN_CHECKS_FOR_RATE:
+            rate = entry.get("changes", 0) / checks
+            if rate < 0.1:
+                hours *= 2
+            elif rate > 0.5:
+                hours *= 0.5
+        return max(MIN_INTERVAL_HOURS, min(MAX_INTERVAL_HOURS, hours))
+
+    def overdue_ratio(self, url):
+        """How far past next_due a URL is, in units of its interval (unknown URLs: infinitely)."""
+        entry = self.entries.get(url)
+        next_due = _parse_time(entry.get("next_due")) if entry else None
+        if next_due is None:
+            return float("inf")
+        interval = entry.get("interval_hours") or self.interval_hours(entry)
+        return (self.now - next_due).total_seconds() / (interval * HOUR)
+
+    def plan(self, urls, has_usable_cache, budget=None):
+        """Select the URLs to fetch this run; returns the selection report.
+
+        has_usable_cache(url) -> bool. URLs without a usable cached page are
+        always fetched (even past the budget), or the athlete would be dropped.
+        """
+        must, due, not_due = [], [], 0
+        for url in urls:
+            if not has_usable_cache(url):
+                must.append(url)
+                continue
+            ratio = self.overdue_ratio(url)
+            if ratio >= 0:
+                due.append((ratio, url))
+            else:
+                not_due += 1
+        due.sort(key=lambda item: item[0], reverse=True)
+        room = len(due) if budget is None else max(0, budget - len(must))
+        chosen = [url for _, url in due[:room]]
+        self.selected = set(must) | set(chosen)
+        self.report = {
+            "urls": len(urls),
+            "budget": budget,
+            "must_fetch": len(must),
+            "due": len(due),
+            "selected": len(self.selected),
+            "deferred": len(due) - len(chosen),
+            "not_due": not_due,
+        }
+        return self.report
+
+    def is_due(self, url):
+        return url in self.selected
+
+    def record_fetch(self, url, changed):
+        """Called by the scraper after each network check of a URL."""
+        with self.lock:
+            entry = self.entries.setdefault(url, {})
+            entry["checks"] = entry.get("checks", 0) + 1
+            entry["last_checked"] = self.now.isoformat(timespec="seconds")
+            if changed:
+                entry["changes"] = entry.get("changes", 0) + 1
+                entry["last_changed"] = entry["last_checked"]
+            entry["_checked_this_run"] = True
+
+    def finish(self, latest_by_code=None):
+        """Fold in latest result dates (from FreshnessTracker) and reschedule the URLs checked this run."""
+        latest_by_code = latest_by_code or {}
+        next_due = []
+        with self.lock:
+            for url, entry in self.entries.items():
+                latest = latest_by_code.get(competitor_id(url))
+                if latest:
+                    entry["latest_result"] = latest
+                if entry.pop("_checked_this_run", False) or not entry.get("next_due"):
+                    hours = self.interval_hours(entry)
+                    entry["interval_hours"] = hours
+                    entry["next_due"] = (self.now + timedelta(hours=hours)).isoformat(timespec="seconds")
+                next_due.append(entry["next_due"])
+        self.report["next_due_min"] = min(next_due) if next_due else None
+        if self.path:
+            self.save()
+        return self.report
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": self.now.isoformat(), "urls": self.entries}, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,214 @@
+"""Stable result_uid for every result, shared by the processor, patchers and sync.
+
+A result is identified by its natural key: athlete, date, place,
+discipline and stage (category). Rank and points are not part of it, so
+a corrected score keeps its uid and syncs as an update instead of a new
+row plus a delete.
+
+    scripts/data/cache/result_identity.json
+    {"version": 2, "keys": {"<fis_code>|<date>|<place>|<discipline>|<category>":
+                            [{"uid": "<uid>", "rank": "<rank>|<rank_status>", "content": "<sha1>"}, ...]}}
+
+A key has one slot per distinct result sharing it (e.g. two runs of one
+discipline on the same day). Results are matched to slots by their
+content hash first, then by rank, and only what is still unmatched falls
+back to position, so a correction that reorders two runs does not swap
+their uids. "content" is only stored for keys with more than one result.
+A uid is minted once, from the result's content when it is first seen
+(the SHA-1 supabase_sync used to recompute on every run, so rows already
+in Supabase keep their uid), and never recomputed. Slots and keys an
+athlete no longer has are dropped, as are the keys of athletes missing
+from a run. If the index file is lost it is rebuilt from the result_uid
+fields of the previous athletes.json.
+"""
+import hashlib
+import json
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IDENTITY_PATH = os.path.join(SCRIPT_DIR, "data", "cache", "result_identity.json")
+
+
+def natural_key(fis_code, r):
+    return "|".join([
+        str(fis_code or ""),
+        str(r.get("date") or ""),
+        str(r.get("place") or ""),
+        str(r.get("discipline") or r.get("event") or ""),
+        str(r.get("category") or ""),
+    ])
+
+
+def content_uid(fis_code, r):
+    """SHA-1 over every field of a recent_results entry (the pre-index result_uid)."""
+    key = "|".join(
+        [
+            str(fis_code or ""),
+            str(r.get("date") or ""),
+            str(r.get("place") or ""),
+            str(r.get("category") or ""),
+            str(r.get("discipline") or r.get("event") or ""),
+            str(r.get("rank") if r.get("rank") is not None else ""),
+            str(r.get("rank_status") or ""),
+            str(r.get("points") if r.get("points") is not None else ""),
+            str(r.get("cup_points") if r.get("cup_points") is not None else ""),
+        ]
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def rank_fingerprint(r):
+    rank = r.get("rank")
+    return f"{rank if rank is not None else ''}|{r.get('rank_status') or ''}"
+
+
+def _match(slots, wanted):
+    """Slot index per wanted (content, rank) pair, or None when a new slot is needed."""
+    picks = [None] * len(wanted)
+    free = list(range(len(slots)))
+    for field, pos in (("content", 0), ("rank", 1)):
+        for w, fingerprint in enumerate(wanted):
+            if picks[w] is not None or fingerprint[pos] is None:
+                continue
+            for s in free:
+                if slots[s].get(field) == fingerprint[pos]:
+                    picks[w] = s
+                    free.remove(s)
+                    break
+    for w in range(len(wanted)):
+        if picks[w] is None and free:
+            picks[w] = free.pop(0)
+    return picks
+
+
+class ResultIdentityIndex:
+    def __init__(self, path=None, keys=None):
+        self.path = path
+        self.keys = keys or {}
+        self.dirty = False
+        self.stats = {"assigned": 0, "minted": 0, "pruned": 0}
+        # Athletes and keys assign() saw since the last reset, for prune()
+        self.assigned_codes = set()
+        self.assigned_keys = set()
+
+    @classmethod
+    def load(cls, path=None):
+        keys = None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                keys = data.get("keys")
+                if keys and data.get("version", 1) < 2:
+                    # Version 1 kept bare uid lists in output order
+                    keys = {key: [{"uid": uid} for uid in uids] for key, uids in keys.items()}
+            except (OSError, ValueError):
+                print(f"  [ResultIdentity] unreadable {path}; rebuilding")
+        return cls(path, keys)
+
+    def _reset_run(self):
+        self.stats = {"assigned": 0, "minted": 0, "pruned": 0}
+        self.assigned_codes = set()
+        self.assigned_keys = set()
+
+    def seed_from_output(self, athletes_path):
+        """Adopt the uids of a previous athletes.json (only when the index is empty)."""
+        if self.keys or not os.path.exists(athletes_path):
+            return 0
+        try:
+            with open(athletes_path, "r", encoding="utf-8") as f:
+                athletes = json.load(f).get("athletes", [])
+        except (OSError, ValueError):
+            return 0
+        for athlete in athletes:
+            results = [r for r in athlete.get("recent_results") or [] if r.get("result_uid")]
+            if results:
+                self.assign(athlete.get("fis_code"), results)
+        self._reset_run()
+        return len(self.keys)
+
+    def assign(self, fis_code, results):
+        """uids for one athlete's results, in order; mints and records unseen ones.
+
+        This is the athlete's full result list: slots and keys it no longer
+        has are dropped. Exact duplicates (same content) share a uid.
+        """
+        fis_code = str(fis_code or "").strip()
+        groups = {}
+        for i, r in enumerate(results):
+            groups.setdefault(natural_key(fis_code, r), []).append(i)
+        uids = [None] * len(results)
+        for key, indexes in groups.items():
+            old = self.keys.get(key, [])
+            self.assigned_keys.add(key)
+            if len(indexes) == 1 and len(old) == 1:
+                # The common case: one result, one slot
+                rank = rank_fingerprint(results[indexes[0]])
+                if old[0].get("rank") != rank or "content" in old[0]:
+                    self.keys[key] = [{"uid": old[0]["uid"], "rank": rank}]
+                    self.dirty = True
+                uids[indexes[0]] = old[0]["uid"]
+                continue
+            if len(indexes) == 1 and not old:
+                r = results[indexes[0]]
+                uid = r.get("result_uid") or content_uid(fis_code, r)
+                self.keys[key] = [{"uid": uid, "rank": rank_fingerprint(r)}]
+                self.dirty = True
+                self.stats["minted"] += 1
+                uids[indexes[0]] = uid
+                continue
+            shared = len(indexes) > 1 or len(old) > 1
+            # Distinct results under this key, in output order
+            distinct = {}
+            for i in indexes:
+                content = content_uid(fis_code, results[i]) if shared else None
+                distinct.setdefault(content, []).append(i)
+            wanted = [(content, rank_fingerprint(results[members[0]])) for content, members in distinct.items()]
+            slots = []
+            for (content, rank), members, pick in zip(wanted, distinct.values(), _match(old, wanted)):
+                if pick is None:
+                    uid = results[members[0]].get("result_uid") or content or content_uid(fis_code, results[members[0]])
+                    self.stats["minted"] += 1
+                else:
+                    uid = old[pick]["uid"]
+                slot = {"uid": uid, "rank": rank}
+                if content is not None:
+                    slot["content"] = content
+                slots.append(slot)
+                for i in members:
+                    uids[i] = uid
+            if slots != old:
+                self.keys[key] = slots
+                self.dirty = True
+        self.assigned_codes.add(fis_code)
+        self.stats["assigned"] += len(results)
+        return uids
+
+    def prune(self, active_codes):
+        """Drop keys of athletes missing from `active_codes` and keys assign() no longer saw.
+
+        Athletes in the run that were not assigned (reused by incremental
+        processing) keep all their keys. Returns the number of keys dropped.
+        """
+        active = {str(code or "").strip() for code in active_codes}
+        stale = []
+        for key in self.keys:
+            code = key.split("|", 1)[0]
+            if code not in active or (code in self.assigned_codes and key not in self.assigned_keys):
+                stale.append(key)
+        for key in stale:
+            del self.keys[key]
+        if stale:
+            self.dirty = True
+        self.stats["pruned"] += len(stale)
+        return len(stale)
+
+    def save(self):
+        if not (self.path and self.dirty):
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 2, "keys": self.keys}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Thin read API over the Supabase tables (RPCs in supabase_schema.sql).
+
+Results are served in keyset-paginated pages, newest first, per athlete
+or per sport, plus a delta feed of results upserted or deleted since a
+given sync run:
+
+    api = ResultsAPI(RestBackend(os.environ["SUPABASE_URL"], os.environ["SUPABASE_ANON_KEY"]))
+    rows, cursor = api.athlete_results("9531003", limit=50)
+    rows, cursor = api.athlete_results("9531003", limit=50, cursor=cursor)
+    latest = api.latest_sync()
+    changes = list(api.iter_changes_since(last_seen_run_id))
+
+Cursors are opaque strings ("<date or timestamp>|<result_uid>"); None means
+there is no next page. PostgresBackend talks to a plain Postgres with the
+schema applied (psycopg is optional), so the same calls can be run
+against a local database:
+
+    python3 scripts/results_api.py --dsn postgresql://localhost/team_korea athlete 9531003 --limit 20
+    python3 scripts/results_api.py changes --since 20260301T030000Z --all
+"""
+import argparse
+import json
+import os
+import sys
+
+from supabase_sync import request_headers, send_with_retries
+
+try:
+    import psycopg
+except ImportError:  # optional: only PostgresBackend needs it
+    psycopg = None
+
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key, result_uid):
+    return f"{key}|{result_uid}"
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None, None
+    key, sep, result_uid = cursor.rpartition("|")
+    if not sep or not key:
+        raise ValueError(f"Malformed cursor: {cursor!r}")
+    return key, result_uid
+
+
+class RestBackend:
+    """Calls the RPCs through PostgREST (POST /rest/v1/rpc/<name>)."""
+
+    def __init__(self, base_url, api_key, max_retries=3):
+        self.base_url = base_url.rstrip("/")
+        self.headers = request_headers(api_key)
+        self.max_retries = max_retries
+
+    def call(self, name, params):
+        url = f"{self.base_url}/rest/v1/rpc/{name}"
+        r = send_with_retries("POST", url, self.headers, data=json.dumps(params), max_retries=self.max_retries)
+        if r.status_code >= 300:
+            raise RuntimeError(f"RPC {name} failed {r.status_code}: {r.text[:500]}")
+        return r.json()
+
+
+class PostgresBackend:
+    """Calls the same functions over a direct connection (local Postgres, CI)."""
+
+    def __init__(self, dsn):
+        if psycopg is None:
+            raise RuntimeError("PostgresBackend needs psycopg (pip install 'psycopg[binary]')")
+        self.conn = psycopg.connect(dsn, autocommit=True)
+
+    def call(self, name, params):
+        args = ", ".join(f"{key} => %({key})s" for key in params)
+        # to_jsonb gives the same value shapes PostgREST returns (ISO dates, plain numbers)
+        with self.conn.cursor() as cur:
+            cur.execute(f"select to_jsonb(t) from public.{name}({args}) t", params)
+            return [row[0] for row in cur.fetchall()]
+
+    def close(self):
+        self.conn.close()
+
+
+class ResultsAPI:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _page(self, name, params, limit, key_col):
+        limit = max(1, min(MAX_PAGE_SIZE, int(limit)))
+        rows = self.backend.call(name, {**params, "p_limit": limit})
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor(last[key_col], last["result_uid"])
+        return rows, next_cursor
+
+    def athlete_results(self, fis_code, limit=50, cursor=None):
+        after_date, after_uid = decode_cursor(cursor)
+        params = {"p_fis_code": fis_code, "p_after_date": after_date, "p_after_uid": after_uid}
+        return self._page("api_athlete_results", params, limit, "event_date")
+
+    def sport_results(self, sport, limit=50, cursor=None):
+        after_date, after_uid = decode_cursor(cursor)
+        params = {"p_sport": sport, "p_after_date": after_date, "p_after_uid": after_uid}
+        return self._page("api_sport_results", params, limit, "event_date")
+
+    def changes_since(self, sync_run_id, limit=500, cursor=None):
+        """Rows are {"op": "upsert"|"delete", "result_uid", "fis_code", "changed_at", "result"}."""
+        after_changed_at, after_uid = decode_cursor(cursor)
+        params = {
+            "p_since_sync_run_id": sync_run_id,
+            "p_after_changed_at": after_changed_at,
+            "p_after_uid": after_uid,
+        }
+        return self._page("api_result_changes", params, limit, "changed_at")
+
+    def latest_sync(self):
+        rows = self.backend.call("api_latest_sync", {})
+        return rows[0] if rows else None
+
+    @staticmethod
+    def iter_pages(fetch, *args, limit=MAX_PAGE_SIZE):
+        cursor = None
+        while True:
+            rows, cursor = fetch(*args, limit=limit, cursor=cursor)
+            yield from rows
+            if cursor is None:
+                return
+
+    def iter_athlete_results(self, fis_code, limit=MAX_PAGE_SIZE):
+        return self.iter_pages(self.athlete_results, fis_code, limit=limit)
+
+    def iter_sport_results(self, sport, limit=MAX_PAGE_SIZE):
+        return self.iter_pages(self.sport_results, sport, limit=limit)
+
+    def iter_changes_since(self, sync_run_id, limit=MAX_PAGE_SIZE):
+        return self.iter_pages(self.changes_since, sync_run_id, limit=limit)
+
+
+def backend_from_env(dsn=""):
+    if dsn:
+        return PostgresBackend(dsn)
+    base_url = os.getenv("SUPABASE_URL", "").strip()
+    api_key = (os.getenv("SUPABASE_ANON_KEY") or os.getenv("SUPABASE_SERVICE_ROLE_KEY") or "").strip()
+    if not base_url or not api_key:
+        raise RuntimeError("Set --dsn, or SUPABASE_URL and SUPABASE_ANON_KEY (or SUPABASE_SERVICE_ROLE_KEY)")
+    return RestBackend(base_url, api_key)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Query paginated results and the delta feed")
+    p.add_argument("--dsn", default=os.getenv("DATABASE_URL", ""), help="Postgres DSN (default: PostgREST via SUPABASE_URL)")
+    sub = p.add_subparsers(dest="command", required=True)
+    for name, target in (("athlete", "fis_code"), ("sport", "sport")):
+        sp = sub.add_parser(name, help=f"results for one {target}, newest first")
+        sp.add_argument(target)
+        sp.add_argument("--limit", type=int, default=50)
+        sp.add_argument("--cursor", default=None, help="next_cursor from the previous page")
+        sp.add_argument("--all", action="store_true", help="follow cursors to the last page")
+    cp = sub.add_parser("changes", help="results upserted/deleted since a sync run")
+    cp.add_argument("--since", required=True, help="sync_run_id the client last loaded")
+    cp.add_argument("--limit", type=int, default=500)
+    cp.add_argument("--cursor", default=None)
+    cp.add_argument("--all", action="store_true")
+    sub.add_parser("latest", help="latest successful sync run")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    api = ResultsAPI(backend_from_env(args.dsn))
+    if args.command == "latest":
+        out = api.latest_sync()
+    else:
+        fetch, key = {
+            "athlete": (api.athlete_results, getattr(args, "fis_code", None)),
+            "sport": (api.sport_results, getattr(args, "sport", None)),
+            "changes": (api.changes_since, getattr(args, "since", None)),
+        }[args.command]
+        if args.all:
+            rows = list(api.iter_pages(fetch, key, limit=args.limit))
+            out = {"rows": rows, "next_cursor": None}
+        else:
+            rows, next_cursor = fetch(key, limit=args.limit, cursor=args.cursor)
+            out = {"rows": rows, "next_cursor": next_cursor}
+    json.dump(out, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
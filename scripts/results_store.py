@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""Columnar store of every result, partitioned by season and sport.
+
+Layout (one directory per partition):
+
+    results_store/season=2026/sport=freestyle_park/
+        _partition.json      row count + string dictionaries (the commit point)
+        date.i4 rank.i4 ... points.f8 row_key.i8 row_hash.i8   little-endian column files
+
+Strings (fis_code, event, place, category, discipline, rank_status) are
+dictionary-encoded per partition. Appends extend the column files first and
+rewrite _partition.json last, so readers only ever see committed rows and an
+interrupted append is truncated away by the next one.
+
+Rows are keyed by result_uid (see result_identity.py) and carry a hash of
+their content. Re-appending an unchanged result adds nothing; when FIS
+corrects a rank or points value the corrected row is appended and the old
+one is tombstoned (its index goes to "superseded" in _partition.json, in
+the same commit), so queries only ever see the current version.
+
+NumPy is optional: with it columns are loaded with np.fromfile and filters
+run as vectorized masks; without it the same files are read with array.array.
+
+The store is derived data and lives in the cache directory, not in git:
+every athletes.json it was built from is in the repository history, so a
+lost store is rebuilt by appending those again.
+
+    python3 scripts/results_store.py append --data scripts/data/athletes.json
+    python3 scripts/results_store.py query --season 2026 --sport freestyle_park --category "World Cup"
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from array import array
+from datetime import date, datetime
+
+from result_identity import content_uid
+
+try:
+    import numpy as np
+except ImportError:  # optional: only used to vectorize reads/filters
+    np = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(SCRIPT_DIR, "data", "cache", "results_store")
+META_FILE = "_partition.json"
+STORE_FORMAT = 2
+EPOCH = date(1970, 1, 1)
+INT_NULL = -(2 ** 31)
+
+# column -> (array typecode, numpy dtype, file suffix)
+NUMERIC_COLUMNS = {
+    "date": ("i", "<i4", "i4"),
+    "rank": ("i", "<i4", "i4"),
+    "points": ("d", "<f8", "f8"),
+    "cup_points": ("d", "<f8", "f8"),
+    "row_key": ("q", "<i8", "i8"),
+    "row_hash": ("q", "<i8", "i8"),
+}
+DICT_COLUMNS = ("fis_code", "event", "place", "category", "discipline", "rank_status")
+COLUMNS = tuple(NUMERIC_COLUMNS) + DICT_COLUMNS
+RESULT_FIELDS = ("date", "event", "rank", "rank_status", "points", "place", "category", "discipline", "cup_points")
+
+assert array("i").itemsize == 4 and array("q").itemsize == 8 and array("d").itemsize == 8
+
+
+def season_of(date_str):
+    """FIS seasons run July-June and are named by the year they end in (2025-11 -> 2026)."""
+    d = datetime.strptime(date_str, "%Y-%m-%d").date()
+    return d.year + 1 if d.month >= 7 else d.year
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little", signed=True)
+
+
+def row_key(fis_code, result):
+    """Identity of a result: its result_uid (the legacy content uid for files written before the index)."""
+    return _hash64(result.get("result_uid") or content_uid(fis_code, result))
+
+
+def row_hash(result):
+    """Content of a result; a changed hash under the same row_key is a correction."""
+    return _hash64(json.dumps([result.get(f) for f in RESULT_FIELDS], ensure_ascii=False, default=str))
+
+
+def _column_path(part_dir, name):
+    suffix = NUMERIC_COLUMNS[name][2] if name in NUMERIC_COLUMNS else "i4"
+    return os.path.join(part_dir, f"{name}.{suffix}")
+
+
+def _typecode(name):
+    return NUMERIC_COLUMNS[name][0] if name in NUMERIC_COLUMNS else "i"
+
+
+def _dtype(name):
+    return NUMERIC_COLUMNS[name][1] if name in NUMERIC_COLUMNS else "<i4"
+
+
+def _read_column(part_dir, name, rows):
+    path = _column_path(part_dir, name)
+    if np is not None:
+        return np.fromfile(path, dtype=_dtype(name), count=rows)
+    values = array(_typecode(name))
+    with open(path, "rb") as f:
+        values.fromfile(f, rows)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _load_meta(part_dir):
+    path = os.path.join(part_dir, META_FILE)
+    if not os.path.exists(path):
+        return {"format": STORE_FORMAT, "rows": 0, "dictionaries": {name: [] for name in DICT_COLUMNS}, "superseded": []}
+    with open(path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != STORE_FORMAT:
+        raise ValueError(f"{part_dir} was written by an older results store (content-keyed rows); delete it and re-append")
+    return meta
+
+
+def _int_or_null(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return INT_NULL
+
+
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class _PartitionWriter:
+    """Buffers new rows for one partition; commit() appends them."""
+
+    def __init__(self, part_dir):
+        self.part_dir = part_dir
+        self.meta = _load_meta(part_dir)
+        self.codes = {name: {v: i for i, v in enumerate(values)} for name, values in self.meta["dictionaries"].items()}
+        rows = self.meta["rows"]
+        superseded = set(self.meta["superseded"])
+        # row_key -> (row index, row_hash) of the live version of each result
+        self.keys = {}
+        if rows:
+            keys, hashes = _read_column(part_dir, "row_key", rows).tolist(), _read_column(part_dir, "row_hash", rows).tolist()
+            for i, (key, content) in enumerate(zip(keys, hashes)):
+                if i not in superseded:
+                    self.keys[key] = (i, content)
+        self.columns = {name: array(_typecode(name)) for name in COLUMNS}
+
+    def _encode(self, name, value):
+        value = "" if value is None else str(value)
+        codes = self.codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.meta["dictionaries"][name].append(value)
+        return code
+
+    def add(self, fis_code, result, key, content):
+        """Buffer one result: "added", "replaced" (a correction; the old row is tombstoned) or None (unchanged)."""
+        live = self.keys.get(key)
+        if live and live[1] == content:
+            return None
+        cols = self.columns
+        self.keys[key] = (self.meta["rows"] + len(cols["row_key"]), content)
+        if live:
+            self.meta["superseded"].append(live[0])
+        d = datetime.strptime(result["date"], "%Y-%m-%d").date()
+        cols["date"].append((d - EPOCH).days)
+        cols["rank"].append(_int_or_null(result.get("rank")))
+        cols["points"].append(_float_or_nan(result.get("points")))
+        cols["cup_points"].append(_float_or_nan(result.get("cup_points")))
+        cols["row_key"].append(key)
+        cols["row_hash"].append(content)
+        cols["fis_code"].append(self._encode("fis_code", fis_code))
+        for name in DICT_COLUMNS[1:]:
+            cols[name].append(self._encode(name, result.get(name)))
+        return "replaced" if live else "added"
+
+    def commit(self):
+        added = len(self.columns["row_key"])
+        if not added:
+            return 0
+        os.makedirs(self.part_dir, exist_ok=True)
+        committed = self.meta["rows"]
+        for name, values in self.columns.items():
+            itemsize = values.itemsize
+            if sys.byteorder != "little":
+                values.byteswap()
+            path = _column_path(self.part_dir, name)
+            with open(path, "ab") as f:
+                # Drop anything past the committed rows (left by an interrupted append)
+                f.truncate(committed * itemsize)
+                values.tofile(f)
+        self.meta["rows"] = committed + added
+        self.meta["superseded"].sort()
+        tmp_path = os.path.join(self.part_dir, META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.part_dir, META_FILE))
+        return added
+
+
+class StoreWriter:
+    """Feeds athletes into per-partition writers; use add() per athlete then commit()."""
+
+    def __init__(self, root):
+        self.root = root
+        self.partitions = {}
+        self.stats = {"seen": 0, "added": 0, "replaced": 0, "unchanged": 0, "undated": 0}
+
+    def add(self, athlete):
+        fis_code = str(athlete.get("fis_code") or "")
+        sport = athlete.get("sport") or "unknown"
+        for result in athlete.get("recent_results") or []:
+            self.stats["seen"] += 1
+            try:
+                season = season_of(result.get("date") or "")
+            except ValueError:
+                self.stats["undated"] += 1
+                continue
+            part_dir = os.path.join(self.root, f"season={season}", f"sport={sport}")
+            writer = self.partitions.get(part_dir)
+            if writer is None:
+                writer = self.partitions[part_dir] = _PartitionWriter(part_dir)
+            outcome = writer.add(fis_code, result, row_key(fis_code, result), row_hash(result))
+            if outcome == "replaced":
+                self.stats["replaced"] += 1
+            elif outcome is None:
+                self.stats["unchanged"] += 1
+
+    def commit(self):
+        """Commit every partition; "added" counts new results, "replaced" the corrections among the appended rows."""
+        appended = sum(writer.commit() for writer in self.partitions.values())
+        self.stats["added"] = appended - self.stats["replaced"]
+        self.stats["partitions_touched"] = len(self.partitions)
+        return self.stats
+
+
+class Partition:
+    """Committed rows of one season/sport partition, loaded column by column."""
+
+    def __init__(self, root, season, sport):
+        self.season = season
+        self.sport = sport
+        self.part_dir = os.path.join(root, f"season={season}", f"sport={sport}")
+        meta = _load_meta(self.part_dir)
+        self.rows = meta["rows"]
+        self.dictionaries = meta["dictionaries"]
+        self.superseded = meta["superseded"]
+        self._columns = {}
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = _read_column(self.part_dir, name, self.rows)
+        return self._columns[name]
+
+    def _code(self, name, value):
+        try:
+            return self.dictionaries[name].index(str(value))
+        except ValueError:
+            return None
+
+    def select(self, date_from=None, date_to=None, **equals):
+        """Indexes of live (not superseded) rows matching every filter; equals keys are dictionary columns."""
+        bounds = []
+        if date_from:
+            bounds.append((">=", (datetime.strptime(date_from, "%Y-%m-%d").date() - EPOCH).days))
+        if date_to:
+            bounds.append(("<=", (datetime.strptime(date_to, "%Y-%m-%d").date() - EPOCH).days))
+        codes = {}
+        for name, value in equals.items():
+            if value is None:
+                continue
+            code = self._code(name, value)
+            if code is None:
+                return []
+            codes[name] = code
+
+        if np is not None:
+            mask = np.ones(self.rows, dtype=bool)
+            mask[self.superseded] = False
+            for name, code in codes.items():
+                mask &= self.column(name) == code
+            dates = self.column("date")
+            for op, day in bounds:
+                mask &= (dates >= day) if op == ">=" else (dates <= day)
+            return np.flatnonzero(mask).tolist()
+
+        superseded = set(self.superseded)
+        selected = [i for i in range(self.rows) if i not in superseded]
+        for name, code in codes.items():
+            col = self.column(name)
+            selected = [i for i in selected if col[i] == code]
+        dates = self.column("date")
+        for op, day in bounds:
+            selected = [i for i in selected if (dates[i] >= day if op == ">=" else dates[i] <= day)]
+        return list(selected)
+
+    def records(self, indexes):
+        out = []
+        for i in indexes:
+            day = int(self.column("date")[i])
+            rank = int(self.column("rank")[i])
+            points = float(self.column("points")[i])
+            cup_points = float(self.column("cup_points")[i])
+            row = {
+                "season": self.season,
+                "sport": self.sport,
+                "date": date.fromordinal(EPOCH.toordinal() + day).isoformat(),
+                "rank": None if rank == INT_NULL else rank,
+                "points": None if points != points else points,
+                "cup_points": None if cup_points != cup_points else cup_points,
+            }
+            for name in DICT_COLUMNS:
+                value = self.dictionaries[name][int(self.column(name)[i])]
+                row[name] = value if value or name == "fis_code" else None
+            out.append(row)
+        return out
+
+
+class ResultsStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def writer(self):
+        return StoreWriter(self.root)
+
+    def append(self, athletes):
+        writer = self.writer()
+        for athlete in athletes:
+            writer.add(athlete)
+        return writer.commit()
+
+    def partitions(self, season=None, sport=None):
+        """(season, sport) pairs on disk, optionally narrowed; only matching directories are listed."""
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for season_dir in sorted(os.listdir(self.root)):
+            if not season_dir.startswith("season="):
+                continue
+            season_value = int(season_dir.split("=", 1)[1])
+            if season is not None and season_value != int(season):
+                continue
+            for sport_dir in sorted(os.listdir(os.path.join(self.root, season_dir))):
+                sport_value = sport_dir.split("=", 1)[1]
+                if sport is not None and sport_value != sport:
+                    continue
+                out.append((season_value, sport_value))
+        return out
+
+    def partition(self, season, sport):
+        return Partition(self.root, season, sport)
+
+    def query(self, season=None, sport=None, date_from=None, date_to=None, **equals):
+        """Results as dicts (recent_results fields plus fis_code/season/sport), ordered by partition then append order."""
+        out = []
+        for season_value, sport_value in self.partitions(season, sport):
+            part = self.partition(season_value, sport_value)
+            out.extend(part.records(part.select(date_from=date_from, date_to=date_to, **equals)))
+        return out
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Columnar results store")
+    p.add_argument("--root", default=DEFAULT_ROOT)
+    sub = p.add_subparsers(dest="command", required=True)
+    a = sub.add_parser("append", help="append results from an athletes.json")
+    a.add_argument("--data", default=os.path.join(SCRIPT_DIR, "data", "athletes.json"))
+    q = sub.add_parser("query", help="filter results and print them as JSON lines")
+    q.add_argument("--season", type=int, default=None)
+    q.add_argument("--sport", default=None)
+    q.add_argument("--date-from", default=None)
+    q.add_argument("--date-to", default=None)
+    for name in DICT_COLUMNS:
+        q.add_argument(f"--{name.replace('_', '-')}", dest=name, default=None)
+    q.add_argument("--count", action="store_true", help="print only the number of matches")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = ResultsStore(args.root)
+    if args.command == "append":
+        with open(args.data, "r", encoding="utf-8") as f:
+            athletes = json.load(f).get("athletes", [])
+        stats = store.append(athletes)
+        print(f"🗄️ Results store: {stats}")
+        return
+    rows = store.query(
+        season=args.season,
+        sport=args.sport,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        **{name: getattr(args, name) for name in DICT_COLUMNS},
+    )
+    if args.count:
+        print(len(rows))
+        return
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
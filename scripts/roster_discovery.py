@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Roster discovery: build athlete_urls.txt from FIS biography list pages.
+
+For every (nation, sector) pair the FIS athlete search is paged through
+and each competitor becomes a roster entry keyed by competitorid. The
+roster (scripts/data/raw/roster.json) is carried forward between runs:
+athletes that drop out of a listing are kept and marked missing_since,
+and the URLs already in athlete_urls.txt the first time are pinned so
+the hand-curated team always stays in the list.
+
+The URL list is written in refresh priority order: pinned athletes first
+(in their original order), then athletes never scraped, then everyone
+else by most recent result date. --inactive-days and --max-urls trim the
+tail, so the scraper only spends requests on profiles likely to change.
+
+    python3 scripts/roster_discovery.py --nations KOR --sectors AL,CC,FS,JP,SB
+    python3 scripts/roster_discovery.py --nations KOR,JPN --sectors SB --inactive-days 730 --max-urls 2000
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from fis_fixtures import URL_FILE, USER_AGENT, competitor_id, read_urls
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROSTER_PATH = os.path.join(SCRIPT_DIR, "data", "raw", "roster.json")
+ATHLETES_JSON = os.path.join(SCRIPT_DIR, "data", "athletes.json")
+FIS_BASE_URL = "https://www.fis-ski.com"
+LIST_PATH = "/DB/general/biographies.html"
+BIOGRAPHY_PATH = "/DB/general/athlete-biography.html"
+SECTORS = ("AL", "CC", "FS", "JP", "SB")
+PAGE_SIZE = 1000
+
+
+def list_url(nation, sector, offset=0, limit=PAGE_SIZE, base_url=FIS_BASE_URL):
+    query = urlencode({
+        "lastname": "", "firstname": "", "sectorcode": sector, "gendercode": "", "birthyear": "",
+        "skiclub": "", "skis": "", "nationcode": nation, "fiscode": "", "status": "",
+        "search": "true", "limit": limit, "offset": offset,
+    })
+    return f"{base_url}{LIST_PATH}?{query}"
+
+
+def biography_url(competitorid, sector, base_url=FIS_BASE_URL):
+    return f"{base_url}{BIOGRAPHY_PATH}?sectorcode={sector}&competitorid={competitorid}&type=result"
+
+
+def parse_list_page(content):
+    """Returns one entry per competitor row of a biographies list page."""
+    soup = BeautifulSoup(content, "html.parser")
+    entries = []
+    for row in soup.select("a.table-row[href*='competitorid=']"):
+        query = parse_qs(urlparse(row["href"]).query)
+        cid = (query.get("competitorid") or [""])[0]
+        if not cid.isdigit():
+            continue
+        entry = {
+            "competitorid": cid,
+            "sector": (query.get("sectorcode") or [""])[0],
+            "name": None,
+            "nation": None,
+            "fiscode": None,
+            "birth_year": None,
+            "gender": None,
+        }
+        name = row.select_one(".bold")
+        if name:
+            entry["name"] = name.get_text(" ", strip=True)
+        nation = row.select_one(".country__name-short")
+        if nation:
+            entry["nation"] = nation.get_text(strip=True)
+        # The remaining columns are unlabeled; recognise them by shape
+        for cell in row.find_all("div"):
+            if cell.find("div"):
+                continue
+            text = cell.get_text(strip=True)
+            if len(text) == 7 and text.isdigit():
+                entry["fiscode"] = text
+            elif len(text) == 4 and text.isdigit() and text[:2] in ("19", "20"):
+                entry["birth_year"] = int(text)
+            elif text in ("M", "F"):
+                entry["gender"] = text
+        entries.append(entry)
+    return entries
+
+
+class RosterDiscovery:
+    def __init__(self, base_url=FIS_BASE_URL, request_timeout=10, max_retries=2, request_interval_sec=0.5, page_size=PAGE_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.request_interval_sec = request_interval_sec
+        self.page_size = page_size
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.stats = {"pages": 0, "rows": 0, "failed_listings": 0}
+
+    def _get(self, url):
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                response = self.session.get(url, timeout=self.request_timeout)
+                if response.status_code == 200:
+                    return response
+                print(f"  [Retry {attempt}] Status {response.status_code}")
+            except requests.RequestException as e:
+                print(f"  [Retry {attempt}] {e}")
+            if attempt <= self.max_retries:
+                time.sleep(min(2.0, 0.5 * attempt))
+        return None
+
+    def list_competitors(self, nation, sector):
+        """All rows of one listing, or None if a page could not be fetched."""
+        rows, offset = [], 0
+        while True:
+            response = self._get(list_url(nation, sector, offset, self.page_size, self.base_url))
+            if response is None:
+                self.stats["failed_listings"] += 1
+                return None
+            page = parse_list_page(response.content)
+            self.stats["pages"] += 1
+            self.stats["rows"] += len(page)
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            offset += self.page_size
+            time.sleep(self.request_interval_sec)
+
+    def discover(self, nations, sectors):
+        """Returns ({competitorid: entry}, [(nation, sector) listings that failed])."""
+        found, failed = {}, []
+        for nation in nations:
+            for sector in sectors:
+                rows = self.list_competitors(nation, sector)
+                if rows is None:
+                    print(f"  [Fail] listing {nation}/{sector}")
+                    failed.append((nation, sector))
+                    continue
+                print(f"  [Listing] {nation}/{sector}: {len(rows)} competitors")
+                for entry in rows:
+                    entry["sector"] = entry["sector"] or sector
+                    entry["nation"] = entry["nation"] or nation
+                    # Duplicate rows (same id on several pages) keep the first occurrence
+                    found.setdefault(entry["competitorid"], entry)
+        return found, failed
+
+
+def load_roster(path=ROSTER_PATH):
+    if not os.path.exists(path):
+        return {"metadata": {}, "athletes": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_roster(roster, path=ROSTER_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(roster, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def merge_roster(roster, discovered, failed_listings=(), pinned_urls=(), today=None, base_url=FIS_BASE_URL):
+    """Fold one discovery pass into the roster; returns a counts dict.
+
+    Known athletes are never dropped. Those absent from a listing that was
+    fetched successfully get missing_since; a failed listing changes nothing.
+    """
+    today = (today or date.today()).isoformat()
+    athletes = roster.setdefault("athletes", {})
+    counts = {"new": 0, "seen": 0, "missing": 0, "pinned": 0}
+
+    for position, url in enumerate(pinned_urls):
+        cid = competitor_id(url)
+        if not cid:
+            continue
+        entry = athletes.setdefault(cid, {"competitorid": cid, "first_seen": today, "source": "url_file"})
+        if not entry.get("pinned"):
+            counts["pinned"] += 1
+        entry.update(pinned=True, pin_order=position, url=url)
+        entry.setdefault("sector", (parse_qs(urlparse(url).query).get("sectorcode") or [""])[0])
+
+    for cid, found in discovered.items():
+        entry = athletes.get(cid)
+        if entry is None:
+            entry = athletes[cid] = {"competitorid": cid, "first_seen": today, "source": "discovery"}
+            counts["new"] += 1
+        else:
+            counts["seen"] += 1
+        entry.update({k: v for k, v in found.items() if v is not None})
+        entry.setdefault("url", biography_url(cid, found["sector"], base_url))
+        entry["last_seen"] = today
+        entry.pop("missing_since", None)
+
+    failed = set(failed_listings)
+    for cid, entry in athletes.items():
+        if cid in discovered or entry.get("source") != "discovery":
+            continue
+        if (entry.get("nation"), entry.get("sector")) in failed:
+            continue
+        if not entry.get("missing_since"):
+            entry["missing_since"] = today
+            counts["missing"] += 1
+    roster["metadata"] = {"updated_at": datetime.now().isoformat(), "athletes": len(athletes), **counts}
+    return counts
+
+
+def activity_from_athletes(path=ATHLETES_JSON):
+    """{competitorid: latest result date} from the last pipeline output."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        athletes = json.load(f).get("athletes", [])
+    activity = {}
+    for athlete in athletes:
+        dates = [r.get("date") for r in athlete.get("recent_results") or [] if r.get("date")]
+        activity[str(athlete.get("fis_code"))] = max(dates) if dates else ""
+    return activity
+
+
+def prioritized_urls(roster, activity, today=None, inactive_days=None, max_urls=None):
+    """Pinned first, then never-scraped, then by latest result date (newest first)."""
+    today = today or date.today()
+    cutoff = (today - timedelta(days=inactive_days)).isoformat() if inactive_days else None
+    pinned, unseen, active = [], [], []
+    for cid, entry in roster.get("athletes", {}).items():
+        if entry.get("pinned"):
+            pinned.append((entry.get("pin_order", 0), entry["url"]))
+        elif cid not in activity:
+            unseen.append((entry.get("first_seen") or "", cid, entry["url"]))
+        elif cutoff is None or (activity[cid] and activity[cid] >= cutoff):
+            active.append((activity[cid], cid, entry["url"]))
+    unseen.sort()
+    active.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    urls = [url for _, url in sorted(pinned)]
+    rest = [item[-1] for item in unseen] + [item[-1] for item in active]
+    if max_urls is not None:
+        rest = rest[:max(0, max_urls - len(urls))]
+    return urls + rest
+
+
+def write_urls(urls, path=URL_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("".join(url + "\n" for url in urls))
+    os.replace(tmp_path, path)
+    return path
+
+
+def run_discovery(nations, sectors, url_file=URL_FILE, roster_path=ROSTER_PATH, athletes_path=ATHLETES_JSON,
+                  base_url=FIS_BASE_URL, inactive_days=None, max_urls=None, **discovery_opts):
+    """One discovery stage: fetch listings, update the roster, rewrite the URL file. Returns a report."""
+    roster = load_roster(roster_path)
+    # The first run pins whatever the hand-maintained URL file already lists
+    pinned_urls = read_urls(url_file) if not roster.get("athletes") and os.path.exists(url_file) else ()
+    discovery = RosterDiscovery(base_url=base_url, **discovery_opts)
+    discovered, failed = discovery.discover(nations, sectors)
+    counts = merge_roster(roster, discovered, failed, pinned_urls, base_url=base_url)
+    urls = prioritized_urls(roster, activity_from_athletes(athletes_path), inactive_days=inactive_days, max_urls=max_urls)
+    save_roster(roster, roster_path)
+    write_urls(urls, url_file)
+    return {
+        "nations": list(nations),
+        "sectors": list(sectors),
+        "discovered": len(discovered),
+        "failed_listings": ["/".join(pair) for pair in failed],
+        "roster_size": len(roster["athletes"]),
+        "urls": len(urls),
+        "http": discovery.stats,
+        **counts,
+    }
+
+
+def split_codes(text):
+    return [code.strip().upper() for code in (text or "").split(",") if code.strip()]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Discover athletes from FIS list pages and rewrite athlete_urls.txt")
+    p.add_argument("--nations", required=True, help="comma-separated FIS nation codes (e.g. KOR,JPN)")
+    p.add_argument("--sectors", default=",".join(SECTORS), help="comma-separated sector codes")
+    p.add_argument("--base-url", default=FIS_BASE_URL, help="FIS host (a local fis_stub_server.py for tests)")
+    p.add_argument("--url-file", default=URL_FILE)
+    p.add_argument("--roster", default=ROSTER_PATH)
+    p.add_argument("--athletes", default=ATHLETES_JSON, help="last pipeline output, used for activity ordering")
+    p.add_argument("--inactive-days", type=int, default=None, help="leave out athletes with no result in this many days")
+    p.add_argument("--max-urls", type=int, default=None, help="cap on URLs written (pinned athletes always kept)")
+    p.add_argument("--request-timeout", type=int, default=10)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"🧭 Roster discovery: nations={args.nations} sectors={args.sectors}")
+    report = run_discovery(
+        split_codes(args.nations),
+        split_codes(args.sectors),
+        url_file=args.url_file,
+        roster_path=args.roster,
+        athletes_path=args.athletes,
+        base_url=args.base_url,
+        inactive_days=args.inactive_days,
+        max_urls=args.max_urls,
+        request_timeout=args.request_timeout,
+    )
+    print(f"📋 Roster: {report['roster_size']} athletes ({report['new']} new, {report['missing']} missing), {report['urls']} URLs written")
+    print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from records import json_default
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNS_DIR = os.path.join(SCRIPT_DIR, "data", "cache", "runs")
+STAGES = ("scrape", "process", "save", "health")
+KEEP_RUNS = 5
+
+
+class RunJournal:
+    """Append-only record of one pipeline run, used to resume it after a crash.
+
+    journal.jsonl gets one line per finished URL and per finished stage.
+    Lines are flushed and fsynced as they are written, so a killed run
+    loses at most the line being written; a torn last line is ignored on load.
+    A completed run keeps only its journal (finish), and prune_runs keeps
+    the newest KEEP_RUNS run directories.
+    """
+
+    def __init__(self, run_id, runs_dir=RUNS_DIR):
+        self.run_id = run_id
+        self.run_dir = os.path.join(runs_dir, run_id)
+        self.path = os.path.join(self.run_dir, "journal.jsonl")
+        self.lock = threading.Lock()
+        self.urls = {}
+        self.stages = {}
+        self.meta = {}
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._load()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    @staticmethod
+    def new_run_id():
+        return datetime.now().strftime("%Y%m%dT%H%M%S")
+
+    @classmethod
+    def exists(cls, run_id, runs_dir=RUNS_DIR):
+        return os.path.exists(os.path.join(runs_dir, run_id, "journal.jsonl"))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # Drop the torn last line, so the next append starts on a line of its own
+                f.truncate(complete)
+        for line in data[:complete].decode("utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            kind = entry.get("type")
+            if kind == "url":
+                self.urls[entry["url"]] = entry
+            elif kind == "stage":
+                self.stages[entry["stage"]] = entry
+            elif kind == "meta":
+                self.meta.update(entry.get("meta") or {})
+
+    def _append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self.lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def record_meta(self, **meta):
+        self.meta.update(meta)
+        self._append({"type": "meta", "meta": meta})
+
+    def record_url(self, url, ok):
+        entry = {"type": "url", "url": url, "ok": bool(ok), "at": datetime.now().isoformat()}
+        with self.lock:
+            self.urls[url] = entry
+        self._append(entry)
+
+    def completed_urls(self):
+        return {url for url, entry in self.urls.items() if entry.get("ok")}
+
+    def record_stage(self, stage, **output):
+        entry = {"type": "stage", "stage": stage, "at": datetime.now().isoformat(), "output": output}
+        self.stages[stage] = entry
+        self._append(entry)
+
+    def stage_output(self, stage):
+        entry = self.stages.get(stage)
+        return entry.get("output") if entry else None
+
+    def stage_path(self, name):
+        return os.path.join(self.run_dir, name)
+
+    def write_stage_file(self, name, payload):
+        path = self.stage_path(name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, default=json_default)
+        os.replace(tmp_path, path)
+        return path
+
+    def read_stage_file(self, name):
+        with open(self.stage_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def finish(self):
+        """Drop the stage files of a completed run; only the journal is needed to report it."""
+        self.close()
+        for name in os.listdir(self.run_dir):
+            if name != "journal.jsonl":
+                os.remove(os.path.join(self.run_dir, name))
+
+    def close(self):
+        with self.lock:
+            if not self._fh.closed:
+                self._fh.close()
+
+
+def prune_runs(runs_dir=RUNS_DIR, keep=KEEP_RUNS, current=None):
+    """Delete all but the `keep` most recently written run directories; returns the removed run ids.
+
+    `current` is never removed, so a run can prune before it finishes.
+    """
+    if not os.path.isdir(runs_dir):
+        return []
+    runs = []
+    for run_id in os.listdir(runs_dir):
+        path = os.path.join(runs_dir, run_id)
+        if os.path.isdir(path):
+            journal = os.path.join(path, "journal.jsonl")
+            runs.append((os.path.getmtime(journal if os.path.exists(journal) else path), run_id))
+    runs.sort(reverse=True)
+    removed = []
+    for _, run_id in runs[max(keep, 0):]:
+        if run_id == current:
+            continue
+        shutil.rmtree(os.path.join(runs_dir, run_id), ignore_errors=True)
+        removed.append(run_id)
+    return removed
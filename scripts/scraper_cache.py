@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from records import json_default
+
+
+def entry_usable(entry: dict) -> bool:
+    """A cache entry is only worth serving if it has results and a birth date."""
+    if not entry:
+        return False
+    cached = entry.get("data") or {}
+    has_results = isinstance(cached.get("results"), list) and len(cached.get("results")) > 0
+    has_birth = bool(cached.get("birth_date"))
+    return has_results and has_birth
+
+
+def entry_epoch(entry: dict):
+    try:
+        return datetime.fromisoformat(entry.get("timestamp", "")).timestamp()
+    except Exception:
+        return None
+
+
+class JSONFileCache:
+    """Legacy backend: whole cache held in memory and rewritten on every set."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def get(self, url, default=None):
+        with self.lock:
+            return self.entries.get(url, default)
+
+    def set(self, url, entry):
+        with self.lock:
+            self.entries[url] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.entries, f, indent=2, default=json_default)
+
+    def is_fresh(self, url, ttl_seconds):
+        entry = self.get(url)
+        ts = entry_epoch(entry) if entry else None
+        if ts is None or not entry_usable(entry):
+            return False
+        return (time.time() - ts) < ttl_seconds
+
+    def __contains__(self, url):
+        with self.lock:
+            return url in self.entries
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def close(self):
+        pass
+
+
+class SQLiteCache:
+    """Per-URL cache rows in SQLite; each set() is its own atomic commit.
+
+    `fetched_at` and `usable` are stored as columns so TTL checks never
+    decode the JSON payload.
+    """
+
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        self.lock = threading.RLock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " url TEXT PRIMARY KEY,"
+                " fetched_at REAL,"
+                " usable INTEGER NOT NULL DEFAULT 0,"
+                " entry TEXT NOT NULL)"
+            )
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+
+    def migrate_from_json(self, json_path):
+        """One-time import of the old scraper_cache.json; the file is renamed afterwards."""
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, "r") as f:
+            legacy = json.load(f)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO entries (url, fetched_at, usable, entry) VALUES (?, ?, ?, ?)",
+                [
+                    (url, entry_epoch(entry), int(entry_usable(entry)), json.dumps(entry, ensure_ascii=False))
+                    for url, entry in legacy.items()
+                ],
+            )
+        os.replace(json_path, json_path + ".migrated")
+        print(f"  [CacheMigration] {len(legacy)} entries imported from {json_path}")
+        return len(legacy)
+
+    def get(self, url, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT entry FROM entries WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return default
+        return json.loads(row[0])
+
+    def set(self, url, entry):
+        payload = json.dumps(entry, ensure_ascii=False, default=json_default)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (url, fetched_at, usable, entry) VALUES (?, ?, ?, ?)",
+                (url, entry_epoch(entry), int(entry_usable(entry)), payload),
+            )
+
+    def is_fresh(self, url, ttl_seconds):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM entries WHERE url = ? AND usable = 1 AND fetched_at > ?",
+                (url, time.time() - ttl_seconds),
+            ).fetchone()
+        return row is not None
+
+    def __contains__(self, url):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM entries WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+CACHE_BACKENDS = ("sqlite", "json")
+
+
+def open_cache(cache_file, backend="sqlite"):
+    """`cache_file` is the legacy JSON path; the SQLite store sits next to it."""
+    if backend == "json":
+        return JSONFileCache(cache_file)
+    if backend == "sqlite":
+        db_path = os.path.splitext(cache_file)[0] + ".sqlite3"
+        return SQLiteCache(db_path, legacy_json_path=cache_file)
+    raise ValueError(f"Unknown cache backend: {backend}")
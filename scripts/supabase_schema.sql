@@ -40,6 +40,10 @@ create table if not exists public.athlete_results (
   sync_run_id text not null
 );
 
+-- Content hash of each row (excluding sync bookkeeping columns), used by diff syncs
+alter table public.athletes add column if not exists row_hash text;
+alter table public.athlete_results add column if not exists row_hash text;
+
 create index if not exists idx_athlete_results_fis_code on public.athlete_results (fis_code);
 create index if not exists idx_athlete_results_date on public.athlete_results (event_date desc);
 
@@ -88,3 +92,324 @@ end
 $$;
 
 -- sync_logs is for backend/ops only; no anon select policy
+
+-- Read API (scripts/results_api.py) -----------------------------------------
+-- Keyset pagination walks (event_date desc, result_uid desc); the cursor is the
+-- last row's (event_date, result_uid). Page size is capped at 1000.
+
+create index if not exists idx_athlete_results_athlete_keyset
+  on public.athlete_results (fis_code, event_date desc, result_uid desc);
+create index if not exists idx_athlete_results_keyset
+  on public.athlete_results (event_date desc, result_uid desc);
+create index if not exists idx_athlete_results_synced_at
+  on public.athlete_results (synced_at, result_uid);
+create index if not exists idx_athletes_sport on public.athletes (sport);
+
+-- Tombstones for results removed by a sync, so delta clients can drop them
+create table if not exists public.deleted_results (
+  result_uid text primary key,
+  fis_code text not null,
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists idx_deleted_results_deleted_at on public.deleted_results (deleted_at, result_uid);
+
+create or replace function public.record_deleted_results() returns trigger
+language plpgsql as $$
+begin
+  insert into public.deleted_results (result_uid, fis_code, deleted_at)
+  select result_uid, fis_code, now() from deleted_rows
+  on conflict (result_uid) do update set fis_code = excluded.fis_code, deleted_at = excluded.deleted_at;
+  return null;
+end
+$$;
+
+-- Statement-level, so a bulk delete (or an athlete cascade) is one insert
+drop trigger if exists trg_athlete_results_tombstone on public.athlete_results;
+create trigger trg_athlete_results_tombstone
+after delete on public.athlete_results
+referencing old table as deleted_rows
+for each statement execute function public.record_deleted_results();
+
+-- The delta feed compares synced_at with sync_logs.created_at, so both come
+-- from the database clock rather than the syncing client's
+create or replace function public.stamp_synced_at() returns trigger
+language plpgsql as $$
+begin
+  new.synced_at := now();
+  return new;
+end
+$$;
+
+drop trigger if exists trg_athlete_results_synced_at on public.athlete_results;
+create trigger trg_athlete_results_synced_at
+before insert or update on public.athlete_results
+for each row execute function public.stamp_synced_at();
+
+create or replace view public.results_by_sport as
+select a.sport, r.*
+from public.athlete_results r
+join public.athletes a on a.fis_code = r.fis_code;
+
+create or replace function public.api_athlete_results(
+  p_fis_code text,
+  p_limit int default 50,
+  p_after_date date default null,
+  p_after_uid text default null
+) returns setof public.athlete_results
+language sql stable as $$
+  select r.*
+  from public.athlete_results r
+  where r.fis_code = p_fis_code
+    and r.event_date is not null
+    and (p_after_date is null or (r.event_date, r.result_uid) < (p_after_date, p_after_uid))
+  order by r.event_date desc, r.result_uid desc
+  limit least(greatest(coalesce(p_limit, 50), 1), 1000)
+$$;
+
+create or replace function public.api_sport_results(
+  p_sport text,
+  p_limit int default 50,
+  p_after_date date default null,
+  p_after_uid text default null
+) returns setof public.results_by_sport
+language sql stable as $$
+  select s.*
+  from public.results_by_sport s
+  where s.sport = p_sport
+    and s.event_date is not null
+    and (p_after_date is null or (s.event_date, s.result_uid) < (p_after_date, p_after_uid))
+  order by s.event_date desc, s.result_uid desc
+  limit least(greatest(coalesce(p_limit, 50), 1), 1000)
+$$;
+
+-- Latest successful sync; clients keep its sync_run_id as their delta cursor.
+-- security definer because sync_logs has no anon policy.
+create or replace function public.api_latest_sync()
+returns table (sync_run_id text, synced_at timestamptz, athletes_count int, results_count int, max_event_date date)
+language sql stable security definer set search_path = public as $$
+  select l.sync_run_id, l.created_at, l.athletes_count, l.results_count, l.max_event_date
+  from public.sync_logs l
+  where l.success
+  order by l.created_at desc
+  limit 1
+$$;
+
+-- Results upserted or deleted after the given sync run was logged, oldest first.
+-- Paginate with the last row's (changed_at, result_uid). Rows only change when
+-- their content hash does (diff sync), so unchanged results are not repeated.
+create or replace function public.api_result_changes(
+  p_since_sync_run_id text,
+  p_limit int default 500,
+  p_after_changed_at timestamptz default null,
+  p_after_uid text default null
+) returns table (op text, result_uid text, fis_code text, changed_at timestamptz, result jsonb)
+language plpgsql stable security definer set search_path = public as $$
+declare
+  since timestamptz;
+  after_uid text := '';
+  page_size int := least(greatest(coalesce(p_limit, 500), 1), 1000);
+begin
+  select max(l.created_at) into since
+  from public.sync_logs l
+  where l.sync_run_id = p_since_sync_run_id and l.success;
+  if since is null then
+    raise exception 'unknown sync_run_id %', p_since_sync_run_id using errcode = 'P0002', hint = 'reload in full';
+  end if;
+  if p_after_changed_at is not null and p_after_changed_at >= since then
+    since := p_after_changed_at;
+    after_uid := coalesce(p_after_uid, '');
+  end if;
+
+  return query
+  select c.op, c.result_uid, c.fis_code, c.changed_at, c.result
+  from (
+    (select 'upsert'::text as op, r.result_uid, r.fis_code, r.synced_at as changed_at, to_jsonb(r) - 'row_hash' as result
+     from public.athlete_results r
+     where (r.synced_at, r.result_uid) > (since, after_uid)
+     order by r.synced_at, r.result_uid
+     limit page_size)
+    union all
+    (select 'delete'::text, d.result_uid, d.fis_code, d.deleted_at, null::jsonb
+     from public.deleted_results d
+     where (d.deleted_at, d.result_uid) > (since, after_uid)
+     order by d.deleted_at, d.result_uid
+     limit page_size)
+  ) c
+  order by c.changed_at, c.result_uid, c.op
+  limit page_size;
+end
+$$;
+
+alter table public.deleted_results enable row level security;
+
+do $$
+begin
+  if not exists (
+    select 1 from pg_policies
+    where schemaname = 'public' and tablename = 'deleted_results' and policyname = 'public read deleted_results'
+  ) then
+    create policy "public read deleted_results" on public.deleted_results
+    for select to anon using (true);
+  end if;
+end
+$$;
+
+-- Staged sync (supabase_sync.py --mode staged) -------------------------------
+-- The sync bulk-loads every row into these tables, then apply_staged_sync()
+-- merges them into athletes/athlete_results and deletes the rows that are no
+-- longer present, all in one transaction: readers never see a half-synced
+-- state, and unchanged rows (same row_hash) are not rewritten.
+-- Staging rows are keyed by sync_run_id so a crashed upload can be retried.
+
+create unlogged table if not exists public.athletes_staging (
+  like public.athletes including defaults,
+  staged_at timestamptz not null default now(),
+  primary key (sync_run_id, fis_code)
+);
+
+create unlogged table if not exists public.athlete_results_staging (
+  like public.athlete_results including defaults,
+  staged_at timestamptz not null default now(),
+  primary key (sync_run_id, result_uid)
+);
+
+-- No policies: only the service role (which bypasses RLS) stages rows
+alter table public.athletes_staging enable row level security;
+alter table public.athlete_results_staging enable row level security;
+
+create or replace function public.apply_staged_sync(
+  p_sync_run_id text,
+  p_expected_athletes int default null,
+  p_expected_results int default null
+) returns jsonb
+language plpgsql set search_path = public as $$
+declare
+  staged_athletes int;
+  staged_results int;
+  athletes_upserted int;
+  results_upserted int;
+  athletes_deleted int;
+  results_deleted int;
+begin
+  -- One apply at a time; a second caller waits instead of interleaving deletes
+  perform pg_advisory_xact_lock(hashtext('public.apply_staged_sync'));
+
+  select count(*) into staged_athletes from public.athletes_staging where sync_run_id = p_sync_run_id;
+  select count(*) into staged_results from public.athlete_results_staging where sync_run_id = p_sync_run_id;
+  if staged_athletes = 0 then
+    raise exception 'nothing staged for sync_run_id %', p_sync_run_id using errcode = 'P0002';
+  end if;
+  -- An upload that lost chunks must not delete the rows it failed to stage
+  if staged_athletes <> coalesce(p_expected_athletes, staged_athletes)
+     or staged_results <> coalesce(p_expected_results, staged_results) then
+    raise exception 'incomplete staging for %: % of % athletes, % of % results',
+      p_sync_run_id, staged_athletes, p_expected_athletes, staged_results, p_expected_results;
+  end if;
+
+  insert into public.athletes as t (
+    fis_code, id, name_ko, name_en, birth_date, birth_year, age, sport, sport_display, team, fis_url,
+    current_rank, best_rank, season_starts, medals, source_updated_at, synced_at, sync_run_id, row_hash
+  )
+  select
+    fis_code, id, name_ko, name_en, birth_date, birth_year, age, sport, sport_display, team, fis_url,
+    current_rank, best_rank, season_starts, medals, source_updated_at, synced_at, sync_run_id, row_hash
+  from public.athletes_staging
+  where sync_run_id = p_sync_run_id
+  on conflict (fis_code) do update set
+    id = excluded.id,
+    name_ko = excluded.name_ko,
+    name_en = excluded.name_en,
+    birth_date = excluded.birth_date,
+    birth_year = excluded.birth_year,
+    age = excluded.age,
+    sport = excluded.sport,
+    sport_display = excluded.sport_display,
+    team = excluded.team,
+    fis_url = excluded.fis_url,
+    current_rank = excluded.current_rank,
+    best_rank = excluded.best_rank,
+    season_starts = excluded.season_starts,
+    medals = excluded.medals,
+    source_updated_at = excluded.source_updated_at,
+    synced_at = excluded.synced_at,
+    sync_run_id = excluded.sync_run_id,
+    row_hash = excluded.row_hash
+  where t.row_hash is distinct from excluded.row_hash;
+  get diagnostics athletes_upserted = row_count;
+
+  insert into public.athlete_results as t (
+    result_uid, fis_code, event_date, place, category, discipline, rank, rank_status,
+    fis_points, cup_points, source_updated_at, synced_at, sync_run_id, row_hash
+  )
+  select
+    result_uid, fis_code, event_date, place, category, discipline, rank, rank_status,
+    fis_points, cup_points, source_updated_at, synced_at, sync_run_id, row_hash
+  from public.athlete_results_staging
+  where sync_run_id = p_sync_run_id
+  on conflict (result_uid) do update set
+    fis_code = excluded.fis_code,
+    event_date = excluded.event_date,
+    place = excluded.place,
+    category = excluded.category,
+    discipline = excluded.discipline,
+    rank = excluded.rank,
+    rank_status = excluded.rank_status,
+    fis_points = excluded.fis_points,
+    cup_points = excluded.cup_points,
+    source_updated_at = excluded.source_updated_at,
+    synced_at = excluded.synced_at,
+    sync_run_id = excluded.sync_run_id,
+    row_hash = excluded.row_hash
+  where t.row_hash is distinct from excluded.row_hash;
+  get diagnostics results_upserted = row_count;
+
+  -- Children before parents, so the tombstone trigger sees each result once
+  delete from public.athlete_results r
+  where not exists (
+    select 1 from public.athlete_results_staging s
+    where s.sync_run_id = p_sync_run_id and s.result_uid = r.result_uid
+  );
+  get diagnostics results_deleted = row_count;
+
+  delete from public.athletes a
+  where not exists (
+    select 1 from public.athletes_staging s
+    where s.sync_run_id = p_sync_run_id and s.fis_code = a.fis_code
+  );
+  get diagnostics athletes_deleted = row_count;
+
+  -- This run's rows, plus leftovers of uploads that never got applied
+  delete from public.athletes_staging where sync_run_id = p_sync_run_id or staged_at < now() - interval '1 day';
+  delete from public.athlete_results_staging where sync_run_id = p_sync_run_id or staged_at < now() - interval '1 day';
+
+  return jsonb_build_object(
+    'athletes', jsonb_build_object(
+      'staged', staged_athletes,
+      'upserted', athletes_upserted,
+      'unchanged', staged_athletes - athletes_upserted,
+      'deleted', athletes_deleted
+    ),
+    'athlete_results', jsonb_build_object(
+      'staged', staged_results,
+      'upserted', results_upserted,
+      'unchanged', staged_results - results_upserted,
+      'deleted', results_deleted
+    )
+  );
+end
+$$;
+
+-- Writes go through RLS as the caller, so only the service role can apply;
+-- it is also kept out of the anon/authenticated RPC surface
+revoke execute on function public.apply_staged_sync(text, int, int) from public;
+do $$
+begin
+  if exists (select 1 from pg_roles where rolname = 'anon') then
+    revoke execute on function public.apply_staged_sync(text, int, int) from anon;
+  end if;
+  if exists (select 1 from pg_roles where rolname = 'authenticated') then
+    revoke execute on function public.apply_staged_sync(text, int, int) from authenticated;
+  end if;
+end
+$$;
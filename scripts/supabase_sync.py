@@ -1,13 +1,33 @@
 #!/usr/bin/env python3
 import argparse
+import gzip
 import hashlib
 import json
 import os
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from pipeline_metrics import METRIC_FORMATS, PipelineMetrics
+from result_identity import content_uid
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MANIFEST = os.path.join(SCRIPT_DIR, "data", "cache", "supabase_manifest.json")
+
+# Bookkeeping columns that change on every run and are excluded from row hashes
+VOLATILE_COLUMNS = ("synced_at", "sync_run_id", "source_updated_at", "row_hash")
+TABLE_KEYS = {"athletes": "fis_code", "athlete_results": "result_uid"}
+# Staged mode uploads here, then apply_staged_sync() merges in one transaction
+STAGING_TABLES = {"athletes": "athletes_staging", "athlete_results": "athlete_results_staging"}
+
+# One pooled keep-alive session for every PostgREST call
+HTTP = requests.Session()
+RETRYABLE_STATUS = (408, 425, 429, 500, 502, 503, 504)
 
 
 def env(name: str) -> str:
@@ -22,6 +42,27 @@ def parse_args():
     p.add_argument("--data", required=True, help="path to athletes.json")
     p.add_argument("--health", default="", help="optional health report path")
     p.add_argument("--source", default="v7_pipeline", help="sync source label")
+    p.add_argument(
+        "--mode",
+        choices=["diff", "full", "staged"],
+        default="diff",
+        help="diff: push only rows whose content hash changed; full: upsert everything and delete stale run ids; "
+        "staged: bulk-load staging tables and merge them in one transaction (apply_staged_sync)",
+    )
+    p.add_argument(
+        "--manifest-source",
+        choices=["local", "server"],
+        default="local",
+        help="where last-pushed row hashes come from in diff mode",
+    )
+    p.add_argument("--manifest", default=DEFAULT_MANIFEST, help="local manifest of last-pushed row hashes")
+    p.add_argument("--upload-workers", type=int, default=4, help="concurrent in-flight upsert chunks")
+    p.add_argument("--chunk-size", type=int, default=500, help="initial rows per upsert chunk (adapted to latency)")
+    p.add_argument("--target-chunk-latency", type=float, default=2.0, help="seconds per chunk the adaptive sizing aims for")
+    p.add_argument("--upload-retries", type=int, default=3, help="retries per chunk on network errors/5xx")
+    p.add_argument("--gzip", action="store_true", help="gzip request bodies (Content-Encoding: gzip)")
+    p.add_argument("--metrics-output", default="", help="optional Prometheus textfile path for stage timings and chunk latency")
+    p.add_argument("--metrics-format", choices=METRIC_FORMATS, default="prometheus")
     return p.parse_args()
 
 
@@ -48,21 +89,10 @@ def safe_float(v):
         return None
 
 
-def make_result_uid(fis_code: str, r: Dict) -> str:
-    key = "|".join(
-        [
-            str(fis_code or ""),
-            str(r.get("date") or ""),
-            str(r.get("place") or ""),
-            str(r.get("category") or ""),
-            str(r.get("discipline") or r.get("event") or ""),
-            str(r.get("rank") if r.get("rank") is not None else ""),
-            str(r.get("rank_status") or ""),
-            str(r.get("points") if r.get("points") is not None else ""),
-            str(r.get("cup_points") if r.get("cup_points") is not None else ""),
-        ]
-    )
-    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+def row_hash(row: Dict) -> str:
+    stable = {k: v for k, v in row.items() if k not in VOLATILE_COLUMNS}
+    blob = json.dumps(stable, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
 
 
 def build_rows(doc: Dict, sync_run_id: str) -> Tuple[List[Dict], List[Dict], str]:
@@ -73,6 +103,7 @@ def build_rows(doc: Dict, sync_run_id: str) -> Tuple[List[Dict], List[Dict], str
     athlete_rows = []
     result_rows = []
     max_date = ""
+    synced_at = datetime.now(timezone.utc).isoformat()
 
     for a in athletes:
         fis_code = str(a.get("fis_code") or "").strip()
@@ -97,7 +128,7 @@ def build_rows(doc: Dict, sync_run_id: str) -> Tuple[List[Dict], List[Dict], str
                 "season_starts": safe_int(a.get("season_starts")),
                 "medals": a.get("medals") or {"gold": 0, "silver": 0, "bronze": 0},
                 "source_updated_at": source_updated_at,
-                "synced_at": datetime.now(timezone.utc).isoformat(),
+                "synced_at": synced_at,
                 "sync_run_id": sync_run_id,
             }
         )
@@ -108,7 +139,8 @@ def build_rows(doc: Dict, sync_run_id: str) -> Tuple[List[Dict], List[Dict], str
                 max_date = d
             result_rows.append(
                 {
-                    "result_uid": make_result_uid(fis_code, r),
+                    # Stable uid from the processor's identity index; content hash for older files
+                    "result_uid": r.get("result_uid") or content_uid(fis_code, r),
                     "fis_code": fis_code,
                     "event_date": d,
                     "place": r.get("place"),
@@ -119,7 +151,7 @@ def build_rows(doc: Dict, sync_run_id: str) -> Tuple[List[Dict], List[Dict], str
                     "fis_points": safe_float(r.get("points")),
                     "cup_points": safe_float(r.get("cup_points")),
                     "source_updated_at": source_updated_at,
-                    "synced_at": datetime.now(timezone.utc).isoformat(),
+                    "synced_at": synced_at,
                     "sync_run_id": sync_run_id,
                 }
             )
@@ -130,6 +162,9 @@ def build_rows(doc: Dict, sync_run_id: str) -> Tuple[List[Dict], List[Dict], str
         dedup[row["result_uid"]] = row
     result_rows = list(dedup.values())
 
+    for row in athlete_rows + result_rows:
+        row["row_hash"] = row_hash(row)
+
     return athlete_rows, result_rows, max_date
 
 
@@ -141,33 +176,244 @@ def request_headers(service_role_key: str) -> Dict:
     }
 
 
-def post_upsert(base_url: str, table: str, rows: List[Dict], conflict_cols: str, headers: Dict, chunk_size: int = 500):
+class ChunkSizer:
+    """Grows chunks while responses are fast and shrinks them when they get slow."""
+
+    def __init__(self, initial: int, target_latency_sec: float = 2.0, min_size: int = 50, max_size: int = 5000):
+        self.size = max(min_size, min(max_size, initial))
+        self.target_latency_sec = target_latency_sec
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def observe(self, latency_sec: float):
+        if latency_sec > self.target_latency_sec:
+            self.size = max(self.min_size, self.size // 2)
+        elif latency_sec < self.target_latency_sec / 2:
+            self.size = min(self.max_size, int(self.size * 1.5))
+
+
+def send_with_retries(method: str, url: str, headers: Dict, data=None, max_retries: int = 3) -> requests.Response:
+    """Send one request, retrying network errors and retryable statuses with exponential backoff."""
+    last_exc = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(min(8.0, 0.5 * (2 ** (attempt - 1))))
+        try:
+            r = HTTP.request(method, url, headers=headers, data=data, timeout=30)
+        except requests.RequestException as e:
+            last_exc = e
+            continue
+        if r.status_code < 300 or r.status_code not in RETRYABLE_STATUS or attempt == max_retries:
+            return r
+    raise last_exc
+
+
+def _post_chunk(url: str, chunk: List[Dict], headers: Dict, gzip_body: bool, max_retries: int) -> float:
+    """POST one chunk; returns the latency of the final attempt."""
+    body = json.dumps(chunk, separators=(",", ":")).encode("utf-8")
+    if gzip_body:
+        body = gzip.compress(body)
+    t0 = time.monotonic()
+    r = send_with_retries("POST", url, headers, data=body, max_retries=max_retries)
+    if r.status_code >= 300:
+        raise RuntimeError(f"{r.status_code}: {r.text[:500]}")
+    return time.monotonic() - t0
+
+
+def post_upsert(
+    base_url: str,
+    table: str,
+    rows: List[Dict],
+    conflict_cols: str,
+    headers: Dict,
+    chunk_size: int = 500,
+    max_in_flight: int = 1,
+    gzip_body: bool = False,
+    max_retries: int = 3,
+    target_latency_sec: float = 2.0,
+    metrics=None,
+):
     if not rows:
         return
     url = f"{base_url}/rest/v1/{table}?on_conflict={conflict_cols}"
-    for i in range(0, len(rows), chunk_size):
-        chunk = rows[i : i + chunk_size]
-        h = dict(headers)
-        h["Prefer"] = "resolution=merge-duplicates,return=minimal"
-        r = requests.post(url, headers=h, data=json.dumps(chunk), timeout=30)
-        if r.status_code >= 300:
-            raise RuntimeError(f"Upsert failed [{table}] {r.status_code}: {r.text[:500]}")
+    h = dict(headers)
+    h["Prefer"] = "resolution=merge-duplicates,return=minimal"
+    if gzip_body:
+        h["Content-Encoding"] = "gzip"
+
+    sizer = ChunkSizer(chunk_size, target_latency_sec=target_latency_sec)
+    failures = []
+    pos = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        pending = {}
+        while pos < len(rows) or pending:
+            while pos < len(rows) and len(pending) < max(1, max_in_flight):
+                chunk = rows[pos : pos + sizer.size]
+                pos += len(chunk)
+                pending[pool.submit(_post_chunk, url, chunk, h, gzip_body, max_retries)] = chunk
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    latency = future.result()
+                    sizer.observe(latency)
+                    if metrics:
+                        metrics.observe("upsert_chunk_seconds", latency)
+                except Exception as e:
+                    # Keep sending the remaining chunks; report every failure at the end
+                    failures.append((len(chunk), str(e)))
+    if failures:
+        lost = sum(n for n, _ in failures)
+        raise RuntimeError(f"Upsert failed [{table}] {len(failures)} chunk(s), {lost} rows; first error {failures[0][1]}")
 
 
 def delete_stale(base_url: str, table: str, sync_run_id: str, headers: Dict):
     url = f"{base_url}/rest/v1/{table}?sync_run_id=neq.{sync_run_id}"
     h = dict(headers)
     h["Prefer"] = "return=minimal"
-    r = requests.delete(url, headers=h, timeout=30)
+    r = send_with_retries("DELETE", url, h)
     if r.status_code >= 300:
         raise RuntimeError(f"Delete stale failed [{table}] {r.status_code}: {r.text[:500]}")
 
 
+def delete_keys(base_url: str, table: str, key_col: str, keys: List[str], headers: Dict, chunk_size: int = 200):
+    h = dict(headers)
+    h["Prefer"] = "return=minimal"
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i : i + chunk_size]
+        quoted = ",".join('"%s"' % str(k).replace('"', '\\"') for k in chunk)
+        url = f"{base_url}/rest/v1/{table}?{key_col}=in.({quoted})"
+        r = send_with_retries("DELETE", url, h)
+        if r.status_code >= 300:
+            raise RuntimeError(f"Delete failed [{table}] {r.status_code}: {r.text[:500]}")
+
+
+def fetch_server_hashes(base_url: str, table: str, key_col: str, headers: Dict, page_size: int = 1000) -> Dict[str, str]:
+    out = {}
+    offset = 0
+    while True:
+        url = f"{base_url}/rest/v1/{table}?select={key_col},row_hash&order={key_col}&limit={page_size}&offset={offset}"
+        r = send_with_retries("GET", url, headers)
+        if r.status_code >= 300:
+            raise RuntimeError(f"Hash fetch failed [{table}] {r.status_code}: {r.text[:500]}")
+        page = r.json()
+        for row in page:
+            out[str(row[key_col])] = row.get("row_hash") or ""
+        if len(page) < page_size:
+            return out
+        offset += page_size
+
+
+def load_manifest(path: str):
+    if not os.path.exists(path):
+        return None
+    try:
+        return load_json(path)
+    except Exception:
+        return None
+
+
+def save_manifest(path: str, manifest: Dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def diff_rows(rows: List[Dict], key_col: str, previous: Dict[str, str]):
+    """Split rows against last-pushed hashes into (inserts, updates, deleted keys, unchanged count)."""
+    inserts, updates = [], []
+    seen = set()
+    for row in rows:
+        key = str(row[key_col])
+        seen.add(key)
+        old = previous.get(key)
+        if old is None:
+            inserts.append(row)
+        elif old != row["row_hash"]:
+            updates.append(row)
+    deleted = sorted(k for k in previous if k not in seen)
+    unchanged = len(rows) - len(inserts) - len(updates)
+    return inserts, updates, deleted, unchanged
+
+
+def manifest_for(athlete_rows: List[Dict], result_rows: List[Dict], sync_run_id: str) -> Dict:
+    return {
+        "sync_run_id": sync_run_id,
+        "athletes": {r["fis_code"]: r["row_hash"] for r in athlete_rows},
+        "athlete_results": {r["result_uid"]: r["row_hash"] for r in result_rows},
+    }
+
+
+def sync_full(base_url: str, athlete_rows: List[Dict], result_rows: List[Dict], sync_run_id: str, headers: Dict, **upload_opts):
+    post_upsert(base_url, "athletes", athlete_rows, "fis_code", headers, **upload_opts)
+    post_upsert(base_url, "athlete_results", result_rows, "result_uid", headers, **upload_opts)
+    delete_stale(base_url, "athlete_results", sync_run_id, headers)
+    delete_stale(base_url, "athletes", sync_run_id, headers)
+    return {
+        "mode": "full",
+        "athletes": {"upserted": len(athlete_rows)},
+        "athlete_results": {"upserted": len(result_rows)},
+    }
+
+
+def sync_diff(base_url: str, athlete_rows: List[Dict], result_rows: List[Dict], previous: Dict, headers: Dict, **upload_opts):
+    summary = {"mode": "diff"}
+    deletes = {}
+    # Parents before children on the way in
+    for table, rows in (("athletes", athlete_rows), ("athlete_results", result_rows)):
+        key_col = TABLE_KEYS[table]
+        inserts, updates, deleted, unchanged = diff_rows(rows, key_col, previous.get(table) or {})
+        post_upsert(base_url, table, inserts + updates, key_col, headers, **upload_opts)
+        deletes[table] = deleted
+        summary[table] = {
+            "inserted": len(inserts),
+            "updated": len(updates),
+            "deleted": len(deleted),
+            "unchanged": unchanged,
+        }
+    # Children before parents on the way out
+    for table in ("athlete_results", "athletes"):
+        delete_keys(base_url, table, TABLE_KEYS[table], deletes[table], headers)
+    return summary
+
+
+def call_rpc(base_url: str, name: str, params: Dict, headers: Dict, max_retries: int = 0):
+    # No retries by default: a lost response to a committed call must not re-run it
+    r = send_with_retries("POST", f"{base_url}/rest/v1/rpc/{name}", headers, data=json.dumps(params), max_retries=max_retries)
+    if r.status_code >= 300:
+        raise RuntimeError(f"RPC {name} failed {r.status_code}: {r.text[:500]}")
+    return r.json()
+
+
+def sync_staged(base_url: str, athlete_rows: List[Dict], result_rows: List[Dict], sync_run_id: str, headers: Dict, **upload_opts):
+    """Upload every row to the staging tables, then merge them in with one apply_staged_sync call.
+
+    Nothing in athletes/athlete_results changes until the final call, which
+    merges changed rows and deletes missing ones atomically (no delete_stale scans).
+    """
+    for table, rows in (("athletes", athlete_rows), ("athlete_results", result_rows)):
+        conflict_cols = f"sync_run_id,{TABLE_KEYS[table]}"
+        post_upsert(base_url, STAGING_TABLES[table], rows, conflict_cols, headers, **upload_opts)
+    applied = call_rpc(
+        base_url,
+        "apply_staged_sync",
+        {
+            "p_sync_run_id": sync_run_id,
+            "p_expected_athletes": len(athlete_rows),
+            "p_expected_results": len(result_rows),
+        },
+        headers,
+    )
+    return {"mode": "staged", **applied}
+
+
 def insert_sync_log(base_url: str, payload: Dict, headers: Dict):
     url = f"{base_url}/rest/v1/sync_logs"
     h = dict(headers)
     h["Prefer"] = "return=minimal"
-    r = requests.post(url, headers=h, data=json.dumps([payload]), timeout=30)
+    r = send_with_retries("POST", url, h, data=json.dumps([payload]))
     if r.status_code >= 300:
         raise RuntimeError(f"sync_logs insert failed {r.status_code}: {r.text[:500]}")
 
@@ -177,10 +423,23 @@ def main():
     supabase_url = env("SUPABASE_URL")
     service_role_key = env("SUPABASE_SERVICE_ROLE_KEY")
 
-    doc = load_json(args.data)
+    metrics = PipelineMetrics()
     sync_run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    athlete_rows, result_rows, max_event_date = build_rows(doc, sync_run_id)
+    with metrics.stage("build_rows"):
+        doc = load_json(args.data)
+        athlete_rows, result_rows, max_event_date = build_rows(doc, sync_run_id)
     headers = request_headers(service_role_key)
+    upload_opts = {
+        "chunk_size": args.chunk_size,
+        "max_in_flight": args.upload_workers,
+        "gzip_body": args.gzip,
+        "max_retries": args.upload_retries,
+        "target_latency_sec": args.target_chunk_latency,
+        "metrics": metrics,
+    }
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, args.upload_workers))
+    HTTP.mount("https://", adapter)
+    HTTP.mount("http://", adapter)
 
     detail = {
         "data_path": args.data,
@@ -195,10 +454,31 @@ def main():
             detail["health_parse_error"] = True
 
     try:
-        post_upsert(supabase_url, "athletes", athlete_rows, "fis_code", headers)
-        post_upsert(supabase_url, "athlete_results", result_rows, "result_uid", headers)
-        delete_stale(supabase_url, "athlete_results", sync_run_id, headers)
-        delete_stale(supabase_url, "athletes", sync_run_id, headers)
+        previous = None
+        if args.mode == "diff":
+            with metrics.stage("load_manifest"):
+                if args.manifest_source == "server":
+                    previous = {
+                        table: fetch_server_hashes(supabase_url, table, key_col, headers)
+                        for table, key_col in TABLE_KEYS.items()
+                    }
+                else:
+                    previous = load_manifest(args.manifest)
+                    if previous is None:
+                        print("supabase_manifest=missing (falling back to full sync)")
+
+        with metrics.stage("upload"):
+            if args.mode == "staged":
+                summary = sync_staged(supabase_url, athlete_rows, result_rows, sync_run_id, headers, **upload_opts)
+            elif previous is None:
+                summary = sync_full(supabase_url, athlete_rows, result_rows, sync_run_id, headers, **upload_opts)
+            else:
+                summary = sync_diff(supabase_url, athlete_rows, result_rows, previous, headers, **upload_opts)
+        save_manifest(args.manifest, manifest_for(athlete_rows, result_rows, sync_run_id))
+        detail["sync"] = summary
+        detail["timing"] = metrics.to_dict()
+        if args.metrics_output:
+            metrics.write_prometheus(args.metrics_output, fmt=args.metrics_format, prefix="team_korea_supabase_sync")
 
         insert_sync_log(
             supabase_url,
@@ -218,6 +498,9 @@ def main():
         print(f"supabase_athletes={len(athlete_rows)}")
         print(f"supabase_results={len(result_rows)}")
         print(f"supabase_max_event_date={max_event_date}")
+        for table in TABLE_KEYS:
+            counts = " ".join(f"{k}={v}" for k, v in summary[table].items())
+            print(f"supabase_{table}_changes: {counts}")
     except Exception as e:
         err_payload = {
             "sync_run_id": sync_run_id,
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The pipeline modules live flat in scripts/ and import each other by bare name
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
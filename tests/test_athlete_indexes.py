@@ -0,0 +1,31 @@
+from athlete_indexes import build_indexes
+from bundle_patcher import merge_athletes
+
+
+def result(uid, date, category, rank):
+    return {"result_uid": uid, "date": date, "event": "Slalom", "rank": rank, "rank_status": None, "points": 10.0,
+            "place": "Levi", "category": category, "discipline": "Slalom", "cup_points": None}
+
+
+def test_result_refs_resolve_in_the_patched_bundle():
+    athlete = {
+        "id": "KOR001", "fis_code": "9000001", "sport": "alpine_skiing", "current_rank": 3, "best_rank": 3,
+        # Out of the bundle's order and with an exact duplicate, which the patcher drops
+        "recent_results": [
+            result("u-old", "2025-11-16", "FIS", 3),
+            result("u-new", "2026-01-04", "World Cup", 12),
+            result("u-old", "2025-11-16", "FIS", 3),
+        ],
+    }
+    indexes = build_indexes([athlete])
+    assert indexes["by_date"] == {"2026-01-04": [["KOR001", "u-new"]], "2025-11-16": [["KOR001", "u-old"]]}
+    assert indexes["by_category"]["FIS"] == [["KOR001", "u-old"]]
+
+    bundle, updated, added = merge_athletes([{"id": "KOR001", "fis_code": "9000001"}], [athlete])
+    assert (updated, added) == (1, 0)
+    by_uid = {r["result_uid"]: r for r in bundle[0]["recent_results"]}
+    assert [r["result_uid"] for r in bundle[0]["recent_results"]] == ["u-new", "u-old"]
+    for day, refs in indexes["by_date"].items():
+        for athlete_id, uid in refs:
+            assert athlete_id == bundle[0]["id"]
+            assert by_uid[uid]["date"] == day
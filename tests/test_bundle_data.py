@@ -0,0 +1,45 @@
+import os
+
+import bundle_data
+from bundle_data import load_bundle_athletes
+
+
+def write_bundle(path, code):
+    path.write_text('x=1;ma=[{"fis_code":"%s"}],Ko=()=>1' % code, encoding="utf-8")
+
+
+def test_bundle_cache_keeps_only_current_bundle(tmp_path):
+    bundle = tmp_path / "index.js"
+    cache_dir = tmp_path / "cache"
+    for code in ("100", "200", "300"):
+        write_bundle(bundle, code)
+        assert load_bundle_athletes(str(bundle), str(cache_dir)) == [{"fis_code": code}]
+        assert len(os.listdir(cache_dir)) == 1
+
+    # A cache hit leaves the entry in place
+    assert load_bundle_athletes(str(bundle), str(cache_dir)) == [{"fis_code": "300"}]
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_bundles_sharing_a_cache_dir_do_not_evict_each_other(tmp_path, monkeypatch):
+    current, deployed = tmp_path / "index.js", tmp_path / "deployed_index_js_20260212.js"
+    write_bundle(current, "100")
+    write_bundle(deployed, "200")
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / ("ma_" + "0" * 64 + ".json")).write_text("[]")  # entry from the unprefixed layout
+
+    parses = []
+    extract = bundle_data.extract_ma_athletes
+    monkeypatch.setattr(bundle_data, "extract_ma_athletes", lambda js: parses.append(1) or extract(js))
+    for _ in range(2):
+        assert load_bundle_athletes(str(current), str(cache_dir)) == [{"fis_code": "100"}]
+        assert load_bundle_athletes(str(deployed), str(cache_dir)) == [{"fis_code": "200"}]
+    assert len(parses) == 2
+    assert sorted(name.rsplit("_", 1)[0] for name in os.listdir(cache_dir)) == [
+        "ma_deployed_index_js_20260212.js", "ma_index.js",
+    ]
+
+    write_bundle(current, "300")
+    load_bundle_athletes(str(current), str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 2
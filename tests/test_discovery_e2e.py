@@ -0,0 +1,66 @@
+"""A discovered athlete goes from a FIS list page all the way into the patched bundle."""
+import os
+import shutil
+
+import pytest
+
+from bundle_data import load_bundle_athletes
+from bundle_patcher import patch_bundle, verify_bundle
+from data_processor import DataProcessor
+from fis_fixtures import read_urls
+from fis_scraper import FISScraper
+from fis_stub_server import start_stub_server
+from roster_discovery import load_roster, run_discovery
+
+REPO_BUNDLE = os.path.join(os.path.dirname(__file__), "..", "index.js")
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(roster_size=2)
+    yield server
+    server.shutdown()
+
+
+@pytest.mark.skipif(not os.path.exists(REPO_BUNDLE), reason="needs the dashboard bundle")
+def test_discovered_athlete_reaches_the_bundle(stub, tmp_path):
+    url_file, roster_path = str(tmp_path / "athlete_urls.txt"), str(tmp_path / "roster.json")
+    run_discovery(["KOR", "JPN"], ["SB"], url_file=url_file, roster_path=roster_path,
+                  athletes_path=str(tmp_path / "none.json"), base_url=stub.base_url, request_interval_sec=0)
+    urls = read_urls(url_file)
+    roster = load_roster(roster_path)["athletes"]
+    jpn = [cid for cid, entry in roster.items() if entry["nation"] == "JPN"]
+    assert len(jpn) == 2
+
+    scraper = FISScraper(cache_file=str(tmp_path / "cache.sqlite"), force_refresh=True, request_interval_sec=0)
+    profiles = [p for p in scraper.scrape_all(urls) if p]
+    athletes = DataProcessor(roster_path=roster_path).process(profiles)
+
+    bundle = str(tmp_path / "index.js")
+    shutil.copyfile(REPO_BUNDLE, bundle)
+    before = verify_bundle(bundle)["athletes"]
+    report = patch_bundle(bundle, athletes, backup=False)
+    assert report["added_athletes"] >= len(jpn)
+    assert report["athletes"] == before + report["added_athletes"]
+    assert report["athletes"] >= len(urls)
+
+    patched = {a["fis_code"]: a for a in load_bundle_athletes(bundle)}
+    for cid in jpn:
+        entry = patched[cid]
+        assert entry["id"] == cid
+        assert entry["team"] == "JPN"
+    assert verify_bundle(bundle)["passed"]
+
+
+def test_team_ignores_the_host_nation_of_result_rows(tmp_path):
+    roster_path = tmp_path / "roster.json"
+    roster_path.write_text('{"athletes": {"88000001": {"nation": "JPN"}}}', encoding="utf-8")
+    # Result rows carry the event's host country
+    rows = [{"date": "2026-01-10", "place": "Kitzbuehel", "nation": "AUT", "discipline": "Slalom",
+             "category": "FIS", "rank": 4, "points": 20.0}]
+    profiles = [
+        {"fis_code": code, "name_en": f"Athlete {code}", "sport_code": "AL", "results": rows}
+        for code in ("88000001", "88000002")
+    ]
+    athletes = DataProcessor(roster_path=str(roster_path)).process(profiles)
+    assert [a["team"] for a in athletes] == ["JPN", "KOR"]
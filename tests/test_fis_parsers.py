@@ -0,0 +1,89 @@
+"""The stream engine must parse every page exactly like the bs4 reference."""
+import pytest
+
+from fis_fixtures import load_corpus, render_page
+from fis_parsers import compare_engines, get_parser
+
+CORPUS = load_corpus()
+
+ROW = (
+    '<a class="table-row" href="#"><div class="g-row justify-sb">'
+    '<div class="g-lg-4 g-md-4 g-sm-4 g-xs-4 justify-left">{date}</div>'
+    '<div class="g-lg g-md justify-left hidden-sm-down">{place}</div>'
+    '<div class="g-lg-1 g-md-1 g-sm-2 g-xs-3 justify-left"><div class="country">'
+    '<span class="country__name-short">KOR</span></div></div>'
+    '<div class="g-lg-5 g-md-5 justify-left hidden-sm-down">{category}</div>'
+    '<div class="g-lg-3 g-md-3 justify-left hidden-sm-down">{discipline}</div>'
+    '{right}</div></a>'
+)
+RIGHT = (
+    '<div class="g-lg-6 g-md-6 g-sm-6 g-xs-6 justify-right flex-xs-wrap">'
+    '<div class="justify-right">{rank}</div><div class="justify-right">{points}</div>'
+    '<div class="justify-right">{cup}</div></div>'
+)
+
+
+def page(*rows, head=""):
+    return f"<html><body>{head}<div class=\"table__body\">{''.join(rows)}</div></body></html>".encode("utf-8")
+
+
+def row(date="14-01-2024", place="Kitzbuehel", category="World Cup", discipline="Slalom",
+        rank="12", points="15.20", cup="22", right=True):
+    right_html = RIGHT.format(rank=rank, points=points, cup=cup) if right else ""
+    return ROW.format(date=date, place=place, category=category, discipline=discipline, right=right_html)
+
+
+def assert_engines_agree(content):
+    outputs, mismatches = compare_engines(content)
+    assert mismatches == [], (outputs["bs4"], outputs["stream"])
+    return outputs["bs4"]
+
+
+@pytest.mark.skipif(not CORPUS, reason="no fixture corpus")
+@pytest.mark.parametrize("cid", sorted(CORPUS))
+def test_engines_agree_on_fixture_corpus(cid):
+    _, content = CORPUS[cid]
+    assert_engines_agree(content)
+
+
+def test_fixture_page_round_trips_athlete_fields():
+    athlete = {
+        "name_en": "KIM Minjun",
+        "birth_date": "2001-03-09",
+        "recent_results": [
+            {"date": "2024-01-14", "place": "Kitzbühel", "category": "World Cup", "discipline": "Slalom",
+             "rank": 7, "points": 12.5, "cup_points": 36},
+            {"date": "2023-12-02", "place": "Val d'Isère", "category": "FIS", "discipline": "Giant Slalom",
+             "rank": None, "rank_status": "DNF", "points": None, "cup_points": None},
+        ],
+    }
+    parsed = assert_engines_agree(render_page(athlete))
+    assert parsed["birth_date"] == "2001-03-09"
+    first, second = parsed["results"]
+    assert (first["date"], first["place"], first["rank"], first["fis_points"], first["cup_points"]) == (
+        "2024-01-14", "Kitzbühel", 7, 12.5, 36.0)
+    assert (second["rank"], second["rank_status"], second["fis_points"]) == (None, "DNF", None)
+
+
+@pytest.mark.parametrize("content", [
+    pytest.param(page(row()), id="plain"),
+    pytest.param(page(row(right=False)), id="missing-right-columns"),
+    pytest.param(page(row(rank="dsq", points="", cup="")), id="status-rank"),
+    pytest.param(page(row(place="Val d&#39;Is&egrave;re &amp; Tignes")), id="entities"),
+    pytest.param(page(row(place="<b>Ga</b> <i>Pa</i>")), id="nested-markup"),
+    pytest.param(page(row(date="2024-01-14")), id="unparsed-date"),
+    pytest.param(page(row(discipline="Slalom<br>Run 2")), id="void-element"),
+    pytest.param(page(row(), row(place="Wengen <span>unclosed")), id="unclosed-tag"),
+    pytest.param(page(row(), head='<h1 class="athlete-profile__name">LEE Seo</h1>'
+                      '<span class="profile-info__field">Birthdate</span>'
+                      '<span class="profile-info__value">05-06-1999</span>'), id="profile-header"),
+    pytest.param(page(), id="no-rows"),
+    pytest.param(page(row(place="Zürich")).decode("utf-8").encode("latin-1"), id="latin-1-bytes"),
+])
+def test_engines_agree_on_edge_cases(content):
+    assert_engines_agree(content)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        get_parser("lxml")
@@ -0,0 +1,50 @@
+"""bundle_patcher.py and patch_real_site_data.js write byte-identical bundles."""
+import copy
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from bundle_patcher import patch_bundle
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+REPO_BUNDLE = os.path.join(ROOT, "index.js")
+ATHLETES_JSON = os.path.join(ROOT, "scripts", "data", "athletes.json")
+NODE_PATCHER = os.path.join(ROOT, "scripts", "patch_real_site_data.js")
+
+pytestmark = [
+    pytest.mark.skipif(shutil.which("node") is None, reason="needs node"),
+    pytest.mark.skipif(not os.path.exists(REPO_BUNDLE), reason="needs the dashboard bundle"),
+]
+
+
+def incoming_with_new_athlete():
+    with open(ATHLETES_JSON, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    # One athlete the bundle does not have yet, so the append path is covered too
+    new = copy.deepcopy(doc["athletes"][0])
+    new.update(id="99000001", fis_code="99000001", name_en="New Athlete", name_ko="New Athlete", team="JPN")
+    doc["athletes"].append(new)
+    return doc
+
+
+def test_python_and_node_patchers_agree(tmp_path):
+    doc = incoming_with_new_athlete()
+    data_path = tmp_path / "athletes.json"
+    data_path.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+    py_bundle, js_bundle = tmp_path / "py" / "index.js", tmp_path / "js" / "index.js"
+    for path in (py_bundle, js_bundle):
+        path.parent.mkdir()
+        shutil.copyfile(REPO_BUNDLE, path)
+
+    report = patch_bundle(str(py_bundle), doc["athletes"], backup=False)
+    out = subprocess.run(
+        ["node", NODE_PATCHER, "--target", str(js_bundle), "--data", str(data_path)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+
+    assert report["added_athletes"] == 1
+    assert "added_athletes=1" in out
+    assert py_bundle.read_bytes() == js_bundle.read_bytes()
@@ -0,0 +1,74 @@
+"""result_uid stays with its result across reruns, corrections and reorders."""
+import json
+
+from result_identity import ResultIdentityIndex
+
+
+def run(date, place, rank, points, category="FIS"):
+    return {"date": date, "place": place, "discipline": "Slalom", "category": category,
+            "rank": rank, "rank_status": None, "points": points, "cup_points": None}
+
+
+def test_rerun_is_stable_and_not_dirty(tmp_path):
+    path = str(tmp_path / "identity.json")
+    results = [run("2026-01-10", "Levi", 4, 20.0), run("2026-01-10", "Levi", 9, 35.0), run("2026-01-03", "Levi", 2, 12.0)]
+    index = ResultIdentityIndex.load(path)
+    first = index.assign("9000001", results)
+    index.save()
+
+    again = ResultIdentityIndex.load(path)
+    assert again.assign("9000001", results) == first
+    assert again.stats["minted"] == 0
+    assert not again.dirty
+    assert len(set(first)) == 3
+
+
+def test_corrected_rank_keeps_its_uid():
+    index = ResultIdentityIndex()
+    [uid] = index.assign("9000001", [run("2026-01-10", "Levi", 4, 20.0)])
+    assert index.assign("9000001", [run("2026-01-10", "Levi", 5, 22.5)]) == [uid]
+
+
+def test_reordered_runs_do_not_swap_uids():
+    index = ResultIdentityIndex()
+    a, b = run("2026-01-10", "Levi", 4, 20.0), run("2026-01-10", "Levi", 9, 35.0)
+    uid_a, uid_b = index.assign("9000001", [a, b])
+    # A later result sorts ahead and pushes the two runs around
+    assert index.assign("9000001", [b, a]) == [uid_b, uid_a]
+    # A rank correction on one run that also reorders them
+    corrected = run("2026-01-10", "Levi", 12, 41.0)
+    assert index.assign("9000001", [b, corrected]) == [uid_b, uid_a]
+    assert index.stats["minted"] == 2
+
+
+def test_exact_duplicates_share_a_uid():
+    index = ResultIdentityIndex()
+    r = run("2026-01-10", "Levi", 4, 20.0)
+    first, second = index.assign("9000001", [r, dict(r)])
+    assert first == second
+    assert len(index.keys) == 1
+
+
+def test_prune_drops_stale_keys_and_missing_athletes():
+    index = ResultIdentityIndex()
+    index.assign("9000001", [run("2026-01-10", "Levi", 4, 20.0), run("2025-12-01", "Levi", 7, 30.0)])
+    index.assign("9000002", [run("2026-01-10", "Levi", 8, 31.0)])
+    index.assign("9000003", [run("2026-01-10", "Levi", 1, 0.0)])
+    index._reset_run()
+
+    # 9000001 lost its December result, 9000002 was reused as-is, 9000003 left the roster
+    index.assign("9000001", [run("2026-01-10", "Levi", 4, 20.0)])
+    assert index.prune(["9000001", "9000002"]) == 2
+    assert sorted(key.split("|")[0] for key in index.keys) == ["9000001", "9000002"]
+    assert index.dirty
+
+
+def test_version_1_index_is_migrated(tmp_path):
+    path = tmp_path / "identity.json"
+    r = run("2026-01-10", "Levi", 4, 20.0)
+    key = "9000001|2026-01-10|Levi|Slalom|FIS"
+    path.write_text(json.dumps({"version": 1, "keys": {key: ["legacy-uid"]}}))
+    index = ResultIdentityIndex.load(str(path))
+    assert index.assign("9000001", [r]) == ["legacy-uid"]
+    index.save()
+    assert json.loads(path.read_text())["version"] == 2
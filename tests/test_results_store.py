@@ -0,0 +1,44 @@
+from results_store import ResultsStore
+
+
+def athlete(rank, points, uid="uid-1"):
+    return {
+        "fis_code": "9000001",
+        "sport": "alpine",
+        "recent_results": [
+            {"result_uid": uid, "date": "2025-12-14", "event": "Slalom", "rank": rank, "rank_status": None,
+             "points": points, "place": "Val d'Isere", "category": "World Cup", "discipline": "Slalom", "cup_points": 10},
+            {"result_uid": "uid-2", "date": "2026-01-10", "event": "Giant Slalom", "rank": 4, "rank_status": None,
+             "points": 20.5, "place": "Adelboden", "category": "World Cup", "discipline": "Giant Slalom", "cup_points": 50},
+        ],
+    }
+
+
+def test_reappending_the_same_results_adds_nothing(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    assert store.append([athlete(12, 30.0)])["added"] == 2
+    stats = store.append([athlete(12, 30.0)])
+    assert (stats["added"], stats["replaced"], stats["unchanged"]) == (0, 0, 2)
+    assert len(store.query(season=2026)) == 2
+
+
+def test_correction_replaces_the_row_it_corrects(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append([athlete(12, 30.0)])
+    stats = store.append([athlete(11, 28.5)])
+    assert (stats["added"], stats["replaced"]) == (0, 1)
+
+    rows = store.query(season=2026, sport="alpine", place="Val d'Isere")
+    assert [(r["rank"], r["points"]) for r in rows] == [(11, 28.5)]
+    assert len(store.query(season=2026)) == 2
+
+    # The tombstone survives reopening, and a later writer sees the corrected row as current
+    assert store.append([athlete(11, 28.5)])["unchanged"] == 2
+    assert store.partition(2026, "alpine").superseded == [0]
+
+
+def test_results_without_uid_fall_back_to_content_identity(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    legacy = athlete(12, 30.0, uid=None)
+    store.append([legacy])
+    assert store.append([legacy])["unchanged"] == 2
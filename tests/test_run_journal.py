@@ -0,0 +1,60 @@
+import os
+import time
+
+from run_journal import RunJournal, prune_runs
+
+
+def test_journal_resumes_completed_urls_and_stages(tmp_path):
+    journal = RunJournal("run1", str(tmp_path))
+    journal.record_url("https://fis/a", ok=True)
+    journal.record_url("https://fis/b", ok=False)
+    journal.record_stage("scrape", profiles=2)
+    journal.close()
+    # A run killed mid-write leaves a torn last line
+    with open(os.path.join(tmp_path, "run1", "journal.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"type": "url", "url": "https://fis/c", "o')
+
+    assert RunJournal.exists("run1", str(tmp_path))
+    resumed = RunJournal("run1", str(tmp_path))
+    assert resumed.completed_urls() == {"https://fis/a"}
+    assert resumed.stage_output("scrape") == {"profiles": 2}
+    assert resumed.stage_output("process") is None
+    resumed.close()
+
+
+def test_entries_after_a_torn_line_survive_the_next_resume(tmp_path):
+    journal = RunJournal("run1", str(tmp_path))
+    journal.record_url("https://fis/a", ok=True)
+    journal.close()
+    with open(os.path.join(tmp_path, "run1", "journal.jsonl"), "a", encoding="utf-8") as f:
+        f.write('{"type": "url", "url": "https://fis/b", "o')
+
+    # First resume crashes again after recording one more URL
+    resumed = RunJournal("run1", str(tmp_path))
+    resumed.record_url("https://fis/c", ok=True)
+    resumed.close()
+
+    again = RunJournal("run1", str(tmp_path))
+    assert again.completed_urls() == {"https://fis/a", "https://fis/c"}
+    again.close()
+
+
+def test_finish_keeps_only_the_journal(tmp_path):
+    journal = RunJournal("run1", str(tmp_path))
+    journal.write_stage_file("processed.json", [{"id": "KOR001"}])
+    journal.record_stage("health", passed=True)
+    journal.finish()
+    assert os.listdir(os.path.join(tmp_path, "run1")) == ["journal.jsonl"]
+    assert RunJournal("run1", str(tmp_path)).stage_output("health") == {"passed": True}
+
+
+def test_prune_runs_keeps_newest_and_current(tmp_path):
+    for i, run_id in enumerate(["r1", "r2", "r3", "r4"]):
+        RunJournal(run_id, str(tmp_path)).close()
+        stamp = time.time() - 100 + i
+        os.utime(os.path.join(tmp_path, run_id, "journal.jsonl"), (stamp, stamp))
+
+    removed = prune_runs(str(tmp_path), keep=2, current="r1")
+    assert sorted(removed) == ["r2"]
+    assert sorted(os.listdir(tmp_path)) == ["r1", "r3", "r4"]
+    assert prune_runs(str(tmp_path / "missing")) == []
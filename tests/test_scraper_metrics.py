@@ -0,0 +1,69 @@
+"""FISScraper: fetch_seconds excludes queueing and backoff; two-stage on_result errors reach the consumer."""
+import threading
+
+import pytest
+
+from fis_scraper import FISScraper
+from fis_stub_server import start_stub_server
+from pipeline_metrics import PipelineMetrics
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(latency_ms=20)
+    yield server
+    server.shutdown()
+
+
+def test_rate_limit_waits_are_not_fetch_time(stub, tmp_path):
+    urls = [stub.biography_url(cid) for cid in sorted(stub.pages)[:12]]
+    metrics = PipelineMetrics()
+    scraper = FISScraper(
+        cache_file=str(tmp_path / "cache.sqlite"),
+        force_refresh=True,
+        max_workers=4,
+        rate_limit_per_sec=10,
+        metrics=metrics,
+    )
+    profiles = scraper.scrape_all(urls)
+    assert all(profiles)
+
+    histograms = metrics.to_dict()["histograms"]
+    fetch, waits = histograms["fetch_seconds"], histograms["rate_limit_wait_seconds"]
+    assert fetch["count"] == len(urls)
+    # 12 requests at 10/s queue for ~1.1s in total, while each round trip is ~20ms
+    assert waits["sum"] > 0.5
+    assert fetch["max"] < 0.5
+    assert fetch["sum"] < waits["sum"]
+    assert "host_wait_seconds" in histograms
+
+
+def test_on_result_error_reaches_the_two_stage_consumer(stub, tmp_path):
+    urls = [stub.biography_url(cid) for cid in sorted(stub.pages)[:6]]
+    scraper = FISScraper(
+        cache_file=str(tmp_path / "cache.sqlite"),
+        force_refresh=True,
+        max_workers=2,
+        parse_workers=1,
+        stage_queue_size=2,
+        request_interval_sec=0,
+    )
+
+    def on_result(url, data):
+        if url == urls[2]:
+            raise OSError("journal write failed")
+
+    outcome = []
+
+    def consume():
+        try:
+            scraper.scrape_all(urls, on_result=on_result)
+        except OSError as e:
+            outcome.append(e)
+
+    # Before the fix the consumer blocked forever on the unresolved slot
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    consumer.join(timeout=60)
+    assert not consumer.is_alive()
+    assert [str(e) for e in outcome] == ["journal write failed"]
@@ -0,0 +1,86 @@
+"""apply_staged_sync (supabase_schema.sql) ends in the same state as the full upsert + delete sync.
+
+Needs a scratch Postgres with the schema applied, e.g.
+BENCH_DATABASE_URL=postgresql://localhost/scratch; its tables are truncated.
+The daily workflow provides one as a Postgres service container.
+"""
+import os
+
+import pytest
+
+from benchmark import SYNC_TABLES, _sync_reset, _sync_state, _sync_upsert
+from supabase_sync import STAGING_TABLES, TABLE_KEYS, build_rows
+
+psycopg = pytest.importorskip("psycopg")
+DSN = os.getenv("BENCH_DATABASE_URL", "")
+pytestmark = pytest.mark.skipif(not DSN, reason="set BENCH_DATABASE_URL to a scratch database")
+
+
+def result(uid, date, rank, points):
+    return {"result_uid": uid, "date": date, "place": "Levi", "category": "FIS", "discipline": "Slalom",
+            "rank": rank, "rank_status": None, "points": points, "cup_points": None}
+
+
+def athlete(code, results):
+    return {"id": code, "fis_code": code, "name_en": f"Athlete {code}", "sport": "alpine_skiing", "recent_results": results}
+
+
+@pytest.fixture
+def conn():
+    with psycopg.connect(DSN, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute("select count(*) from public.athletes where sync_run_id not like 'bench-%'")
+            if cur.fetchone()[0]:
+                pytest.skip("BENCH_DATABASE_URL has non-benchmark rows; use a scratch database")
+        yield conn
+        _sync_reset(conn, ([], []), 100)
+
+
+def test_staged_apply_matches_full_sync(conn):
+    first = {"metadata": {}, "athletes": [
+        athlete("9000001", [result("a1", "2026-01-10", 4, 20.0), result("a2", "2026-01-03", 9, 35.0)]),
+        athlete("9000002", [result("b1", "2026-01-10", 2, 12.0)]),
+        athlete("9000003", [result("c1", "2026-01-10", 30, 80.0)]),
+    ]}
+    # Next sync: a1 re-scored, a2 gone, 9000003 left the roster
+    second = {"metadata": {}, "athletes": [
+        athlete("9000001", [result("a1", "2026-01-10", 5, 22.5)]),
+        athlete("9000002", [result("b1", "2026-01-10", 2, 12.0)]),
+    ]}
+    seed = build_rows(first, "bench-1")[:2]
+    athlete_rows, result_rows, _ = build_rows(second, "bench-2")
+
+    _sync_reset(conn, seed, 100)
+    for table, rows in zip(SYNC_TABLES, (athlete_rows, result_rows)):
+        _sync_upsert(conn, table, rows, TABLE_KEYS[table], 100)
+    with conn.cursor() as cur:
+        for table in ("athlete_results", "athletes"):
+            cur.execute(f"delete from public.{table} where sync_run_id <> %s", ("bench-2",))
+    full = _sync_state(conn)
+
+    _sync_reset(conn, seed, 100)
+    for table, rows in zip(SYNC_TABLES, (athlete_rows, result_rows)):
+        _sync_upsert(conn, STAGING_TABLES[table], rows, f"sync_run_id,{TABLE_KEYS[table]}", 100)
+    with conn.cursor() as cur:
+        cur.execute("select public.apply_staged_sync(%s, %s, %s)", ("bench-2", len(athlete_rows), len(result_rows)))
+        applied = cur.fetchone()[0]
+        cur.execute("select result_uid from public.deleted_results order by 1")
+        tombstones = [row[0] for row in cur.fetchall()]
+
+    assert _sync_state(conn) == full
+    assert [uid for uid, _ in full[1]] == ["a1", "b1"]
+    assert tombstones == ["a2", "c1"]
+    assert applied["athlete_results"]["deleted"] == 2
+    assert applied["athlete_results"]["upserted"] >= 1
+
+
+def test_incomplete_staging_is_refused(conn):
+    doc = {"metadata": {}, "athletes": [athlete("9000001", [result("a1", "2026-01-10", 4, 20.0)])]}
+    athlete_rows, result_rows, _ = build_rows(doc, "bench-3")
+    _sync_reset(conn, build_rows(doc, "bench-1")[:2], 100)
+    _sync_upsert(conn, STAGING_TABLES["athletes"], athlete_rows, f"sync_run_id,{TABLE_KEYS['athletes']}", 100)
+    with conn.cursor() as cur:
+        with pytest.raises(psycopg.errors.RaiseException):
+            cur.execute("select public.apply_staged_sync(%s, %s, %s)", ("bench-3", 1, 2))
+        cur.execute("select count(*) from public.athlete_results")
+        assert cur.fetchone()[0] == 1